@@ -3,6 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional
 import json
 
+from ffmcp import semantic_cache
+from ffmcp.context import build_context
+from ffmcp.tokenizer import token_counter
 from ffmcp.providers import get_provider
 from ffmcp.agents.actions import AgentAction, BUILTIN_ACTIONS, ActionContext
 
@@ -58,19 +61,33 @@ class Agent:
         return [act.as_tool_definition() for act in self._actions.values()]
 
     # ---------------- Run ----------------
-    def run(self, *, input_text: str, images: Optional[List[str]] = None, extra_messages: Optional[List[Dict[str, Any]]] = None, thread_name: Optional[str] = None) -> str:
-        # Load thread messages if available
-        thread_messages = []
+    def context_budget(self) -> int:
+        """Prompt token budget: the agent's context_budget property, else the config setting."""
+        budget = self.properties.get('context_budget')
+        if budget:
+            return int(budget)
+        return self.config.get_context_budget(self.provider_name, self.model)
+
+    def run(self, *, input_text: str, images: Optional[List[str]] = None, extra_messages: Optional[List[Dict[str, Any]]] = None, thread_name: Optional[str] = None,
+            system_context: Optional[List[str]] = None, memory_context: Optional[str] = None) -> str:
+        """Answer input_text. system_context: extra system texts sent after the instructions (e.g. a team's hierarchy);
+        memory_context: extra memory (e.g. a team's shared memory), budgeted with the agent's own."""
         if thread_name is None:
             # Try to get active thread
             thread_name = self.config.get_active_thread(self.name)
-        
+        # One batched write for the whole run (tool loops append many messages)
+        with self.config.batch():
+            result = self._run(input_text=input_text, images=images, extra_messages=extra_messages, thread_name=thread_name,
+                               system_context=system_context, memory_context=memory_context)
         if thread_name:
-            thread_messages = self.config.get_thread_messages(self.name, thread_name)
-        
-        # Build messages
-        messages: List[Dict[str, Any]] = []
+            # Fold older turns into the thread summary once it grows past the threshold
+            self.config.maybe_compact_thread(self.name, thread_name, default_provider=self.provider_name)
+        return result
+
+    def _run(self, *, input_text: str, images: Optional[List[str]], extra_messages: Optional[List[Dict[str, Any]]], thread_name: Optional[str],
+             system_context: Optional[List[str]] = None, memory_context: Optional[str] = None) -> str:
         # Optional memory context from brain
+        mem_text = None
         if self.brain:
             try:
                 from ffmcp.brain import ZepBrainClient, BrainInfo
@@ -79,20 +96,34 @@ class Agent:
                 brain_info = BrainInfo(name=self.brain)
                 mem = client.memory_get(brain=brain_info, session_id=None)
                 mem_text = json.dumps(mem.get('result'), default=str)
-                if len(mem_text) > 50000:
-                    mem_text = mem_text[:50000]
-                messages.append({"role": "system", "content": f"Memory context (read-only): {mem_text}"})
             except Exception:
                 # If memory unavailable, continue without failing
                 pass
-        if self.instructions:
-            messages.append({"role": "system", "content": self.instructions})
-        
-        # Add thread messages (excluding system messages which we already have)
-        for msg in thread_messages:
-            if msg.get('role') != 'system':
-                messages.append(msg)
-        
+        if memory_context:
+            mem_text = f"{mem_text}\n\n{memory_context}" if mem_text else memory_context
+
+        def load_history(tokens: int) -> List[Dict[str, Any]]:
+            # Most recent thread turns that fit (system messages are ours to set)
+            recent = self.config.get_recent_thread_messages(self.name, thread_name, tokens)
+            return [msg for msg in recent if msg.get('role') != 'system']
+
+        tail: List[Dict[str, Any]] = [{"role": "user", "content": input_text}]
+        if extra_messages:
+            tail.extend(extra_messages)
+
+        summary = self.config.get_thread_info(self.name, thread_name).get('summary') if thread_name else None
+
+        # Pack instructions, memory, summary and recent turns into the prompt budget
+        messages = build_context(
+            budget=self.context_budget(),
+            system=[self.instructions, *(system_context or [])],
+            memory=mem_text,
+            summary=summary,
+            load_history=load_history if thread_name else None,
+            tail=tail,
+            counter=token_counter(self.provider_name, self.model or self._provider.get_default_model(), self.config),
+        )
+
         # Optional: include image content upfront if provided
         if images:
             # If provider supports direct vision with file paths, use a one-shot call and return
@@ -105,14 +136,27 @@ class Agent:
                     self.config.add_thread_message(self.name, thread_name, 'assistant', result)
                 return result
 
-        messages.append({"role": "user", "content": input_text})
-        if extra_messages:
-            messages.extend(extra_messages)
+        # Near-duplicate prompts in the same context reuse an earlier answer (see ffmcp.semantic_cache).
+        # Not for agents with actions: their answers depend on tool results (fetched pages, delegation)
+        namespace = f'agent:{self.name}'
+        scope = semantic_cache.scope_key(
+            provider=self.provider_name,
+            model=self.model or self._provider.get_default_model(),
+            context=messages[:len(messages) - len(tail)] + tail[1:],
+            images=images,
+        )
+        cache, match = (None, None) if self._actions else semantic_cache.lookup(self.config, namespace, input_text, scope=scope)
+        if match is not None and match.hit:
+            if thread_name:
+                self.config.add_thread_message(self.name, thread_name, 'user', input_text)
+                self.config.add_thread_message(self.name, thread_name, 'assistant', match.answer)
+            return match.answer
 
         tools = self.get_tool_definitions() if self._actions else None
         # If there are tools and provider is OpenAI, run tool-calling loop
         if tools and getattr(self._provider, 'chat_with_tools', None):
-            result = self._run_with_tools(messages, tools, thread_name=thread_name)
+            # Only this turn's messages get saved; history is already in the thread
+            result = self._run_with_tools(messages, tools, thread_name=thread_name, save_from=len(messages) - len(tail))
         else:
             # Fallback: plain chat
             result = self._provider.chat(messages, model=self.model)
@@ -120,10 +164,11 @@ class Agent:
             if thread_name:
                 self.config.add_thread_message(self.name, thread_name, 'user', input_text)
                 self.config.add_thread_message(self.name, thread_name, 'assistant', result)
-        
+
+        semantic_cache.remember(cache, match, namespace, input_text, result, scope=scope)
         return result
 
-    def _run_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], *, max_rounds: int = 5, thread_name: Optional[str] = None) -> str:
+    def _run_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], *, max_rounds: int = 5, thread_name: Optional[str] = None, save_from: int = 0) -> str:
         rounds = 0
         content_final: Optional[str] = None
         while rounds < max_rounds:
@@ -178,9 +223,9 @@ class Agent:
 
             # Continue loop; model will see tool results
         
-        # Save all messages to thread (excluding system messages)
+        # Save this turn's messages to thread (excluding system messages)
         if thread_name:
-            for msg in messages:
+            for msg in messages[save_from:]:
                 role = msg.get('role')
                 if role in ('user', 'assistant', 'tool'):
                     content = msg.get('content', '')
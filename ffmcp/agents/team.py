@@ -48,13 +48,14 @@ class Team:
                 raise ValueError(f"Member agent '{agent_name}' not found")
         
         # Validate sub-teams exist
-        for sub_team_name in self.sub_teams:
-            if not config.get_team(sub_team_name):
-                raise ValueError(f"Sub-team '{sub_team_name}' not found")
-            # Set parent relationship
-            sub_team_data = config.get_team(sub_team_name)
-            if sub_team_data:
-                config.update_team(sub_team_name, {'parent_team': self.name})
+        with config.batch():
+            for sub_team_name in self.sub_teams:
+                if not config.get_team(sub_team_name):
+                    raise ValueError(f"Sub-team '{sub_team_name}' not found")
+                # Set parent relationship
+                sub_team_data = config.get_team(sub_team_name)
+                if sub_team_data:
+                    config.update_team(sub_team_name, {'parent_team': self.name})
     
     def get_orchestrator(self) -> Optional[Agent]:
         """Get the orchestrator agent instance."""
@@ -169,6 +170,11 @@ class Team:
         Returns:
             Dict with 'result', 'orchestrator', 'thread_name', etc.
         """
+        # Thread creation, delegations and orchestrator messages flush once
+        with self.config.batch():
+            return self._run(task=task, thread_name=thread_name)
+
+    def _run(self, *, task: str, thread_name: Optional[str]) -> Dict[str, Any]:
         orchestrator_agent = self.get_orchestrator()
         if not orchestrator_agent:
             return {
@@ -191,7 +197,9 @@ class Team:
                 # Thread already exists, that's fine
                 pass
         
-        # Build comprehensive context about the team hierarchy
+        # Build comprehensive context about the team hierarchy. It is sent as
+        # system context, ahead of the task: the same on every run, so the
+        # provider can serve it from its prompt cache (see ffmcp.prompt_cache)
         all_agents = self.get_all_agents_recursive()
         hierarchy_info = self.get_hierarchy_context()
         
@@ -209,11 +217,12 @@ When delegating to sub-teams, they will handle the task with their own orchestra
 All activity flows up through the hierarchy, and you have visibility into everything through shared memory.
 
 Your role is to break down the task, delegate appropriately across the hierarchy, and synthesize results.
-
-Task: {task}
 """
+        system_context = [team_context]
         
-        # If shared brain is configured, add memory context
+        # If shared brain is configured, add memory context. It goes through the
+        # agent's context budget (and its memory share), not the system text
+        memory_context = None
         if self.shared_brain:
             try:
                 from ffmcp.brain import ZepBrainClient, BrainInfo
@@ -224,15 +233,17 @@ Task: {task}
                 mem_text = json.dumps(mem.get('result'), default=str)
                 if len(mem_text) > 50000:
                     mem_text = mem_text[:50000]
-                team_context += f"\n\nShared Memory Context:\n{mem_text}"
+                memory_context = f"Shared Memory Context:\n{mem_text}"
             except Exception:
                 # If memory unavailable, continue without failing
                 pass
         
         try:
             result = orchestrator_agent.run(
-                input_text=team_context,
+                input_text=task,
                 thread_name=thread_name,
+                system_context=system_context,
+                memory_context=memory_context,
             )
             
             return {
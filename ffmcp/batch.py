@@ -0,0 +1,223 @@
+"""Concurrent bulk generation over JSONL input
+
+Each input line is one request:
+
+    {"id": "q1", "prompt": "...", "system": "...", "provider": "openai",
+     "model": "gpt-4o-mini", "params": {"temperature": 0.2, "max_tokens": 200}}
+
+Only "prompt" is required; "id" defaults to the line number and
+provider/model default to the batch settings. Each result is one JSON line:
+
+    {"id": "q1", "provider": "openai", "model": "...", "output": "...", "attempts": 1, "elapsed_ms": 812}
+
+or, after retries are exhausted, the same record with "error" instead of
+"output". With max_input_tokens, requests whose prompt is longer (counted
+with the model's tokenizer, see ffmcp.tokenizer) fail without a call. Requests run on the providers' async API (see
+BaseProvider.agenerate/achat) with at most `concurrency` requests in
+flight per provider; provider clients are created once per batch.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from ffmcp.providers import get_provider
+from ffmcp.ratelimit import TRANSIENT_STATUS, is_transient, retry_delay  # noqa: F401 (re-exported)
+from ffmcp.tokenizer import token_counter
+
+
+logger = logging.getLogger('ffmcp.batch')
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RETRIES = 3
+# Backoff before retry n is up to RETRY_BASE_DELAY * 2**(n-1) seconds, capped (Retry-After may ask for more)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Requests read ahead of the slowest unfinished one (bounds memory in input order)
+WINDOW_PER_SLOT = 4
+
+
+def record_key(record_id: Any) -> str:
+    """Comparable key for a request id (ids may be strings or numbers)."""
+    return json.dumps(record_id, sort_keys=True)
+
+
+def parse_requests(lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, request) for non-blank lines.
+
+    Malformed lines yield a request carrying an 'error' so they show up in
+    the output instead of aborting the batch.
+    """
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('expected a JSON object')
+        except ValueError as e:
+            yield lineno, {'id': lineno, 'error': f'line {lineno}: invalid request: {e}'}
+            continue
+        request.setdefault('id', lineno)
+        if not isinstance(request.get('prompt'), str) or not request['prompt'].strip():
+            request['error'] = f'line {lineno}: missing "prompt"'
+        yield lineno, request
+
+
+def request_messages(request: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Chat messages of a request: its system message, if any, and its prompt."""
+    messages = []
+    if request.get('system'):
+        messages.append({"role": "system", "content": request['system']})
+    messages.append({"role": "user", "content": request['prompt']})
+    return messages
+
+
+def check_input_tokens(config, provider: str, model: Optional[str], messages: List[Dict[str, str]], max_input_tokens: Optional[int]) -> int:
+    """Prompt tokens of messages; raises ValueError if there are more than max_input_tokens."""
+    tokens = token_counter(provider, model, config).messages(messages)
+    if max_input_tokens and tokens > max_input_tokens:
+        raise ValueError(f'prompt is {tokens} tokens, over the limit of {max_input_tokens}')
+    return tokens
+
+
+def completed_ids(output: TextIO) -> Set[str]:
+    """Keys (see record_key) of successful results in an existing output file, for resume."""
+    done: Set[str] = set()
+    for line in output:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # e.g. a line cut off when the previous run was killed
+        if isinstance(record, dict) and 'id' in record and 'error' not in record:
+            done.add(record_key(record['id']))
+    return done
+
+
+class BatchRunner:
+    """Runs parsed requests concurrently and hands results to `emit` in the chosen order."""
+
+    def __init__(
+        self,
+        config,
+        *,
+        provider: str = 'openai',
+        model: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        retries: int = DEFAULT_RETRIES,
+        ordered: bool = False,
+        max_input_tokens: Optional[int] = None,
+    ):
+        self.config = config
+        self.provider = provider
+        self.model = model
+        self.params = dict(params or {})
+        self.concurrency = max(1, int(concurrency))
+        self.retries = max(0, int(retries))
+        self.ordered = ordered
+        self.max_input_tokens = max_input_tokens
+        self.stats = {'ok': 0, 'failed': 0, 'skipped': 0}
+        self._providers: Dict[str, Any] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _provider(self, name: str):
+        instance = self._providers.get(name)
+        if instance is None:
+            instance = self._providers[name] = get_provider(name, self.config)
+            self._slots[name] = asyncio.Semaphore(self.concurrency)
+        return instance
+
+    async def _call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        name = request.get('provider') or self.provider
+        params = {**self.params, **(request.get('params') or {})}
+        model = request.get('model') or self.model
+        if model:
+            params['model'] = model
+        result: Dict[str, Any] = {'id': request['id'], 'provider': name}
+        started = time.monotonic()
+        attempts = 0
+        try:
+            provider = self._provider(name)
+            result['model'] = params.get('model') or provider.get_default_model()
+            messages = request_messages(request)
+            if self.max_input_tokens:
+                check_input_tokens(self.config, name, result['model'], messages, self.max_input_tokens)
+            while True:
+                attempts += 1
+                try:
+                    async with self._slots[name]:
+                        if request.get('system'):
+                            result['output'] = await provider.achat(messages, retries=0, **params)
+                        else:
+                            result['output'] = await provider.agenerate(request['prompt'], retries=0, **params)
+                    break
+                except Exception as e:
+                    if attempts > self.retries or not is_transient(e):
+                        raise
+                    # Retried here rather than in the provider so `attempts` is reported per request
+                    delay = retry_delay(e, attempts, {'base_delay': RETRY_BASE_DELAY, 'max_delay': RETRY_MAX_DELAY})
+                    logger.info("batch id=%s attempt %d failed (%s); retrying in %.1fs", request['id'], attempts, e, delay)
+                    await asyncio.sleep(delay)
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+        result['attempts'] = attempts
+        result['elapsed_ms'] = int((time.monotonic() - started) * 1000)
+        return result
+
+    async def run(
+        self,
+        requests: Iterable[Tuple[int, Dict[str, Any]]],
+        emit: Callable[[Dict[str, Any]], None],
+        *,
+        skip: Optional[Set[str]] = None,
+    ) -> Dict[str, int]:
+        """Run all requests; emit(result) is called once per request not in skip."""
+        loop = asyncio.get_running_loop()
+        window = asyncio.Semaphore(self.concurrency * WINDOW_PER_SLOT)
+        pending: Dict[int, Dict[str, Any]] = {}
+        order = []          # input positions not yet emitted (ordered mode)
+        tasks: Set[asyncio.Task] = set()
+
+        def _emit(result: Dict[str, Any]):
+            self.stats['failed' if 'error' in result else 'ok'] += 1
+            emit(result)
+            window.release()
+
+        def _done(position: int, result: Dict[str, Any]):
+            if not self.ordered:
+                _emit(result)
+                return
+            pending[position] = result
+            while order and order[0] in pending:
+                _emit(pending.pop(order.pop(0)))
+
+        async def _one(position: int, request: Dict[str, Any]):
+            if 'error' in request:
+                result = {'id': request['id'], 'error': request['error'], 'attempts': 0}
+            else:
+                result = await self._call(request)
+            _done(position, result)
+
+        iterator = iter(requests)
+        position = 0
+        while True:
+            # Reading may block (stdin), so it runs off the event loop
+            item = await loop.run_in_executor(None, next, iterator, None)
+            if item is None:
+                break
+            _, request = item
+            if skip and record_key(request.get('id')) in skip:
+                self.stats['skipped'] += 1
+                continue
+            await window.acquire()
+            position += 1
+            order.append(position)
+            task = asyncio.ensure_future(_one(position, request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        return self.stats
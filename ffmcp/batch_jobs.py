@@ -0,0 +1,259 @@
+"""Provider batch jobs: bulk requests at batch prices, answered within 24h
+
+`ffmcp batch submit` packs a JSONL file of requests (the format of
+`ffmcp batch run`, see ffmcp.batch) into one provider batch: the OpenAI
+Batch API or Anthropic Message Batches, which cost half as much as
+real-time requests and have their own, much larger rate limits.
+`ffmcp batch status` shows its progress and `ffmcp batch fetch` waits
+for it to end, polling with backoff, then streams its results as JSONL
+mapped back to the input ids:
+
+    {"id": "q1", "provider": "openai", "model": "...", "output": "...", "batch": "batch_abc"}
+
+or the same record with "error" instead of "output". Providers only take
+short string ids, so request n of the input is sent as custom_id "r<n>";
+the mapping back to input ids is kept in ~/.ffmcp/batch_jobs/<batch>.json,
+so results can be fetched from another process (e.g. the next morning).
+Prompts are counted with the model's tokenizer (ffmcp.tokenizer) at
+submit: the job records its prompt tokens, and max_input_tokens rejects
+over-long requests before anything is uploaded.
+
+To try this offline, run `ffmcp batch serve` (ffmcp.batch_standin) and
+point the SDKs at it with OPENAI_BASE_URL / ANTHROPIC_BASE_URL.
+"""
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ffmcp.batch import check_input_tokens, request_messages
+from ffmcp.providers import get_provider
+from ffmcp.ratelimit import is_transient
+from ffmcp.storage import atomic_write_json
+
+
+logger = logging.getLogger('ffmcp.batch_jobs')
+
+# Requests per batch the providers accept
+MAX_REQUESTS = {'openai': 50000, 'anthropic': 100000}
+# Polling starts at POLL_INITIAL_DELAY seconds and backs off by POLL_BACKOFF up to POLL_MAX_DELAY
+POLL_INITIAL_DELAY = 5.0
+POLL_MAX_DELAY = 60.0
+POLL_BACKOFF = 1.5
+
+_BATCH_ID = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def jobs_dir(config) -> Path:
+    path = Path(config.config_dir) / 'batch_jobs'
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def _job_path(config, batch_id: str) -> Path:
+    if not _BATCH_ID.match(batch_id or ''):
+        raise ValueError(f'invalid batch id: {batch_id!r}')
+    return jobs_dir(config) / f'{batch_id}.json'
+
+
+def save_job(config, job: Dict[str, Any]):
+    atomic_write_json(_job_path(config, job['id']), job)
+
+
+def load_job(config, batch_id: str) -> Dict[str, Any]:
+    """A submitted job, as saved by submit()."""
+    try:
+        with open(_job_path(config, batch_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f'unknown batch: {batch_id} (see `ffmcp batch status`)')
+
+
+def list_jobs(config) -> List[Dict[str, Any]]:
+    """Submitted jobs, newest first."""
+    jobs = []
+    for path in jobs_dir(config).glob('*.json'):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                jobs.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.debug("skipping batch job file %s: %s", path, e)
+    return sorted(jobs, key=lambda job: job.get('submitted_at') or 0, reverse=True)
+
+
+def _batch_provider(config, name: str):
+    provider = get_provider(name, config)
+    if not hasattr(provider, 'create_batch'):
+        supported = ', '.join(sorted(MAX_REQUESTS))
+        raise ValueError(f'{name} has no batch API (supported: {supported})')
+    return provider
+
+
+def pack_requests(
+    requests: Iterable[Tuple[int, Dict[str, Any]]],
+    *,
+    provider: str,
+    model: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    config=None,
+    max_input_tokens: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], int]:
+    """Turn parsed requests (see ffmcp.batch.parse_requests) into provider batch requests.
+
+    Returns (batch requests, {custom_id: input id}, prompt tokens). Invalid
+    requests raise ValueError: a batch is submitted whole or not at all.
+    """
+    packed: List[Dict[str, Any]] = []
+    ids: Dict[str, Any] = {}
+    prompt_tokens = 0
+    for position, (lineno, request) in enumerate(requests, 1):
+        if 'error' in request:
+            raise ValueError(request['error'])
+        if request.get('provider') and request['provider'] != provider:
+            raise ValueError(f"line {lineno}: provider {request['provider']} in a {provider} batch (submit one batch per provider)")
+        messages = request_messages(request)
+        try:
+            prompt_tokens += check_input_tokens(config, provider, request.get('model') or model, messages, max_input_tokens)
+        except ValueError as e:
+            raise ValueError(f'line {lineno}: {e}')
+        custom_id = f'r{position}'
+        ids[custom_id] = request['id']
+        packed.append({
+            'custom_id': custom_id,
+            'messages': messages,
+            'model': request.get('model') or model,
+            'params': {**(params or {}), **(request.get('params') or {})},
+        })
+    if not packed:
+        raise ValueError('no requests to submit')
+    limit = MAX_REQUESTS.get(provider)
+    if limit and len(packed) > limit:
+        raise ValueError(f'{len(packed)} requests exceed the {provider} batch limit of {limit}; split the input')
+    return packed, ids, prompt_tokens
+
+
+def submit(
+    config,
+    requests: Iterable[Tuple[int, Dict[str, Any]]],
+    *,
+    provider: str = 'openai',
+    model: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    source: Optional[str] = None,
+    max_input_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Submit requests as one provider batch and save the job; returns the job."""
+    instance = _batch_provider(config, provider)
+    model = model or instance.get_default_model()
+    packed, ids, prompt_tokens = pack_requests(
+        requests, provider=provider, model=model, params=params, config=config, max_input_tokens=max_input_tokens,
+    )
+    info = instance.create_batch(packed)
+    job = {
+        'id': info['id'],
+        'provider': provider,
+        'model': model,
+        'source': source,
+        'requests': len(packed),
+        'prompt_tokens': prompt_tokens,
+        'submitted_at': time.time(),
+        'status': info['status'],
+        'done': info['done'],
+        'usage_recorded': False,
+        'ids': ids,
+    }
+    save_job(config, job)
+    return job
+
+
+def refresh(config, job: Dict[str, Any], provider=None) -> Dict[str, Any]:
+    """Ask the provider for the batch's status; updates and saves the job, returns the status."""
+    provider = provider or _batch_provider(config, job['provider'])
+    info = provider.get_batch(job['id'])
+    if (info['status'], info['done']) != (job.get('status'), job.get('done')):
+        job['status'] = info['status']
+        job['done'] = info['done']
+        save_job(config, job)
+    return info
+
+
+def wait(
+    config,
+    job: Dict[str, Any],
+    *,
+    timeout: Optional[float] = None,
+    on_poll: Optional[Callable[[Dict[str, Any]], None]] = None,
+    initial_delay: float = POLL_INITIAL_DELAY,
+) -> Dict[str, Any]:
+    """Poll until the batch has ended; returns its final status.
+
+    Transient errors while polling are logged and polled through. Raises
+    TimeoutError if the batch is still running after `timeout` seconds.
+    """
+    provider = _batch_provider(config, job['provider'])
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = max(0.0, initial_delay)
+    while True:
+        try:
+            info = refresh(config, job, provider)
+            if on_poll:
+                on_poll(info)
+            if info['done']:
+                return info
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            logger.info("batch %s: polling failed (%s); retrying in %.0fs", job['id'], e, delay)
+        if deadline is not None and time.monotonic() + delay > deadline:
+            raise TimeoutError(f"batch {job['id']} has not ended after {timeout:g}s")
+        time.sleep(delay)
+        delay = min(POLL_MAX_DELAY, max(delay * POLL_BACKOFF, 1.0))
+
+
+def fetch(config, job: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield the results of an ended batch, mapped to the input ids.
+
+    The batch's token usage goes to the usage ledger (tagged with the
+    batch id) the first time its results are read to the end.
+    """
+    from ffmcp.middleware import USAGE_FORMATS, normalize_usage
+
+    provider = _batch_provider(config, job['provider'])
+    usage_format = USAGE_FORMATS[provider.usage_format]
+    usage: Dict[str, List[int]] = {}
+    ids = job.get('ids') or {}
+    for result in provider.batch_results(job['id']):
+        custom_id = result.get('custom_id')
+        record: Dict[str, Any] = {'id': ids.get(custom_id, custom_id), 'provider': job['provider']}
+        if 'error' in result:
+            record['error'] = result['error']
+        else:
+            model = result.get('model') or job.get('model')
+            record['model'] = model
+            record['output'] = result.get('output')
+            counts = normalize_usage(result.get('usage'), usage_format)
+            if counts:
+                totals = usage.setdefault(model, [0, 0, 0, 0])
+                for i, count in enumerate(counts[:3]):
+                    totals[i] += count
+                totals[3] += 1
+        record['batch'] = job['id']
+        yield record
+    if not job.get('usage_recorded'):
+        _record_usage(config, job, usage)
+
+
+def _record_usage(config, job: Dict[str, Any], usage: Dict[str, List[int]]):
+    # One ledger record per model; usage never fails a fetch
+    try:
+        for model, (prompt, completion, total, requests) in usage.items():
+            config.add_token_usage(
+                job['provider'], total, model=model, prompt_tokens=prompt, completion_tokens=completion,
+                batch=job['id'], requests=requests,
+            )
+        job['usage_recorded'] = True
+        save_job(config, job)
+    except Exception as e:
+        logger.debug("could not record usage of batch %s: %s", job['id'], e)
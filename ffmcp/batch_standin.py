@@ -0,0 +1,255 @@
+"""Local stand-in for the OpenAI Batch and Anthropic Message Batches APIs
+
+Serves just enough of both APIs for `ffmcp batch submit|status|fetch` to
+run offline: file upload/download, batch create/retrieve and results.
+Batches end `delay` seconds after they are created; every request is
+answered with an echo of its last user message, with token counts
+estimated by ffmcp.tokenizer. Requests without messages fail, so error
+results can be tried too.
+
+    ffmcp batch serve --port 8089
+    export OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+    export ANTHROPIC_BASE_URL=http://127.0.0.1:8089
+
+Nothing is persisted; batches live as long as the server.
+"""
+import email.parser
+import email.policy
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from ffmcp.tokenizer import estimate_tokens, messages_tokens
+
+
+logger = logging.getLogger('ffmcp.batch_standin')
+
+DEFAULT_PORT = 8089
+DEFAULT_DELAY = 2.0
+
+
+def _answer(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get('role') == 'user':
+            content = message.get('content')
+            if isinstance(content, list):
+                content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+            return f'echo: {content}'
+    return 'echo:'
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class StandinState:
+    """Files and batches of a running stand-in server."""
+
+    def __init__(self, delay: float = DEFAULT_DELAY):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    def new_id(self, prefix: str) -> str:
+        return f'{prefix}{next(self._ids):06d}'
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        info = {
+            'id': self.new_id('file-'), 'object': 'file', 'bytes': len(content), 'created_at': int(time.time()),
+            'filename': filename, 'purpose': purpose, 'status': 'processed',
+        }
+        with self.lock:
+            self.files[info['id']] = {'info': info, 'content': content}
+        return info
+
+    def ended(self, batch: Dict[str, Any]) -> bool:
+        return time.time() >= batch['created'] + self.delay
+
+    # ---------------- OpenAI ----------------
+    def openai_create(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        stored = self.files.get(body.get('input_file_id') or '')
+        if stored is None:
+            return 404, {'error': {'message': 'No such file', 'type': 'invalid_request_error'}}
+        lines = [json.loads(line) for line in stored['content'].decode('utf-8').splitlines() if line.strip()]
+        batch = {'kind': 'openai', 'id': self.new_id('batch_'), 'created': time.time(), 'lines': lines, 'body': body}
+        with self.lock:
+            self.batches[batch['id']] = batch
+        return 200, self.openai_batch(batch)
+
+    def openai_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        if self.ended(batch) and 'output_file_id' not in batch:
+            self._openai_results(batch)
+        done = 'output_file_id' in batch
+        return {
+            'id': batch['id'], 'object': 'batch', 'endpoint': batch['body'].get('endpoint'),
+            'input_file_id': batch['body'].get('input_file_id'), 'completion_window': '24h',
+            'status': 'completed' if done else 'in_progress', 'created_at': int(batch['created']),
+            'output_file_id': batch.get('output_file_id'), 'error_file_id': batch.get('error_file_id'),
+            'metadata': batch['body'].get('metadata'),
+            'request_counts': {
+                'total': len(batch['lines']),
+                'completed': batch.get('completed', 0),
+                'failed': batch.get('failed', 0),
+            },
+        }
+
+    def _openai_results(self, batch: Dict[str, Any]):
+        output, errors = [], []
+        for line in batch['lines']:
+            body = line.get('body') or {}
+            messages = body.get('messages')
+            if not messages:
+                errors.append({'id': self.new_id('batch_req_'), 'custom_id': line.get('custom_id'), 'response': {
+                    'status_code': 400, 'body': {'error': {'message': 'messages is required', 'type': 'invalid_request_error'}},
+                }, 'error': None})
+                continue
+            text = _answer(messages)
+            prompt, completion = messages_tokens(messages), estimate_tokens(text)
+            output.append({'id': self.new_id('batch_req_'), 'custom_id': line.get('custom_id'), 'error': None, 'response': {
+                'status_code': 200, 'body': {
+                    'id': self.new_id('chatcmpl-'), 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': body.get('model'),
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                    'usage': {'prompt_tokens': prompt, 'completion_tokens': completion, 'total_tokens': prompt + completion},
+                },
+            }})
+        batch['completed'], batch['failed'] = len(output), len(errors)
+        batch['output_file_id'] = self._jsonl_file(output, f"{batch['id']}_output.jsonl")
+        batch['error_file_id'] = self._jsonl_file(errors, f"{batch['id']}_error.jsonl")
+
+    def _jsonl_file(self, records: List[Dict[str, Any]], filename: str) -> Optional[str]:
+        if not records:
+            return None
+        content = ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
+        return self.add_file(content, filename, 'batch_output')['id']
+
+    # ---------------- Anthropic ----------------
+    def anthropic_create(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        batch = {'kind': 'anthropic', 'id': self.new_id('msgbatch_'), 'created': time.time(), 'requests': body.get('requests') or []}
+        with self.lock:
+            self.batches[batch['id']] = batch
+        return 200, self.anthropic_batch(batch, None)
+
+    def anthropic_batch(self, batch: Dict[str, Any], base_url: Optional[str]) -> Dict[str, Any]:
+        ended = self.ended(batch)
+        counts = {'processing': 0, 'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+        if ended:
+            for request in batch['requests']:
+                counts['succeeded' if (request.get('params') or {}).get('messages') else 'errored'] += 1
+        else:
+            counts['processing'] = len(batch['requests'])
+        return {
+            'id': batch['id'], 'type': 'message_batch', 'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': counts, 'created_at': _iso(batch['created']),
+            'expires_at': _iso(batch['created'] + 86400), 'ended_at': _iso(batch['created'] + self.delay) if ended else None,
+            'archived_at': None, 'cancel_initiated_at': None,
+            'results_url': f"{base_url}/v1/messages/batches/{batch['id']}/results" if ended and base_url else None,
+        }
+
+    def anthropic_results(self, batch: Dict[str, Any]) -> bytes:
+        lines = []
+        for request in batch['requests']:
+            params = request.get('params') or {}
+            messages = params.get('messages')
+            if not messages:
+                result = {'type': 'errored', 'error': {'type': 'error', 'error': {'type': 'invalid_request_error', 'message': 'messages: field required'}}}
+            else:
+                text = _answer(messages)
+                prompt = messages_tokens(messages) + estimate_tokens(params.get('system'))
+                result = {'type': 'succeeded', 'message': {
+                    'id': self.new_id('msg_'), 'type': 'message', 'role': 'assistant', 'model': params.get('model'),
+                    'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+                    'usage': {'input_tokens': prompt, 'output_tokens': estimate_tokens(text)},
+                }}
+            lines.append(json.dumps({'custom_id': request.get('custom_id'), 'result': result}) + '\n')
+        return ''.join(lines).encode('utf-8')
+
+
+def _multipart(content_type: str, body: bytes) -> Tuple[Dict[str, str], Dict[str, Tuple[str, bytes]]]:
+    """Form fields and files ({name: (filename, content)}) of a multipart/form-data body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1') + body
+    )
+    fields: Dict[str, str] = {}
+    files: Dict[str, Tuple[str, bytes]] = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        filename = part.get_filename()
+        payload = part.get_payload(decode=True) or b''
+        if filename is not None:
+            files[name] = (filename, payload)
+        else:
+            fields[name] = payload.decode('utf-8')
+    return fields, files
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    state: StandinState
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+    def _send(self, status: int, payload: Any, content_type: str = 'application/json'):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': f'no route for {self.path}'}})
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _base_url(self) -> str:
+        return f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}"
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        state = self.state
+        if path == '/v1/files':
+            fields, files = _multipart(self.headers.get('Content-Type', ''), self._body())
+            if 'file' not in files:
+                return self._send(400, {'error': {'message': 'file is required', 'type': 'invalid_request_error'}})
+            filename, content = files['file']
+            return self._send(200, state.add_file(content, filename, fields.get('purpose', 'batch')))
+        if path == '/v1/batches':
+            return self._send(*state.openai_create(json.loads(self._body() or b'{}')))
+        if path == '/v1/messages/batches':
+            status, batch = state.anthropic_create(json.loads(self._body() or b'{}'))
+            return self._send(status, batch)
+        self._not_found()
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        state = self.state
+        match = re.fullmatch(r'/v1/files/([^/]+)/content', path)
+        if match and match.group(1) in state.files:
+            return self._send(200, state.files[match.group(1)]['content'], 'application/octet-stream')
+        match = re.fullmatch(r'/v1/batches/([^/]+)', path)
+        if match and state.batches.get(match.group(1), {}).get('kind') == 'openai':
+            return self._send(200, state.openai_batch(state.batches[match.group(1)]))
+        match = re.fullmatch(r'/v1/messages/batches/([^/]+)(/results)?', path)
+        if match and state.batches.get(match.group(1), {}).get('kind') == 'anthropic':
+            batch = state.batches[match.group(1)]
+            if not match.group(2):
+                return self._send(200, state.anthropic_batch(batch, self._base_url()))
+            if state.ended(batch):
+                return self._send(200, state.anthropic_results(batch), 'application/binary')
+        self._not_found()
+
+
+def make_server(host: str = '127.0.0.1', port: int = DEFAULT_PORT, delay: float = DEFAULT_DELAY) -> ThreadingHTTPServer:
+    """A stand-in server (not started); call serve_forever() on it."""
+    handler = type('Handler', (StandinHandler,), {'state': StandinState(delay)})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,42 @@
+"""Subcommand modules for the ffmcp CLI.
+
+Each module defines one top-level command or click group and is imported
+by ffmcp.cli only when that command is invoked (see LAZY_COMMANDS there).
+"""
+import json
+from typing import Optional
+
+import click
+
+
+def format_text_output(result: str, json_output: bool, array_output: bool, 
+                       provider: Optional[str] = None, model: Optional[str] = None) -> str:
+    """Format text output as plain text, JSON object, or JSON array."""
+    if json_output:
+        output_data = {'result': result}
+        if provider:
+            output_data['provider'] = provider
+        if model:
+            output_data['model'] = model
+        return json.dumps(output_data, indent=2)
+    elif array_output:
+        return json.dumps([result], indent=2)
+    else:
+        return result
+
+
+class DefaultCommandGroup(click.Group):
+    """A group that runs `default_command` when the first argument is not a subcommand.
+
+    Keeps `ffmcp batch input.jsonl` and `ffmcp tokens -p openai` working
+    next to named subcommands.
+    """
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] not in ('--help', '-h')):
+            args = [self.default_command] + list(args)
+        return super().parse_args(ctx, args)
@@ -0,0 +1,454 @@
+"""`ffmcp agent`: agent, agent thread and agent voice commands"""
+import json
+import sys
+from typing import List, Optional
+
+import click
+
+from ffmcp.agents import Agent
+from ffmcp.commands import format_text_output
+from ffmcp.config import Config
+
+
+@click.group()
+def agent():
+    """Create, manage, and run agents."""
+    pass
+
+
+@agent.command('create')
+@click.argument('name')
+@click.option('--provider', '-p', default='openai', type=click.Choice(['openai', 'anthropic', 'gemini', 'groq', 'deepseek', 'mistral', 'together', 'cohere', 'perplexity', 'ai33', 'aimlapi']), help='Provider name')
+@click.option('--model', '-m', required=True, help='Default model for this agent')
+@click.option('--instructions', '-i', help='System prompt instructions (inline text)')
+@click.option('--instructions-file', '-f', type=click.File('r', encoding='utf-8'), help='Read instructions from file')
+@click.option('--brain', help='Optional brain name for memory/search')
+@click.option('--voice', '-v', help='Voice name to use for TTS')
+@click.option('--prop', 'props', multiple=True, help='Set property key=value (repeatable)')
+@click.option('--web/--no-web', default=True, help='Enable web_fetch action')
+@click.option('--image-gen/--no-image-gen', default=True, help='Enable generate_image action')
+@click.option('--vision-urls/--no-vision-urls', default=True, help='Enable analyze_image_urls action')
+@click.option('--embeddings/--no-embeddings', default=True, help='Enable create_embedding action')
+@click.option('--brain-search/--no-brain-search', default=True, help='Enable brain_document_search action')
+def agent_create(name: str, provider: str, model: str, instructions: Optional[str], instructions_file: Optional, brain: Optional[str], voice: Optional[str], props: tuple,
+                 web: bool, image_gen: bool, vision_urls: bool, embeddings: bool, brain_search: bool):
+    """Create a new agent and set it active."""
+    config = Config()
+    try:
+        # Handle instructions from file or inline
+        final_instructions = instructions
+        if instructions_file:
+            if instructions:
+                click.echo("Warning: Both --instructions and --instructions-file provided. Using --instructions-file.", err=True)
+            final_instructions = instructions_file.read()
+        
+        properties = {}
+        for p in props or []:
+            if '=' in p:
+                k, v = p.split('=', 1)
+                properties[k] = v
+        actions = {}
+        if web:
+            actions['web_fetch'] = {}
+        if image_gen:
+            actions['generate_image'] = {}
+        if vision_urls:
+            actions['analyze_image_urls'] = {}
+        if embeddings:
+            actions['create_embedding'] = {}
+        if brain_search:
+            actions['brain_document_search'] = {}
+        config.create_agent(
+            name,
+            provider=provider,
+            model=model,
+            instructions=final_instructions,
+            brain=brain,
+            properties=properties,
+            actions=actions,
+            voice=voice,
+        )
+        click.echo(f"Agent created: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent.command('list')
+def agent_list():
+    """List agents."""
+    config = Config()
+    agents = config.list_agents()
+    active = config.get_active_agent()
+    for a in agents:
+        marker = ' *' if a.get('name') == active else ''
+        click.echo(f"{a.get('name')}{marker}")
+
+
+@agent.command('use')
+@click.argument('name')
+def agent_use(name: str):
+    """Set active agent."""
+    config = Config()
+    try:
+        config.set_active_agent(name)
+        click.echo(f"Active agent: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent.command('current')
+def agent_current():
+    """Show active agent."""
+    config = Config()
+    curr = config.get_active_agent()
+    if curr:
+        click.echo(curr)
+    else:
+        click.echo("No active agent")
+
+
+@agent.command('show')
+@click.argument('name', required=False)
+def agent_show(name: Optional[str]):
+    """Show agent details (defaults to active agent)."""
+    config = Config()
+    if not name:
+        name = config.get_active_agent()
+    if not name:
+        click.echo("Error: No agent specified and no active agent set.", err=True)
+        sys.exit(1)
+    data = config.get_agent(name)
+    if not data:
+        click.echo(f"Error: Unknown agent '{name}'", err=True)
+        sys.exit(1)
+    click.echo(json.dumps({"name": name, **data}, indent=2))
+
+
+@agent.command('delete')
+@click.argument('name')
+def agent_delete(name: str):
+    """Delete an agent."""
+    config = Config()
+    config.delete_agent(name)
+    click.echo(f"Deleted agent: {name}")
+
+
+@agent.group('prop')
+def agent_prop():
+    """Manage agent properties."""
+    pass
+
+
+@agent_prop.command('set')
+@click.argument('name')
+@click.argument('key')
+@click.argument('value')
+def agent_prop_set(name: str, key: str, value: str):
+    config = Config()
+    try:
+        config.set_agent_property(name, key, value)
+        click.echo("OK")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_prop.command('unset')
+@click.argument('name')
+@click.argument('key')
+def agent_prop_unset(name: str, key: str):
+    config = Config()
+    try:
+        config.remove_agent_property(name, key)
+        click.echo("OK")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent.group('action')
+def agent_action():
+    """Enable/disable agent actions."""
+    pass
+
+
+@agent_action.command('enable')
+@click.argument('name')
+@click.argument('action')
+@click.option('--config', 'config_file', type=click.File('r', encoding='utf-8'), help='Optional JSON config for action')
+def agent_action_enable(name: str, action: str, config_file):
+    cfg = None
+    if config_file:
+        try:
+            cfg = json.load(config_file)
+        except Exception as e:
+            click.echo(f"Error reading JSON: {e}", err=True)
+            sys.exit(1)
+    config = Config()
+    try:
+        config.enable_agent_action(name, action, cfg)
+        click.echo("OK")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_action.command('disable')
+@click.argument('name')
+@click.argument('action')
+def agent_action_disable(name: str, action: str):
+    config = Config()
+    try:
+        config.disable_agent_action(name, action)
+        click.echo("OK")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent.group('thread')
+def agent_thread():
+    """Manage agent threads (conversation history)."""
+    pass
+
+
+@agent_thread.command('create')
+@click.argument('agent_name')
+@click.argument('thread_name')
+def agent_thread_create(agent_name: str, thread_name: str):
+    """Create a new thread for an agent."""
+    config = Config()
+    try:
+        config.create_thread(agent_name, thread_name)
+        click.echo(f"Thread created: {thread_name} (active for {agent_name})")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_thread.command('list')
+@click.argument('agent_name')
+@click.option('--limit', type=int, default=None, help='Show at most this many threads')
+@click.option('--offset', type=int, default=0, show_default=True, help='Skip this many threads')
+def agent_thread_list(agent_name: str, limit: Optional[int], offset: int):
+    """List threads for an agent."""
+    config = Config()
+    try:
+        threads = config.list_threads(agent_name, offset=offset, limit=limit)
+        if not threads:
+            click.echo(f"No threads found for agent '{agent_name}'")
+            return
+        for thread in threads:
+            marker = ' *' if thread.get('active') else ''
+            msg_count = thread.get('message_count', 0)
+            created = thread.get('created_at', 'unknown')
+            updated = thread.get('updated_at') or created
+            click.echo(f"{thread['name']}{marker} ({msg_count} messages, created: {created}, updated: {updated})")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_thread.command('use')
+@click.argument('agent_name')
+@click.argument('thread_name')
+def agent_thread_use(agent_name: str, thread_name: str):
+    """Set active thread for an agent."""
+    config = Config()
+    try:
+        config.set_active_thread(agent_name, thread_name)
+        click.echo(f"Active thread for {agent_name}: {thread_name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_thread.command('current')
+@click.argument('agent_name')
+def agent_thread_current(agent_name: str):
+    """Show active thread for an agent."""
+    config = Config()
+    try:
+        thread_name = config.get_active_thread(agent_name)
+        if thread_name:
+            click.echo(thread_name)
+        else:
+            click.echo(f"No active thread for agent '{agent_name}'")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_thread.command('clear')
+@click.argument('agent_name')
+@click.argument('thread_name')
+def agent_thread_clear(agent_name: str, thread_name: str):
+    """Clear all messages from a thread."""
+    config = Config()
+    try:
+        config.clear_thread(agent_name, thread_name)
+        click.echo(f"Thread cleared: {thread_name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_thread.command('delete')
+@click.argument('agent_name')
+@click.argument('thread_name')
+def agent_thread_delete(agent_name: str, thread_name: str):
+    """Delete a thread."""
+    config = Config()
+    try:
+        config.delete_thread(agent_name, thread_name)
+        click.echo(f"Thread deleted: {thread_name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_thread.command('compact')
+@click.argument('agent_name')
+@click.argument('thread_name', required=False)
+@click.option('--provider', '-p', help="Provider for the summarization model (default: compaction setting, else the agent's provider)")
+@click.option('--model', '-m', help='Summarization model (default: compaction setting, else provider default)')
+@click.option('--keep-last', type=int, help='Newest messages to keep verbatim (default: compaction setting)')
+@click.option('--show', is_flag=True, help='Print the resulting summary')
+def agent_thread_compact(agent_name: str, thread_name: Optional[str], provider: Optional[str], model: Optional[str], keep_last: Optional[int], show: bool):
+    """Fold older messages of an agent thread into a summary (defaults to active thread)."""
+    config = Config()
+    try:
+        thread_name = thread_name or config.get_active_thread(agent_name)
+        folded = config.compact_thread(agent_name, thread_name, provider=provider, model=model, keep_last=keep_last)
+        click.echo(f"Compacted {folded} messages in thread: {thread_name}")
+        if show:
+            click.echo(config.get_thread_info(agent_name, thread_name).get('summary') or '')
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent.command('run')
+@click.argument('prompt', required=False)
+@click.option('--agent', 'agent_name', help='Agent name (defaults to active agent)')
+@click.option('--thread', 'thread_name', help='Thread name (defaults to active thread)')
+@click.option('--image', 'images', multiple=True, type=click.Path(exists=True), help='Local image file(s) to include')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+@click.option('--array', 'array_output', is_flag=True, help='Output as array')
+def agent_run(prompt: Optional[str], agent_name: Optional[str], thread_name: Optional[str], images: tuple, json_output: bool, array_output: bool):
+    """Run an agent with a prompt (reads stdin if omitted). Uses active thread if available."""
+    config = Config()
+    if not prompt:
+        prompt = sys.stdin.read()
+    if not prompt:
+        click.echo("Error: No prompt provided", err=True)
+        sys.exit(1)
+    if not agent_name:
+        agent_name = config.get_active_agent()
+    if not agent_name:
+        click.echo("Error: No agent specified and no active agent set.", err=True)
+        sys.exit(1)
+    spec = config.get_agent(agent_name)
+    if not spec:
+        click.echo(f"Error: Unknown agent '{agent_name}'", err=True)
+        sys.exit(1)
+    
+    # If no thread specified, try to use active thread
+    if not thread_name:
+        thread_name = config.get_active_thread(agent_name)
+    
+    try:
+        ag = Agent(
+            config=config,
+            name=agent_name,
+            provider=spec.get('provider'),
+            model=spec.get('model'),
+            instructions=spec.get('instructions'),
+            brain=spec.get('brain'),
+            properties=spec.get('properties') or {},
+            actions_config=spec.get('actions') or {},
+        )
+        result = ag.run(input_text=prompt, images=list(images) if images else None, thread_name=thread_name)
+        
+        # Format output
+        output_text = format_text_output(
+            result,
+            json_output,
+            array_output,
+            provider=spec.get('provider'),
+            model=spec.get('model')
+        )
+        click.echo(output_text)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+# ========== Agent voice commands ==========
+
+@agent.group('voice')
+def agent_voice():
+    """Manage agent voices."""
+    pass
+
+
+@agent_voice.command('set')
+@click.argument('agent_name')
+@click.argument('voice_name')
+def agent_voice_set(agent_name: str, voice_name: str):
+    """Set voice for an agent."""
+    config = Config()
+    try:
+        config.set_agent_voice(agent_name, voice_name)
+        click.echo(f"Voice '{voice_name}' set for agent '{agent_name}'")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_voice.command('remove')
+@click.argument('agent_name')
+def agent_voice_remove(agent_name: str):
+    """Remove voice from an agent."""
+    config = Config()
+    try:
+        config.set_agent_voice(agent_name, None)
+        click.echo(f"Voice removed from agent '{agent_name}'")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@agent_voice.command('show')
+@click.argument('agent_name')
+def agent_voice_show(agent_name: str):
+    """Show voice for an agent."""
+    config = Config()
+    try:
+        voice_name = config.get_agent_voice(agent_name)
+        if voice_name:
+            click.echo(voice_name)
+        else:
+            click.echo(f"No voice set for agent '{agent_name}'")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
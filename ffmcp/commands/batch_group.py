@@ -0,0 +1,256 @@
+"""`ffmcp batch`: concurrent bulk generation over JSONL, and provider batch jobs"""
+import asyncio
+import json
+import os
+import sys
+from typing import Optional
+
+import click
+
+from ffmcp.commands import DefaultCommandGroup
+from ffmcp.config import Config
+
+
+@click.group(cls=DefaultCommandGroup, default_command='run')
+def batch():
+    """Run many prompts concurrently from JSONL (default subcommand: run).
+
+    submit/status/fetch use the provider batch APIs instead: half price,
+    results within 24h.
+    """
+    pass
+
+
+@batch.command('run')
+@click.argument('input_file', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write results to this JSONL file (default: stdout)')
+@click.option('--provider', '-p', default='openai', help='Provider for requests that do not set one')
+@click.option('--model', '-m', help='Model for requests that do not set one')
+@click.option('--temperature', '-t', type=float, help='Default temperature')
+@click.option('--max-tokens', type=int, help='Default max tokens')
+@click.option('--concurrency', '-c', type=int, default=16, show_default=True, help='Requests in flight per provider')
+@click.option('--retries', type=int, default=3, show_default=True, help='Retries for rate limits, 5xx errors and timeouts')
+@click.option('--order', type=click.Choice(['completion', 'input']), default='completion', show_default=True, help='Write results as they finish or in input order')
+@click.option('--resume', is_flag=True, help='Skip ids already completed in --output and append to it')
+@click.option('--max-input-tokens', type=int, help="Fail requests whose prompt is longer (counted with the model's tokenizer) without sending them")
+def batch_run(input_file, output: Optional[str], provider: str, model: Optional[str], temperature: Optional[float],
+              max_tokens: Optional[int], concurrency: int, retries: int, order: str, resume: bool, max_input_tokens: Optional[int]):
+    """Run JSONL requests from INPUT_FILE (or stdin) and write JSONL results.
+
+    Each line: {"id", "prompt", "system", "provider", "model", "params"}; only
+    "prompt" is required. Each result: {"id", "provider", "model", "output"
+    or "error", "attempts", "elapsed_ms"}.
+    """
+    from ffmcp.batch import BatchRunner, completed_ids, parse_requests
+
+    if resume and not output:
+        click.echo("Error: --resume needs --output", err=True)
+        sys.exit(1)
+    config = Config()
+    params = {}
+    if temperature is not None:
+        params['temperature'] = temperature
+    if max_tokens:
+        params['max_tokens'] = max_tokens
+
+    skip = set()
+    if resume and os.path.exists(output):
+        with open(output, 'r', encoding='utf-8') as f:
+            skip = completed_ids(f)
+        # A killed run can leave a partial last line; start ours on a fresh one
+        needs_newline = False
+        with open(output, 'rb') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        if needs_newline:
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write('\n')
+
+    out = open(output, 'a' if resume else 'w', encoding='utf-8') if output else sys.stdout
+
+    def emit(result):
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+
+    runner = BatchRunner(
+        config,
+        provider=provider,
+        model=model,
+        params=params,
+        concurrency=concurrency,
+        retries=retries,
+        ordered=(order == 'input'),
+        max_input_tokens=max_input_tokens,
+    )
+    try:
+        stats = asyncio.run(runner.run(parse_requests(input_file), emit, skip=skip))
+    except KeyboardInterrupt:
+        click.echo("Interrupted; rerun with --resume to continue", err=True)
+        sys.exit(130)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    click.echo(f"Completed {stats['ok']}, failed {stats['failed']}, skipped {stats['skipped']}", err=True)
+    if stats['failed']:
+        sys.exit(2)
+
+
+# ---------------- Provider batch jobs ----------------
+def _echo_status(job, info=None):
+    info = info or {}
+    total = info.get('total') if info.get('total') is not None else job.get('requests')
+    progress = ''
+    if info.get('completed') is not None:
+        progress = f", {info['completed']}/{total} completed, {info.get('failed') or 0} failed"
+    source = f", from {job['source']}" if job.get('source') else ''
+    click.echo(f"{job['id']}  {job['provider']}  {info.get('status') or job.get('status')}{progress} ({job.get('requests')} requests{source})")
+
+
+@batch.command('submit')
+@click.argument('input_file', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--provider', '-p', default='openai', type=click.Choice(['openai', 'anthropic']), show_default=True, help='Provider batch API to submit to')
+@click.option('--model', '-m', help='Model for requests that do not set one')
+@click.option('--temperature', '-t', type=float, help='Default temperature')
+@click.option('--max-tokens', type=int, help='Default max tokens')
+@click.option('--wait', 'wait_for', is_flag=True, help='Wait for the batch to end and write its results (see fetch)')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='With --wait: write results to this JSONL file (default: stdout)')
+@click.option('--max-input-tokens', type=int, help="Refuse to submit if a prompt is longer (counted with the model's tokenizer)")
+def batch_submit(input_file, provider: str, model: Optional[str], temperature: Optional[float], max_tokens: Optional[int],
+                 wait_for: bool, output: Optional[str], max_input_tokens: Optional[int]):
+    """Submit JSONL requests as a provider batch (half price, results within 24h).
+
+    Takes the input format of `ffmcp batch run`; prints the batch id. Get
+    the results with `ffmcp batch fetch BATCH_ID`.
+    """
+    from ffmcp.batch import parse_requests
+    from ffmcp import batch_jobs
+
+    config = Config()
+    params = {}
+    if temperature is not None:
+        params['temperature'] = temperature
+    if max_tokens:
+        params['max_tokens'] = max_tokens
+    try:
+        source = None if input_file.name == '<stdin>' else os.path.abspath(input_file.name)
+        job = batch_jobs.submit(
+            config, parse_requests(input_file), provider=provider, model=model, params=params, source=source,
+            max_input_tokens=max_input_tokens,
+        )
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+    click.echo(f"Submitted {job['requests']} requests (~{job['prompt_tokens']} prompt tokens) to {provider}: {job['id']}", err=wait_for)
+    if wait_for:
+        _fetch(config, job, output, wait_for=True, timeout=None)
+
+
+@batch.command('status')
+@click.argument('batch_id', required=False)
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+def batch_status(batch_id: Optional[str], json_output: bool):
+    """Show the status of a batch (default: of all submitted batches)."""
+    from ffmcp import batch_jobs
+
+    config = Config()
+    try:
+        jobs = [batch_jobs.load_job(config, batch_id)] if batch_id else batch_jobs.list_jobs(config)
+        if not jobs:
+            click.echo("No batches")
+            return
+        rows = []
+        for job in jobs:
+            # Ended batches do not change; only ask about the others
+            info = None if job.get('done') and not batch_id else batch_jobs.refresh(config, job)
+            rows.append((job, info))
+        if json_output:
+            click.echo(json.dumps([
+                dict({k: v for k, v in job.items() if k != 'ids'}, **(info or {})) for job, info in rows
+            ], indent=2))
+            return
+        for job, info in rows:
+            _echo_status(job, info)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@batch.command('fetch')
+@click.argument('batch_id')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write results to this JSONL file (default: stdout)')
+@click.option('--wait/--no-wait', 'wait_for', default=True, show_default=True, help='Poll (with backoff) until the batch has ended')
+@click.option('--timeout', type=float, help='With --wait: give up after this many seconds')
+def batch_fetch(batch_id: str, output: Optional[str], wait_for: bool, timeout: Optional[float]):
+    """Write the results of a batch as JSONL, mapped to the input ids.
+
+    Each result: {"id", "provider", "model", "output" or "error", "batch"}.
+    """
+    from ffmcp import batch_jobs
+
+    config = Config()
+    try:
+        job = batch_jobs.load_job(config, batch_id)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+    _fetch(config, job, output, wait_for=wait_for, timeout=timeout)
+
+
+def _fetch(config, job, output: Optional[str], *, wait_for: bool, timeout: Optional[float]):
+    from ffmcp import batch_jobs
+
+    stats = {'ok': 0, 'failed': 0}
+    out = None
+    try:
+        if wait_for:
+            info = batch_jobs.wait(config, job, timeout=timeout, on_poll=lambda info: _echo_status(job, info) if not info['done'] else None)
+        else:
+            info = batch_jobs.refresh(config, job)
+        if not info['done']:
+            raise ValueError(f"batch {job['id']} is still {info['status']} (fetch without --no-wait to wait for it)")
+        out = open(output, 'w', encoding='utf-8') if output else sys.stdout
+        for result in batch_jobs.fetch(config, job):
+            stats['failed' if 'error' in result else 'ok'] += 1
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+    except KeyboardInterrupt:
+        click.echo(f"Interrupted; the batch keeps running. Fetch it later with: ffmcp batch fetch {job['id']}", err=True)
+        sys.exit(130)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+    click.echo(f"Completed {stats['ok']}, failed {stats['failed']}", err=True)
+    if stats['failed']:
+        sys.exit(2)
+
+
+@batch.command('serve')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', type=int, default=8089, show_default=True, help='Port to listen on')
+@click.option('--delay', type=float, default=2.0, show_default=True, help='Seconds until a batch ends')
+def batch_serve(host: str, port: int, delay: float):
+    """Run a local stand-in for the provider batch APIs (for offline testing)."""
+    from ffmcp.batch_standin import make_server
+
+    server = make_server(host, port, delay)
+    click.echo(f"Batch stand-in listening on http://{host}:{port}", err=True)
+    click.echo(f"  export OPENAI_BASE_URL=http://{host}:{port}/v1", err=True)
+    click.echo(f"  export ANTHROPIC_BASE_URL=http://{host}:{port}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,544 @@
+"""`ffmcp brain`: Zep / LEANN memory commands"""
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import click
+
+from ffmcp.brain import (
+    ZepBrainClient, BrainInfo,
+    ZepSDKNotInstalledError, LEANNSDKNotInstalledError,
+    create_brain_client,
+)
+from ffmcp.config import Config
+
+
+@click.group()
+def brain():
+    """Manage brains (Zep/LEANN memory, collections, graph)."""
+    pass
+
+
+def _load_brain_and_client(config: Config, brain_name: str = None) -> tuple:
+    """Load brain configuration and create appropriate client."""
+    if not brain_name:
+        brain_name = config.get_active_brain()
+        if not brain_name:
+            click.echo("Error: No brain specified and no active brain set. Use 'ffmcp brain create <name>' or 'ffmcp brain use <name>'.", err=True)
+            sys.exit(1)
+    
+    brain_cfg = config.get_brain(brain_name)
+    if not brain_cfg:
+        click.echo(f"Error: Unknown brain '{brain_name}'. Create it with 'ffmcp brain create {brain_name}'.", err=True)
+        sys.exit(1)
+    
+    backend = brain_cfg.get('backend', 'zep')
+    brain_info = BrainInfo(
+        name=brain_name,
+        default_session_id=brain_cfg.get('default_session_id'),
+        backend=backend,
+    )
+    
+    # Create appropriate client based on backend
+    try:
+        if backend == 'leann':
+            leann_settings = config.get_leann_settings()
+            client = create_brain_client(
+                backend='leann',
+                brain=brain_info,
+                leann_index_dir=leann_settings.get('index_dir'),
+            )
+        else:
+            zep_settings = config.get_zep_settings()
+            client = create_brain_client(
+                backend='zep',
+                brain=brain_info,
+                zep_api_key=zep_settings.get('api_key'),
+                zep_base_url=zep_settings.get('base_url'),
+                zep_env=zep_settings.get('env'),
+            )
+    except (ZepSDKNotInstalledError, LEANNSDKNotInstalledError) as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    
+    return client, brain_info
+
+
+@brain.command('create')
+@click.argument('name')
+@click.option('--session-id', help='Default session id for this brain (optional)')
+@click.option('--backend', type=click.Choice(['zep', 'leann']), default='zep', help='Backend to use: zep or leann (default: zep)')
+def brain_create(name: str, session_id: str, backend: str):
+    """Create a new brain and set it active."""
+    config = Config()
+    try:
+        config.create_brain(name, default_session_id=session_id, backend=backend)
+        click.echo(f"Brain created: {name} (backend: {backend})")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@brain.command('list')
+def brain_list():
+    """List brains."""
+    config = Config()
+    brains = config.list_brains()
+    active = config.get_active_brain()
+    for b in brains:
+        marker = ' *' if b.get('name') == active else ''
+        backend = b.get('backend', 'zep')
+        click.echo(f"{b.get('name')} ({backend}){marker}")
+
+
+@brain.command('use')
+@click.argument('name')
+def brain_use(name: str):
+    """Set active brain."""
+    config = Config()
+    try:
+        config.set_active_brain(name)
+        click.echo(f"Active brain: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@brain.command('current')
+def brain_current():
+    """Show active brain."""
+    config = Config()
+    curr = config.get_active_brain()
+    if curr:
+        click.echo(curr)
+    else:
+        click.echo("No active brain")
+
+
+@brain.command('delete')
+@click.argument('name')
+def brain_delete(name: str):
+    """Delete a brain from local registry (does not delete Zep data)."""
+    config = Config()
+    config.delete_brain(name)
+    click.echo(f"Deleted brain: {name}")
+
+
+@brain.group()
+def memory():
+    """Chat memory operations."""
+    pass
+
+
+@memory.command('add')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--session', 'session_id', help='Session id. Defaults to brain default or name.')
+@click.option('--role', default='user', help='Speaker name (e.g., user name).')
+@click.option('--role-type', default='user', type=click.Choice(['user', 'assistant', 'system']), help='Message role type.')
+@click.option('--content', help='Message content text.')
+@click.option('--json', 'json_file', type=click.File('r', encoding='utf-8'), help='JSON array of messages to add.')
+def memory_add(brain_name: Optional[str], session_id: Optional[str], role: str, role_type: str, content: Optional[str], json_file):
+    """Add messages to memory. Provide --content or --json with messages array."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+
+    messages: List[Dict[str, Any]] = []
+    if json_file:
+        try:
+            messages = json.load(json_file)
+        except Exception as e:
+            click.echo(f"Error reading JSON: {e}", err=True)
+            sys.exit(1)
+    elif content:
+        messages = [{"role": role, "role_type": role_type, "content": content}]
+    else:
+        click.echo("Error: Provide --content or --json", err=True)
+        sys.exit(1)
+
+    res = client.memory_add_messages(brain=brain_info, session_id=session_id, messages=messages)
+    if not res.get('ok'):
+        click.echo(f"Error: {res.get('error')}", err=True)
+        sys.exit(1)
+    click.echo("OK")
+
+
+@memory.command('get')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--session', 'session_id', help='Session id. Defaults to brain default or name.')
+def memory_get(brain_name: Optional[str], session_id: Optional[str]):
+    """Get memory context for a session."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    res = client.memory_get(brain=brain_info, session_id=session_id)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@memory.command('search')
+@click.argument('query')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--session', 'session_id', help='Session id. Defaults to brain default or name.')
+@click.option('--limit', type=int, default=5)
+@click.option('--min-score', type=float)
+def memory_search(query: str, brain_name: Optional[str], session_id: Optional[str], limit: int, min_score: Optional[float]):
+    """Semantic search over session memory."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    res = client.memory_search(brain=brain_info, session_id=session_id, query=query, limit=limit, min_score=min_score)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@memory.command('clear')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--session', 'session_id', help='Session id. Defaults to brain default or name.')
+def memory_clear(brain_name: Optional[str], session_id: Optional[str]):
+    """Clear memory for a session."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    res = client.memory_clear(brain=brain_info, session_id=session_id)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@brain.group()
+def collection():
+    """Collection operations (document store)."""
+    pass
+
+
+@collection.command('create')
+@click.argument('name')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--description')
+@click.option('--metadata', type=click.File('r', encoding='utf-8'), help='JSON file with metadata.')
+def collection_create(name: str, brain_name: Optional[str], description: Optional[str], metadata):
+    """Create a namespaced collection."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    meta = None
+    if metadata:
+        try:
+            meta = json.load(metadata)
+        except Exception as e:
+            click.echo(f"Error reading metadata JSON: {e}", err=True)
+            sys.exit(1)
+    res = client.collection_create(brain=brain_info, name=name, description=description, metadata=meta)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@collection.command('list')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+def collection_list(brain_name: Optional[str]):
+    """List collections for a brain."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    res = client.collection_list(brain=brain_info)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@brain.group()
+def document():
+    """Document operations in collections."""
+    pass
+
+
+@document.command('add')
+@click.argument('collection')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--id', 'doc_id')
+@click.option('--text')
+@click.option('--input', 'input_file', type=click.File('r', encoding='utf-8'), help='Read text from file')
+@click.option('--metadata', type=click.File('r', encoding='utf-8'), help='JSON file with metadata')
+def document_add(collection: str, brain_name: Optional[str], doc_id: Optional[str], text: Optional[str], input_file, metadata):
+    """Add a text document to a collection."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    if input_file and text:
+        click.echo("Error: Provide either --text or --input, not both", err=True)
+        sys.exit(1)
+    if input_file:
+        text = input_file.read()
+    meta = None
+    if metadata:
+        try:
+            meta = json.load(metadata)
+        except Exception as e:
+            click.echo(f"Error reading metadata JSON: {e}", err=True)
+            sys.exit(1)
+    res = client.document_add(brain=brain_info, collection=collection, document_id=doc_id, text=text, metadata=meta)
+    if not res.get('ok'):
+        click.echo(f"Error: {res.get('error')}", err=True)
+        sys.exit(1)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@document.command('search')
+@click.argument('collection')
+@click.argument('query')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--limit', type=int, default=5)
+@click.option('--min-score', type=float)
+def document_search(collection: str, query: str, brain_name: Optional[str], limit: int, min_score: Optional[float]):
+    """Semantic search over documents in a collection."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    res = client.document_search(brain=brain_info, collection=collection, query=query, limit=limit, min_score=min_score)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@document.command('delete')
+@click.argument('collection')
+@click.option('--brain', 'brain_name', help='Brain name. Defaults to active brain.')
+@click.option('--id', 'doc_id', required=True)
+def document_delete(collection: str, brain_name: Optional[str], doc_id: str):
+    """Delete a document by id from a collection."""
+    config = Config()
+    client, brain_info = _load_brain_and_client(config, brain_name)
+    res = client.document_delete(brain=brain_info, collection=collection, document_id=doc_id)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@brain.group()
+def graph():
+    """Low-level Graph API (zep-cloud)."""
+    pass
+
+
+@graph.command('add')
+@click.argument('user_id')
+@click.option('--type', 'data_type', required=True, help='Data type, e.g., json')
+@click.option('--data', 'data_str', help='Inline JSON string')
+@click.option('--input', 'input_file', type=click.File('r', encoding='utf-8'), help='JSON file input')
+def graph_add(user_id: str, data_type: str, data_str: Optional[str], input_file):
+    """Add graph data (Zep Cloud only, not supported by LEANN)."""
+    config = Config()
+    brain_name = config.get_active_brain()
+    if brain_name:
+        brain_cfg = config.get_brain(brain_name)
+        backend = brain_cfg.get('backend', 'zep')
+        if backend == 'leann':
+            click.echo("Error: Graph API is not available in LEANN backend. Use Zep backend for graph operations.", err=True)
+            sys.exit(1)
+    
+    zep_settings = config.get_zep_settings()
+    try:
+        client = ZepBrainClient(api_key=zep_settings.get('api_key'), base_url=zep_settings.get('base_url'), env=zep_settings.get('env'))
+    except ZepSDKNotInstalledError as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    data_obj: Any = data_str
+    if input_file:
+        data_obj = input_file.read()
+    if not data_obj:
+        click.echo("Error: Provide --data or --input", err=True)
+        sys.exit(1)
+    res = client.graph_add(user_id=user_id, data_type=data_type, data=data_obj)
+    if not res.get('ok'):
+        click.echo(f"Error: {res.get('error')}", err=True)
+        sys.exit(1)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+@graph.command('get')
+@click.argument('user_id')
+def graph_get(user_id: str):
+    """Get graph data (Zep Cloud only, not supported by LEANN)."""
+    config = Config()
+    brain_name = config.get_active_brain()
+    if brain_name:
+        brain_cfg = config.get_brain(brain_name)
+        backend = brain_cfg.get('backend', 'zep')
+        if backend == 'leann':
+            click.echo("Error: Graph API is not available in LEANN backend. Use Zep backend for graph operations.", err=True)
+            sys.exit(1)
+    
+    zep_settings = config.get_zep_settings()
+    try:
+        client = ZepBrainClient(api_key=zep_settings.get('api_key'), base_url=zep_settings.get('base_url'), env=zep_settings.get('env'))
+    except ZepSDKNotInstalledError as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    res = client.graph_get(user_id=user_id)
+    if not res.get('ok'):
+        click.echo(f"Error: {res.get('error')}", err=True)
+        sys.exit(1)
+    click.echo(json.dumps(res.get('result'), indent=2, default=str))
+
+
+# ========== LEANN-specific commands ==========
+
+@brain.group()
+def leann():
+    """LEANN-specific operations (index management, direct building)."""
+    pass
+
+
+@leann.command('build')
+@click.argument('index_name')
+@click.argument('docs', nargs=-1, required=True)
+@click.option('--backend', type=click.Choice(['hnsw', 'diskann']), default='hnsw', help='Backend to use (default: hnsw)')
+@click.option('--embedding-model', default='facebook/contriever', help='Embedding model (default: facebook/contriever)')
+@click.option('--graph-degree', type=int, default=32, help='Graph degree (default: 32)')
+@click.option('--complexity', type=int, default=64, help='Build complexity (default: 64)')
+@click.option('--force', is_flag=True, help='Force rebuild existing index')
+@click.option('--compact/--no-compact', default=True, help='Use compact storage (default: true)')
+@click.option('--recompute/--no-recompute', default=True, help='Enable recomputation (default: true)')
+def leann_build(index_name: str, docs: tuple, backend: str, embedding_model: str, graph_degree: int, complexity: int, force: bool, compact: bool, recompute: bool):
+    """Build a LEANN index from documents/files."""
+    try:
+        from leann import LeannBuilder  # type: ignore
+        from pathlib import Path
+    except ImportError:
+        click.echo("Error: LEANN SDK not installed. Install with: pip install leann", err=True)
+        sys.exit(1)
+    
+    config = Config()
+    leann_settings = config.get_leann_settings()
+    index_dir = Path(leann_settings.get('index_dir') or Path.home() / '.ffmcp' / 'leann_indexes')
+    index_dir.mkdir(parents=True, exist_ok=True)
+    
+    index_path = index_dir / f"{index_name}.leann"
+    if index_path.exists() and not force:
+        click.echo(f"Error: Index '{index_name}' already exists. Use --force to rebuild.", err=True)
+        sys.exit(1)
+    
+    try:
+        builder = LeannBuilder(backend_name=backend)
+        
+        # Process documents
+        for doc_path in docs:
+            doc_path_obj = Path(doc_path)
+            if not doc_path_obj.exists():
+                click.echo(f"Warning: File not found: {doc_path}", err=True)
+                continue
+            
+            if doc_path_obj.is_file():
+                # Read file content
+                try:
+                    with open(doc_path_obj, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    builder.add_text(content, metadata={"source": str(doc_path)})
+                except Exception as e:
+                    click.echo(f"Warning: Could not read file {doc_path}: {e}", err=True)
+            elif doc_path_obj.is_dir():
+                # Process directory
+                for file_path in doc_path_obj.rglob('*'):
+                    if file_path.is_file():
+                        try:
+                            with open(file_path, 'r', encoding='utf-8') as f:
+                                content = f.read()
+                            builder.add_text(content, metadata={"source": str(file_path)})
+                        except Exception:
+                            pass
+        
+        # Build index
+        builder.build_index(str(index_path))
+        click.echo(f"Index built: {index_path}")
+    except Exception as e:
+        click.echo(f"Error building index: {e}", err=True)
+        sys.exit(1)
+
+
+@leann.command('list')
+def leann_list():
+    """List all LEANN indexes."""
+    try:
+        from pathlib import Path
+    except ImportError:
+        pass
+    
+    config = Config()
+    leann_settings = config.get_leann_settings()
+    index_dir = Path(leann_settings.get('index_dir') or Path.home() / '.ffmcp' / 'leann_indexes')
+    
+    if not index_dir.exists():
+        click.echo("No indexes found.")
+        return
+    
+    indexes = list(index_dir.glob("*.leann"))
+    if not indexes:
+        click.echo("No indexes found.")
+        return
+    
+    click.echo("LEANN Indexes:")
+    for idx_path in sorted(indexes):
+        size = idx_path.stat().st_size if idx_path.exists() else 0
+        size_mb = size / (1024 * 1024)
+        click.echo(f"  {idx_path.stem} ({size_mb:.2f} MB)")
+
+
+@leann.command('remove')
+@click.argument('index_name')
+@click.option('--force', '-f', is_flag=True, help='Force removal without confirmation')
+def leann_remove(index_name: str, force: bool):
+    """Remove a LEANN index."""
+    from pathlib import Path
+    
+    config = Config()
+    leann_settings = config.get_leann_settings()
+    index_dir = Path(leann_settings.get('index_dir') or Path.home() / '.ffmcp' / 'leann_indexes')
+    
+    index_path = index_dir / f"{index_name}.leann"
+    if not index_path.exists():
+        click.echo(f"Error: Index '{index_name}' not found.", err=True)
+        sys.exit(1)
+    
+    if not force:
+        click.confirm(f"Remove index '{index_name}'?", abort=True)
+    
+    try:
+        index_path.unlink()
+        # Also remove metadata file if exists
+        meta_path = index_path.with_suffix('.leann.meta.json')
+        if meta_path.exists():
+            meta_path.unlink()
+        click.echo(f"Index removed: {index_name}")
+    except Exception as e:
+        click.echo(f"Error removing index: {e}", err=True)
+        sys.exit(1)
+
+
+@leann.command('search')
+@click.argument('index_name')
+@click.argument('query')
+@click.option('--top-k', type=int, default=5, help='Number of results (default: 5)')
+@click.option('--complexity', type=int, default=64, help='Search complexity (default: 64)')
+def leann_search(index_name: str, query: str, top_k: int, complexity: int):
+    """Search a LEANN index."""
+    try:
+        from leann import LeannSearcher  # type: ignore
+        from pathlib import Path
+    except ImportError:
+        click.echo("Error: LEANN SDK not installed. Install with: pip install leann", err=True)
+        sys.exit(1)
+    
+    config = Config()
+    leann_settings = config.get_leann_settings()
+    index_dir = Path(leann_settings.get('index_dir') or Path.home() / '.ffmcp' / 'leann_indexes')
+    index_path = index_dir / f"{index_name}.leann"
+    
+    if not index_path.exists():
+        click.echo(f"Error: Index '{index_name}' not found.", err=True)
+        sys.exit(1)
+    
+    try:
+        searcher = LeannSearcher(str(index_path))
+        results = searcher.search(query, top_k=top_k)
+        
+        formatted_results = []
+        for r in results:
+            result_dict = {
+                "text": r.text if hasattr(r, 'text') else str(r),
+            }
+            if hasattr(r, 'score') and r.score is not None:
+                result_dict["score"] = r.score
+            if hasattr(r, 'distance') and r.distance is not None:
+                result_dict["distance"] = r.distance
+            if hasattr(r, 'metadata') and r.metadata:
+                result_dict["metadata"] = r.metadata
+            formatted_results.append(result_dict)
+        
+        click.echo(json.dumps(formatted_results, indent=2, default=str))
+    except Exception as e:
+        click.echo(f"Error searching index: {e}", err=True)
+        sys.exit(1)
@@ -0,0 +1,210 @@
+"""`ffmcp cache`: response, semantic and prompt cache statistics and settings"""
+import json
+import sys
+from typing import Optional
+
+import click
+
+from ffmcp.config import Config
+
+
+def _open_cache(config: Config):
+    from ffmcp.response_cache import ResponseCache
+    return ResponseCache(config.config_dir / 'cache.db')
+
+
+@click.group()
+def cache():
+    """Inspect and configure the response cache."""
+    pass
+
+
+@cache.command('stats')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+def cache_stats(json_output: bool):
+    """Show cached entries, size and hit/miss counters per request kind."""
+    config = Config()
+    try:
+        stats = _open_cache(config).stats()
+        if json_output:
+            click.echo(json.dumps(stats, indent=2))
+            return
+        click.echo(f"Entries: {stats['entries']} ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+        for kind, counts in stats['kinds'].items():
+            total = counts['hits'] + counts['misses']
+            rate = f"{100.0 * counts['hits'] / total:.0f}%" if total else '-'
+            click.echo(f"  {kind}: {counts['hits']} hits, {counts['misses']} misses ({rate} hit rate)")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache.command('clear')
+@click.option('--stats', 'reset_stats', is_flag=True, help='Also reset the hit/miss counters')
+def cache_clear(reset_stats: bool):
+    """Delete all cached responses."""
+    config = Config()
+    try:
+        removed = _open_cache(config).clear(stats=reset_stats)
+        click.echo(f"Removed {removed} cached responses")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache.command('settings')
+@click.option('--enable/--disable', 'enabled', default=None, help='Cache responses for every command (override per command with ffmcp --cache/--no-cache)')
+@click.option('--ttl', type=float, help='Hours before an entry expires (0: never)')
+@click.option('--max-size-mb', type=float, help='Evict least recently used entries beyond this size')
+def cache_settings(enabled: Optional[bool], ttl: Optional[float], max_size_mb: Optional[float]):
+    """Show or update response cache settings."""
+    config = Config()
+    try:
+        updates = {}
+        if enabled is not None:
+            updates['enabled'] = enabled
+        if ttl is not None:
+            updates['ttl_seconds'] = int(ttl * 3600)
+        if max_size_mb is not None:
+            updates['max_bytes'] = int(max_size_mb * 1024 * 1024)
+        if updates:
+            config.set_cache_settings(**updates)
+        for key, value in config.get_cache_settings().items():
+            click.echo(f"{key}: {value}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache.group('semantic')
+def cache_semantic():
+    """Semantic cache: reuse answers for near-duplicate prompts."""
+    pass
+
+
+def _open_semantic_cache(config: Config):
+    from ffmcp.semantic_cache import SemanticCache
+    return SemanticCache(config.config_dir / 'semantic_cache.db', config, config.get_semantic_cache_settings())
+
+
+@cache_semantic.command('stats')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+def cache_semantic_stats(json_output: bool):
+    """Show entries and hit/miss counters per namespace (agent:<name>, generate, chat)."""
+    config = Config()
+    try:
+        stats = _open_semantic_cache(config).stats()
+        if json_output:
+            click.echo(json.dumps(stats, indent=2))
+            return
+        if not stats:
+            click.echo("No semantic cache entries")
+        for namespace, counts in stats.items():
+            total = counts['hits'] + counts['misses']
+            rate = f"{100.0 * counts['hits'] / total:.0f}%" if total else '-'
+            click.echo(f"{namespace}: {counts['entries']} entries, {counts['hits']} hits, {counts['misses']} misses ({rate} hit rate)")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache_semantic.command('clear')
+@click.option('--namespace', '-n', help='Only this namespace (e.g. agent:support, generate, chat)')
+@click.option('--stats', 'reset_stats', is_flag=True, help='Also reset the hit/miss counters')
+def cache_semantic_clear(namespace: Optional[str], reset_stats: bool):
+    """Delete cached answers."""
+    config = Config()
+    try:
+        removed = _open_semantic_cache(config).clear(namespace, stats=reset_stats)
+        click.echo(f"Removed {removed} cached answers")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache_semantic.command('settings')
+@click.option('--enable/--disable', 'enabled', default=None, help='Use the semantic cache for agents, generate and chat (override per command with ffmcp --semantic-cache/--no-semantic-cache)')
+@click.option('--provider', '-p', help='Embedding provider (openai, aimlapi)')
+@click.option('--model', '-m', help='Embedding model')
+@click.option('--threshold', type=float, help='Minimum cosine similarity for a hit (0-1)')
+@click.option('--max-entries', type=int, help='Entries kept per namespace (least recently used are evicted)')
+@click.option('--ttl', type=float, help='Hours before an entry expires (0: never)')
+def cache_semantic_settings(enabled: Optional[bool], provider: Optional[str], model: Optional[str], threshold: Optional[float],
+                            max_entries: Optional[int], ttl: Optional[float]):
+    """Show or update semantic cache settings."""
+    config = Config()
+    try:
+        updates = {}
+        if enabled is not None:
+            updates['enabled'] = enabled
+        if provider:
+            updates['provider'] = provider
+        if model:
+            updates['model'] = model
+        if threshold is not None:
+            updates['threshold'] = threshold
+        if max_entries is not None:
+            updates['max_entries'] = max_entries
+        if ttl is not None:
+            updates['ttl_seconds'] = int(ttl * 3600)
+        if updates:
+            config.set_semantic_cache_settings(**updates)
+        for key, value in config.get_semantic_cache_settings().items():
+            click.echo(f"{key}: {value}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache.group('prompt')
+def cache_prompt():
+    """Prompt-prefix caching: providers reuse the stable start of agent prompts."""
+    pass
+
+
+@cache_prompt.command('settings')
+@click.option('--enable/--disable', 'enabled', default=None, help='Ask providers to cache long prompt prefixes')
+@click.option('--min-tokens', type=int, help='Shortest prefix (tokens) to cache')
+@click.option('--gemini-min-tokens', type=int, help='Shortest prefix (tokens) to store as Gemini cached content')
+@click.option('--gemini-ttl', type=int, help='Seconds Gemini cached content lives')
+def cache_prompt_settings(enabled: Optional[bool], min_tokens: Optional[int], gemini_min_tokens: Optional[int], gemini_ttl: Optional[int]):
+    """Show or update prompt cache settings."""
+    config = Config()
+    try:
+        updates = {}
+        if enabled is not None:
+            updates['enabled'] = enabled
+        if min_tokens is not None:
+            updates['min_tokens'] = min_tokens
+        if gemini_min_tokens is not None:
+            updates['gemini_min_tokens'] = gemini_min_tokens
+        if gemini_ttl is not None:
+            updates['gemini_ttl'] = gemini_ttl
+        if updates:
+            config.set_prompt_cache_settings(**updates)
+        for key, value in config.get_prompt_cache_settings().items():
+            click.echo(f"{key}: {value}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@cache_prompt.command('clear')
+def cache_prompt_clear():
+    """Forget the Gemini cached contents ffmcp created (they expire on their own)."""
+    config = Config()
+    try:
+        from ffmcp.prompt_cache import gemini_caches
+        removed = gemini_caches(config).forget()
+        click.echo(f"Forgot {removed} Gemini cache entries")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
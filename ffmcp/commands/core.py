@@ -0,0 +1,560 @@
+"""Top-level commands: generate, chat, tokens, providers, config, export/import"""
+import json
+import logging
+import sys
+from typing import List, Optional
+
+import click
+
+from ffmcp.commands import DefaultCommandGroup, format_text_output
+from ffmcp.config import Config
+from ffmcp.providers import get_provider
+
+
+logger = logging.getLogger('ffmcp.cli')
+
+
+def _hedged(config: Config, provider_instance, model: Optional[str], hedge: Optional[str], percentile: float, after: Optional[float]):
+    """A Hedge racing provider_instance against the --hedge target, or None without --hedge."""
+    if not hedge:
+        return None
+    from ffmcp.hedging import Hedge, parse_hedge
+    backup, backup_model = parse_hedge(hedge)
+    return Hedge(
+        config, provider_instance, get_provider(backup, config),
+        model=model, backup_model=backup_model, percentile=percentile, delay=after,
+    )
+
+
+def _answered_by(target, provider: str, model: Optional[str]):
+    """(provider, model) that produced the answer: the backup's if it won a hedged request."""
+    if getattr(target, 'winner', None) is not None:
+        return target.provider_name, target.model_name
+    return provider, model
+
+
+@click.command()
+@click.argument('prompt', required=False)
+@click.option('--provider', '-p', default='openai', help='AI provider to use (openai, anthropic, gemini, groq, deepseek, mistral, together, cohere, perplexity, ai33, aimlapi)')
+@click.option('--model', '-m', help='Model to use (overrides default)')
+@click.option('--temperature', '-t', type=float, help='Temperature for generation')
+@click.option('--max-tokens', type=int, help='Maximum tokens to generate')
+@click.option('--stream', '-s', is_flag=True, help='Stream the response')
+@click.option('--system', help='System message')
+@click.option('--input', '-i', type=click.File('r', encoding='utf-8'), help='Read prompt from file')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), help='Write output to file')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+@click.option('--array', 'array_output', is_flag=True, help='Output as array')
+@click.option('--hedge', help='Also send the request to provider[:model] if no answer/first chunk arrives in time; the first answer wins')
+@click.option('--hedge-percentile', type=float, default=0.95, show_default=True, help="Hedge deadline: this latency percentile of the primary model")
+@click.option('--hedge-after', type=float, help='Hedge deadline in seconds (instead of the percentile)')
+def generate(prompt: Optional[str], provider: str, model: Optional[str], 
+             temperature: Optional[float], max_tokens: Optional[int], 
+             stream: bool, system: Optional[str], input: Optional, output: Optional, json_output: bool, array_output: bool,
+             hedge: Optional[str], hedge_percentile: float, hedge_after: Optional[float]):
+    """Generate text using AI"""
+    config = Config()
+    
+    # Get prompt from argument, file, or stdin
+    input_source = 'stdin'
+    if input:
+        input_source = 'file'
+        prompt_text = input.read()
+    elif prompt:
+        input_source = 'arg'
+        prompt_text = prompt
+    else:
+        prompt_text = sys.stdin.read()
+    
+    logger.info(
+        "generate start provider=%s model=%s temperature=%s max_tokens=%s stream=%s system=%s input_source=%s output=%s",
+        provider,
+        model or '(default)',
+        temperature,
+        max_tokens,
+        stream,
+        bool(system),
+        input_source,
+        bool(output),
+    )
+    logger.debug("prompt length=%d", len(prompt_text or ''))
+
+    if not (prompt_text or '').strip():
+        click.echo("Error: No prompt provided", err=True)
+        sys.exit(1)
+    
+    # Get provider instance
+    try:
+        provider_instance = get_provider(provider, config)
+        try:
+            default_model = provider_instance.get_default_model()
+        except Exception:
+            default_model = None
+        logger.info(
+            "provider initialized name=%s class=%s default_model=%s",
+            provider,
+            provider_instance.__class__.__name__,
+            default_model,
+        )
+        # Requests go to the provider, or race it against a backup (see ffmcp.hedging)
+        target = _hedged(config, provider_instance, model, hedge, hedge_percentile, hedge_after) or provider_instance
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        logger.exception("failed to initialize provider: %s", provider)
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+    
+    # Prepare parameters
+    params = {}
+    if model:
+        params['model'] = model
+    if temperature is not None:
+        params['temperature'] = temperature
+    if max_tokens:
+        params['max_tokens'] = max_tokens
+
+    # Near-duplicate prompts with the same settings reuse an earlier answer (see ffmcp.semantic_cache)
+    from ffmcp import semantic_cache
+    scope = semantic_cache.scope_key(provider=provider, model=model or default_model, system=system, params=params)
+    cache, match = semantic_cache.lookup(config, 'generate', prompt_text, scope=scope)
+    if match is not None and match.hit:
+        logger.info("semantic cache hit similarity=%.3f", match.similarity)
+        output_text = match.answer if stream else format_text_output(
+            match.answer, json_output, array_output, provider=provider, model=model or default_model
+        )
+        click.echo(output_text)
+        if output:
+            output.write(output_text)
+        return
+    chunks: List[str] = []
+
+    # Generate
+    try:
+        # If system message is provided, use chat() instead of generate()
+        if system:
+            messages = [{"role": "system", "content": system}, {"role": "user", "content": prompt_text}]
+            
+            if stream:
+                logger.info("streaming generation with system message started")
+                _chunk_count = 0
+                for chunk in target.chat_stream(messages, **params):
+                    _chunk_count += 1
+                    chunks.append(chunk)
+                    click.echo(chunk, nl=False)
+                    if output:
+                        output.write(chunk)
+                click.echo()  # Newline after streaming
+                logger.info("streaming generation finished chunks=%d", _chunk_count)
+            else:
+                logger.debug("calling provider.chat with system message params=%s", params)
+                result = target.chat(messages, **params)
+                
+                # Handle output format
+                answered_provider, answered_model = _answered_by(
+                    target, provider, model or provider_instance.get_default_model() if hasattr(provider_instance, 'get_default_model') else None
+                )
+                output_text = format_text_output(
+                    result,
+                    json_output,
+                    array_output,
+                    provider=answered_provider,
+                    model=answered_model
+                )
+                
+                click.echo(output_text)
+                if output:
+                    output.write(output_text)
+                logger.info("generation finished result_length=%d", len(result or ''))
+                chunks.append(result or '')
+        else:
+            # No system message, use regular generate()
+            if stream:
+                logger.info("streaming generation started")
+                _chunk_count = 0
+                for chunk in target.generate_stream(prompt_text, **params):
+                    _chunk_count += 1
+                    chunks.append(chunk)
+                    click.echo(chunk, nl=False)
+                    if output:
+                        output.write(chunk)
+                click.echo()  # Newline after streaming
+                logger.info("streaming generation finished chunks=%d", _chunk_count)
+            else:
+                logger.debug("calling provider.generate with params=%s", params)
+                result = target.generate(prompt_text, **params)
+                
+                # Handle output format
+                answered_provider, answered_model = _answered_by(
+                    target, provider, model or provider_instance.get_default_model() if hasattr(provider_instance, 'get_default_model') else None
+                )
+                output_text = format_text_output(
+                    result,
+                    json_output,
+                    array_output,
+                    provider=answered_provider,
+                    model=answered_model
+                )
+                
+                click.echo(output_text)
+                if output:
+                    output.write(output_text)
+                logger.info("generation finished result_length=%d", len(result or ''))
+                chunks.append(result or '')
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        logger.exception("generation failed")
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+    semantic_cache.remember(cache, match, 'generate', prompt_text, ''.join(chunks), scope=scope)
+
+
+@click.command()
+@click.argument('prompt')
+@click.option('--provider', '-p', default='openai', help='AI provider to use (openai, anthropic, gemini, groq, deepseek, mistral, together, cohere, perplexity, ai33, aimlapi)')
+@click.option('--model', '-m', help='Model to use')
+@click.option('--system', '-s', help='System message')
+@click.option('--thread', '-t', help='Thread name (maintains conversation history). If not specified, uses active thread if available.')
+@click.option('--context-budget', type=int, help='Prompt token budget for thread history (default: configured per provider/model)')
+@click.option('--stream', is_flag=True, help='Stream the response')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+@click.option('--array', 'array_output', is_flag=True, help='Output as array')
+@click.option('--hedge', help='Also send the request to provider[:model] if no answer/first chunk arrives in time; the first answer wins')
+@click.option('--hedge-percentile', type=float, default=0.95, show_default=True, help="Hedge deadline: this latency percentile of the primary model")
+@click.option('--hedge-after', type=float, help='Hedge deadline in seconds (instead of the percentile)')
+def chat(prompt: str, provider: str, model: Optional[str], system: Optional[str], thread: Optional[str], context_budget: Optional[int], stream: bool, json_output: bool, array_output: bool,
+         hedge: Optional[str], hedge_percentile: float, hedge_after: Optional[float]):
+    """Chat with AI (conversational context). Use --thread to maintain conversation history."""
+    from ffmcp.context import build_context
+    from ffmcp.tokenizer import token_counter
+    config = Config()
+    
+    try:
+        provider_instance = get_provider(provider, config)
+        
+        # Use active thread if none is specified
+        if not thread:
+            thread = config.get_active_chat_thread()
+        
+        # A thread's system message (if any) is saved as its first message
+        thread_system = None
+        thread_is_empty = True
+        summary = None
+        if thread:
+            first = config.get_chat_thread_messages(thread, limit=1)
+            thread_is_empty = not first
+            if first and first[0].get('role') == 'system':
+                thread_system = first[0].get('content')
+            summary = config.get_chat_thread_info(thread).get('summary')
+        
+        def load_history(tokens: int):
+            recent = config.get_recent_chat_thread_messages(thread, tokens)
+            return [msg for msg in recent if msg.get('role') != 'system']
+        
+        # System message, summary of older turns, as many recent turns as fit, then the prompt
+        model_name = model or provider_instance.get_default_model()
+        messages = build_context(
+            budget=context_budget or config.get_context_budget(provider, model_name),
+            system=[system or thread_system],
+            summary=summary,
+            load_history=load_history if thread else None,
+            tail=[{"role": "user", "content": prompt}],
+            counter=token_counter(provider, model_name, config),
+        )
+        
+        params = {}
+        if model:
+            params['model'] = model
+
+        # Near-duplicate prompts in the same context reuse an earlier answer (see ffmcp.semantic_cache)
+        from ffmcp import semantic_cache
+        scope = semantic_cache.context_scope(provider, model or provider_instance.get_default_model(), messages)
+        cache, match = semantic_cache.lookup(config, 'chat', prompt, scope=scope)
+        target = provider_instance
+        if match is not None and match.hit:
+            result = match.answer
+        else:
+            target = _hedged(config, provider_instance, model, hedge, hedge_percentile, hedge_after) or provider_instance
+            if stream:
+                chunks = []
+                for chunk in target.chat_stream(messages, **params):
+                    chunks.append(chunk)
+                    click.echo(chunk, nl=False)
+                click.echo()  # Newline after streaming
+                result = ''.join(chunks)
+            else:
+                result = target.chat(messages, **params)
+            semantic_cache.remember(cache, match, 'chat', prompt, result, scope=scope)
+        
+        if not stream:
+            # Format output
+            answered_provider, answered_model = _answered_by(
+                target,
+                provider,
+                model or provider_instance.get_default_model() if hasattr(provider_instance, 'get_default_model') else None,
+            )
+            output_text = format_text_output(
+                result,
+                json_output,
+                array_output,
+                provider=answered_provider,
+                model=answered_model
+            )
+            click.echo(output_text)
+        elif match is not None and match.hit:
+            click.echo(result)
+        
+        # Save to thread if specified or active thread exists
+        if thread:
+            with config.batch():
+                # Save system message if provided and thread is new/empty
+                if system and thread_is_empty:
+                    config.add_chat_thread_message(thread, 'system', system)
+                config.add_chat_thread_message(thread, 'user', prompt)
+                config.add_chat_thread_message(thread, 'assistant', result)
+            config.maybe_compact_chat_thread(thread, default_provider=provider)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@click.group(cls=DefaultCommandGroup, default_command='usage')
+def tokens():
+    """Show cumulative token usage for the given UTC day (integer), or count tokens locally (default subcommand: usage)."""
+    pass
+
+
+@tokens.command('usage')
+@click.option('--provider', '-p', help='Filter by provider (e.g., openai, anthropic, gemini, groq, deepseek, mistral, together, cohere, perplexity, ai33, aimlapi)')
+@click.option('--date', '-d', help='UTC date YYYY-MM-DD (default: today)')
+def tokens_usage(provider: Optional[str], date: Optional[str]):
+    """Show cumulative token usage for the given UTC day (integer)."""
+    config = Config()
+    try:
+        count = config.get_token_usage(date_str=date, provider=provider)
+        click.echo(str(int(count)))
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@tokens.command('count')
+@click.argument('text', required=False)
+@click.option('--file', '-f', 'input_file', type=click.File('r', encoding='utf-8'), help='Count the tokens of a file ("-" for stdin)')
+@click.option('--messages', is_flag=True, help='The input is a JSON list of chat messages ({"role", "content"})')
+@click.option('--provider', '-p', default='openai', help='Provider whose tokenizer to use')
+@click.option('--model', '-m', help="Model whose tokenizer to use (default: the provider's default model)")
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON, with the counting method')
+def tokens_count(text: Optional[str], input_file, messages: bool, provider: str, model: Optional[str], json_output: bool):
+    """Count the tokens of TEXT (or --file) locally, without calling the provider.
+
+    Exact for models with an offline tokenizer (tiktoken, if installed);
+    otherwise an estimate calibrated from earlier requests to the model.
+    """
+    from ffmcp.tokenizer import token_counter
+    config = Config()
+    try:
+        if text is None and input_file is None:
+            raise ValueError('give TEXT or --file')
+        content = input_file.read() if input_file is not None else text
+        if not model:
+            try:
+                model = get_provider(provider, config).get_default_model()
+            except Exception:
+                # Counting needs no API key
+                model = config.get_default_model(provider)
+        counter = token_counter(provider, model, config)
+        if messages:
+            parsed = json.loads(content)
+            if not isinstance(parsed, list) or not all(isinstance(m, dict) for m in parsed):
+                raise ValueError('--messages expects a JSON list of message objects')
+            count = counter.messages(parsed)
+        else:
+            count = counter.count(content)
+        if json_output:
+            click.echo(json.dumps({
+                'tokens': count, 'provider': provider, 'model': model, 'exact': counter.exact, 'method': counter.method,
+            }, indent=2))
+        else:
+            click.echo(str(count))
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@click.command()
+def providers():
+    """List available AI providers"""
+    from ffmcp.providers import AVAILABLE_PROVIDERS
+    click.echo("Available providers:")
+    for name in AVAILABLE_PROVIDERS:
+        try:
+            description = AVAILABLE_PROVIDERS[name].__doc__ or 'No description'
+        except ImportError as e:
+            description = f"unavailable ({e})"
+        click.echo(f"  - {name}: {description}")
+
+
+@click.command()
+@click.option('--provider', '-p', required=True, help='Provider name')
+@click.option('--key', '-k', help='API key')
+@click.option('--context-budget', type=int, help='Prompt token budget for threaded chat/agents (0 removes it)')
+@click.option('--model', '-m', help='Scope --context-budget to one model of the provider')
+def config(provider: str, key: Optional[str], context_budget: Optional[int], model: Optional[str]):
+    """Configure API keys for providers"""
+    config = Config()
+    if key or context_budget is not None:
+        if key:
+            config.set_api_key(provider, key)
+            click.echo(f"API key configured for {provider}")
+        if context_budget is not None:
+            config.set_context_budget(provider, context_budget or None, model=model)
+            target = f"{provider}:{model}" if model else provider
+            click.echo(f"Context budget for {target}: {config.get_context_budget(provider, model)} tokens")
+    else:
+        current_key = config.get_api_key(provider)
+        if current_key:
+            masked = current_key[:4] + "..." + current_key[-4:] if len(current_key) > 8 else "***"
+            click.echo(f"{provider}: {masked}")
+        else:
+            click.echo(f"No API key configured for {provider}")
+
+
+@click.command('http')
+@click.option('--provider', '-p', help='Apply to one provider only (default: all providers)')
+@click.option('--max-connections', type=int, help='Max open connections per client')
+@click.option('--max-keepalive', 'max_keepalive_connections', type=int, help='Max idle connections kept for reuse')
+@click.option('--keepalive-expiry', type=float, help='Seconds an idle connection is kept open')
+@click.option('--timeout', type=float, help='Request timeout in seconds (0 resets to the SDK default)')
+@click.option('--http2/--no-http2', default=None, help='Use HTTP/2 where supported (needs: pip install "httpx[http2]")')
+@click.option('--prewarm/--no-prewarm', default=None, help='Open a connection in the background when a client is created')
+@click.option('--reset', is_flag=True, help='Remove the stored settings for this scope')
+def http_cmd(provider: Optional[str], max_connections: Optional[int], max_keepalive_connections: Optional[int], keepalive_expiry: Optional[float], timeout: Optional[float], http2: Optional[bool], prewarm: Optional[bool], reset: bool):
+    """Show or update HTTP connection pool settings used by provider clients."""
+    from ffmcp.http_pool import DEFAULT_HTTP_SETTINGS
+    config = Config()
+    try:
+        updates = {}
+        if reset:
+            updates = {key: None for key in DEFAULT_HTTP_SETTINGS}
+        if max_connections is not None:
+            updates['max_connections'] = max_connections
+        if max_keepalive_connections is not None:
+            updates['max_keepalive_connections'] = max_keepalive_connections
+        if keepalive_expiry is not None:
+            updates['keepalive_expiry'] = keepalive_expiry
+        if timeout is not None:
+            updates['timeout'] = timeout or None
+        if http2 is not None:
+            updates['http2'] = http2
+        if prewarm is not None:
+            updates['prewarm'] = prewarm
+        if updates:
+            config.set_http_settings(provider, **updates)
+        for key, value in config.get_http_settings(provider).items():
+            click.echo(f"{key}: {value}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+
+@click.command('limits')
+@click.option('--provider', '-p', help='Provider to configure (rate limits need one; retry settings default to all providers)')
+@click.option('--model', '-m', help='Scope --rpm/--tpm to one model of the provider')
+@click.option('--rpm', type=int, help='Requests per minute (0 removes the limit)')
+@click.option('--tpm', type=int, help='Tokens per minute, prompt plus max_tokens (0 removes the limit)')
+@click.option('--max-retries', type=int, help='Retries for rate limits, 5xx errors and timeouts')
+@click.option('--base-delay', type=float, help='Initial backoff in seconds (doubles per retry, with jitter)')
+@click.option('--max-delay', type=float, help='Backoff cap in seconds')
+@click.option('--reset', is_flag=True, help='Remove the stored retry settings and rate limits for this scope')
+def limits_cmd(provider: Optional[str], model: Optional[str], rpm: Optional[int], tpm: Optional[int], max_retries: Optional[int],
+               base_delay: Optional[float], max_delay: Optional[float], reset: bool):
+    """Show or update retry settings and client-side rate limits (requests/tokens per minute)."""
+    from ffmcp.ratelimit import DEFAULT_RETRY_SETTINGS
+    config = Config()
+    try:
+        if (rpm is not None or tpm is not None or model) and not provider:
+            raise ValueError('--rpm/--tpm/--model need --provider')
+        retry = {key: None for key in DEFAULT_RETRY_SETTINGS} if reset and not model else {}
+        if max_retries is not None:
+            retry['max_retries'] = max_retries
+        if base_delay is not None:
+            retry['base_delay'] = base_delay
+        if max_delay is not None:
+            retry['max_delay'] = max_delay
+        if retry:
+            config.set_retry_settings(provider, **retry)
+        limits = {'rpm': None, 'tpm': None} if reset and provider else {}
+        if rpm is not None:
+            limits['rpm'] = rpm or None
+        if tpm is not None:
+            limits['tpm'] = tpm or None
+        if limits:
+            config.set_rate_limits(provider, model, **limits)
+
+        for key, value in config.get_retry_settings(provider).items():
+            click.echo(f"{key}: {value}")
+        rate_limits = config.get_rate_limits()
+        if provider:
+            rate_limits = {k: v for k, v in rate_limits.items() if k == provider or k.startswith(f'{provider}:')}
+        for key, values in sorted(rate_limits.items()):
+            shown = ', '.join(f"{name}={values[name]}" for name in ('rpm', 'tpm') if name in values)
+            click.echo(f"limits {key}: {shown}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+@click.command('export')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-', help='Write to file (default: stdout)')
+@click.option('--since', help='Only threads/messages updated after this ISO timestamp (incremental export)')
+@click.option('--only', 'kinds', multiple=True, type=click.Choice(['agents', 'teams', 'voices', 'brains', 'threads']), help='Export only these kinds (repeatable)')
+def export_cmd(output, since: Optional[str], kinds: tuple):
+    """Export agents, teams, voices, brains and threads as NDJSON (one record per line).
+
+    API keys are not exported.
+    """
+    config = Config()
+    try:
+        count = 0
+        for record in config.iter_export_records(kinds=kinds or None, since=since):
+            output.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            count += 1
+        output.flush()
+        click.echo(f"Exported {count} records", err=True)
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@click.command('import')
+@click.argument('input_file', type=click.File('r', encoding='utf-8'), default='-')
+def import_cmd(input_file):
+    """Import an NDJSON export (file or stdin); existing entries with the same name are replaced."""
+    config = Config()
+
+    def records():
+        for line_no, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_no}: invalid JSON ({e})")
+            if not isinstance(record, dict):
+                raise ValueError(f"line {line_no}: expected a JSON object")
+            yield record
+
+    try:
+        counts = config.import_records(records())
+        summary = ', '.join(f"{n} {kind}s" for kind, n in counts.items())
+        click.echo(f"Imported {summary}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
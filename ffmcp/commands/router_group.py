@@ -0,0 +1,158 @@
+"""`ffmcp router`: latency-aware routing over several provider/model targets"""
+import json
+import sys
+from typing import Optional
+
+import click
+
+from ffmcp.config import Config
+
+
+@click.group()
+def router():
+    """Route requests over several providers with failover (use as -p router:NAME)."""
+    pass
+
+
+def _settings(strategy, timeout, failure_threshold, cooldown) -> dict:
+    settings = {}
+    if strategy:
+        settings['strategy'] = strategy
+    if timeout is not None:
+        settings['timeout'] = timeout
+    if failure_threshold is not None:
+        settings['failure_threshold'] = failure_threshold
+    if cooldown is not None:
+        settings['cooldown'] = cooldown
+    return settings
+
+
+_target_help = 'Target as provider:model, optionally @weight (repeatable, in preference order)'
+
+
+@router.command('create')
+@click.argument('name')
+@click.option('--target', '-t', 'targets', multiple=True, required=True, help=_target_help)
+@click.option('--strategy', type=click.Choice(['latency', 'ordered', 'weighted']), help='latency (default): fastest healthy target; ordered: first healthy; weighted: random by weight')
+@click.option('--timeout', type=float, help='Seconds before failing over to the next target (0: none)')
+@click.option('--failure-threshold', type=int, help='Consecutive failures before a target is skipped')
+@click.option('--cooldown', type=float, help='Seconds a failing target is skipped (doubles on repeat)')
+def router_create(name: str, targets: tuple, strategy: Optional[str], timeout: Optional[float], failure_threshold: Optional[int], cooldown: Optional[float]):
+    """Create or replace a router."""
+    from ffmcp.routing import parse_target
+    config = Config()
+    try:
+        if config.get_router(name):
+            config.delete_router(name)
+        config.set_router(name, targets=[parse_target(t) for t in targets], **_settings(strategy, timeout, failure_threshold, cooldown))
+        click.echo(f"Router saved: {name} (use with -p router:{name})")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@router.command('update')
+@click.argument('name')
+@click.option('--target', '-t', 'targets', multiple=True, help=f'{_target_help}; replaces all targets')
+@click.option('--strategy', type=click.Choice(['latency', 'ordered', 'weighted']), help='Routing strategy')
+@click.option('--timeout', type=float, help='Seconds before failing over to the next target (0: none)')
+@click.option('--failure-threshold', type=int, help='Consecutive failures before a target is skipped')
+@click.option('--cooldown', type=float, help='Seconds a failing target is skipped (doubles on repeat)')
+def router_update(name: str, targets: tuple, strategy: Optional[str], timeout: Optional[float], failure_threshold: Optional[int], cooldown: Optional[float]):
+    """Change a router's targets or settings."""
+    from ffmcp.routing import parse_target
+    config = Config()
+    try:
+        if not config.get_router(name):
+            raise ValueError(f'unknown router: {name}')
+        config.set_router(
+            name,
+            targets=[parse_target(t) for t in targets] if targets else None,
+            **_settings(strategy, timeout, failure_threshold, cooldown),
+        )
+        click.echo(f"Router updated: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@router.command('list')
+def router_list():
+    """List routers."""
+    config = Config()
+    routers = config.list_routers()
+    if not routers:
+        click.echo("No routers")
+        return
+    for r in routers:
+        targets = ', '.join(f"{t['provider']}:{t['model']}" for t in r.get('targets', []))
+        click.echo(f"{r['name']} ({r.get('strategy', 'latency')}): {targets}")
+
+
+@router.command('show')
+@click.argument('name')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+def router_show(name: str, json_output: bool):
+    """Show a router's targets with their latency, error rate and circuit state."""
+    import time
+    from ffmcp.providers.router_provider import RouterProvider
+    from ffmcp.routing import target_key
+    config = Config()
+    try:
+        routed = RouterProvider(config, name)
+        order = [target_key(t['provider'], t['model']) for t in routed.candidates()]
+        rows = []
+        for target in routed.targets:
+            key = target_key(target['provider'], target['model'])
+            stats = routed.tracker.get(key)
+            rows.append({
+                'target': key,
+                'weight': target.get('weight', 1.0),
+                'rank': order.index(key) + 1,
+                'latency_ms': None if stats.latency is None else round(stats.latency * 1000),
+                'p95_ms': None if stats.percentile(0.95) is None else round(stats.percentile(0.95) * 1000),
+                'error_rate': round(stats.error_rate, 3),
+                'samples': stats.samples,
+                'open_for_s': max(0, round(stats.open_until - time.time())),
+            })
+        if json_output:
+            click.echo(json.dumps({'name': name, 'settings': routed.settings, 'targets': rows}, indent=2))
+            return
+        click.echo(f"Router {name} ({routed.settings['strategy']}, timeout {routed.settings['timeout']}s)")
+        for row in sorted(rows, key=lambda r: r['rank']):
+            latency = f"{row['latency_ms']}ms" if row['latency_ms'] is not None else 'n/a'
+            state = f", skipped for {row['open_for_s']}s" if row['open_for_s'] else ''
+            click.echo(f"  {row['rank']}. {row['target']}: latency {latency}, errors {row['error_rate']:.0%}, {row['samples']} samples{state}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@router.command('reset')
+@click.argument('name')
+def router_reset(name: str):
+    """Forget the latency/error stats of a router's targets."""
+    from ffmcp.routing import health_tracker, target_key
+    config = Config()
+    try:
+        definition = config.get_router(name)
+        if not definition:
+            raise ValueError(f'unknown router: {name}')
+        health_tracker(config).reset([target_key(t['provider'], t['model']) for t in definition['targets']])
+        click.echo(f"Stats reset for router {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@router.command('delete')
+@click.argument('name')
+def router_delete(name: str):
+    """Delete a router."""
+    config = Config()
+    config.delete_router(name)
+    click.echo(f"Router deleted: {name}")
@@ -0,0 +1,192 @@
+"""`ffmcp thread`: chat thread management"""
+import json
+import sys
+from typing import Optional
+
+import click
+
+from ffmcp.config import Config
+
+
+@click.group()
+def thread():
+    """Manage chat threads (conversation history for chat command)."""
+    pass
+
+
+@thread.command('create')
+@click.argument('thread_name')
+def thread_create(thread_name: str):
+    """Create a new chat thread."""
+    config = Config()
+    try:
+        config.create_chat_thread(thread_name)
+        click.echo(f"Thread created: {thread_name} (active)")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('list')
+@click.option('--limit', type=int, default=None, help='Show at most this many threads')
+@click.option('--offset', type=int, default=0, show_default=True, help='Skip this many threads')
+def thread_list(limit: Optional[int], offset: int):
+    """List all chat threads."""
+    config = Config()
+    try:
+        threads = config.list_chat_threads(offset=offset, limit=limit)
+        if not threads:
+            click.echo("No threads found")
+            return
+        for thread in threads:
+            marker = ' *' if thread.get('active') else ''
+            msg_count = thread.get('message_count', 0)
+            created = thread.get('created_at', 'unknown')
+            updated = thread.get('updated_at') or created
+            click.echo(f"{thread['name']}{marker} ({msg_count} messages, created: {created}, updated: {updated})")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('use')
+@click.argument('thread_name')
+def thread_use(thread_name: str):
+    """Set active chat thread."""
+    config = Config()
+    try:
+        config.set_active_chat_thread(thread_name)
+        click.echo(f"Active thread: {thread_name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('current')
+def thread_current():
+    """Show active chat thread."""
+    config = Config()
+    try:
+        thread_name = config.get_active_chat_thread()
+        if thread_name:
+            click.echo(thread_name)
+        else:
+            click.echo("No active thread")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('clear')
+@click.argument('thread_name')
+def thread_clear(thread_name: str):
+    """Clear all messages from a chat thread."""
+    config = Config()
+    try:
+        config.clear_chat_thread(thread_name)
+        click.echo(f"Thread cleared: {thread_name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('delete')
+@click.argument('thread_name')
+def thread_delete(thread_name: str):
+    """Delete a chat thread."""
+    config = Config()
+    try:
+        config.delete_chat_thread(thread_name)
+        click.echo(f"Thread deleted: {thread_name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('search')
+@click.argument('query')
+@click.option('--agent', 'agent_name', help='Only search threads of this agent')
+@click.option('--chat', 'chat_only', is_flag=True, help='Only search chat threads')
+@click.option('--limit', '-n', type=int, default=20, show_default=True, help='Maximum number of hits')
+@click.option('--json', 'json_output', is_flag=True, help='Output as JSON')
+def thread_search(query: str, agent_name: Optional[str], chat_only: bool, limit: int, json_output: bool):
+    """Search chat and agent threads for QUERY (ranked, with snippets)."""
+    config = Config()
+    try:
+        hits = config.search_threads(query, agent_name=agent_name, chat_only=chat_only, limit=limit)
+        if json_output:
+            click.echo(json.dumps(hits, indent=2, ensure_ascii=False))
+            return
+        if not hits:
+            click.echo("No matches found")
+            return
+        for hit in hits:
+            where = f"agent {hit['agent']} / {hit['thread']}" if hit['agent'] else f"chat / {hit['thread']}"
+            snippet = ' '.join((hit.get('snippet') or '').split())
+            click.echo(f"{where} #{hit['seq']} ({hit['role']}, {hit['timestamp']})")
+            click.echo(f"  {snippet}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('compact')
+@click.argument('thread_name', required=False)
+@click.option('--provider', '-p', help='Provider for the summarization model (default: compaction setting, else openai)')
+@click.option('--model', '-m', help='Summarization model (default: compaction setting, else provider default)')
+@click.option('--keep-last', type=int, help='Newest messages to keep verbatim (default: compaction setting)')
+@click.option('--show', is_flag=True, help='Print the resulting summary')
+def thread_compact(thread_name: Optional[str], provider: Optional[str], model: Optional[str], keep_last: Optional[int], show: bool):
+    """Fold older messages of a chat thread into a summary (defaults to active thread)."""
+    config = Config()
+    try:
+        thread_name = thread_name or config.get_active_chat_thread()
+        folded = config.compact_chat_thread(thread_name, provider=provider, model=model, keep_last=keep_last)
+        click.echo(f"Compacted {folded} messages in thread: {thread_name}")
+        if show:
+            click.echo(config.get_chat_thread_info(thread_name).get('summary') or '')
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@thread.command('compaction')
+@click.option('--provider', '-p', help='Provider for the summarization model ("" to reset)')
+@click.option('--model', '-m', help='Summarization model, e.g. a cheap/fast model ("" to reset)')
+@click.option('--threshold', 'threshold_tokens', type=int, help='Compact once unsummarized messages exceed this many tokens (0 disables)')
+@click.option('--max-age-days', type=float, help='Compact once the oldest unsummarized message is this old (0 disables)')
+@click.option('--keep-last', type=int, help='Newest messages always kept verbatim')
+@click.option('--auto/--no-auto', default=None, help='Compact automatically after chat/agent turns')
+def thread_compaction(provider: Optional[str], model: Optional[str], threshold_tokens: Optional[int], max_age_days: Optional[float], keep_last: Optional[int], auto: Optional[bool]):
+    """Show or update thread compaction settings (applies to chat and agent threads)."""
+    config = Config()
+    try:
+        updates = {}
+        if provider is not None:
+            updates['provider'] = provider or None
+        if model is not None:
+            updates['model'] = model or None
+        if threshold_tokens is not None:
+            updates['threshold_tokens'] = threshold_tokens
+        if max_age_days is not None:
+            updates['max_age_days'] = max_age_days
+        if keep_last is not None:
+            updates['keep_last'] = keep_last
+        if auto is not None:
+            updates['auto'] = auto
+        if updates:
+            config.set_compaction_settings(**updates)
+        for key, value in config.get_compaction_settings().items():
+            click.echo(f"{key}: {value}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
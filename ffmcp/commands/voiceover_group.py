@@ -0,0 +1,374 @@
+"""`ffmcp voiceover` and `ffmcp tts`: voice configurations and text-to-speech"""
+import json
+import sys
+from typing import List, Optional
+
+import click
+
+from ffmcp.config import Config
+from ffmcp.voiceover import get_tts_provider
+
+
+@click.group()
+def voiceover():
+    """Manage voiceover/TTS configurations and providers."""
+    pass
+
+
+@voiceover.command('create')
+@click.argument('name')
+@click.option('--provider', '-p', required=True, help='TTS provider (elevenlabs, fishaudio)')
+@click.option('--voice-id', help='Voice ID from provider (required for elevenlabs)')
+@click.option('--model-id', help='Model ID (e.g., eleven_multilingual_v2)')
+@click.option('--stability', type=float, help='Stability (0.0-1.0)')
+@click.option('--similarity-boost', type=float, help='Similarity boost (0.0-1.0)')
+@click.option('--style', type=float, help='Style (0.0-1.0)')
+@click.option('--use-speaker-boost/--no-speaker-boost', default=True, help='Use speaker boost')
+@click.option('--output-format', help='Output format (e.g., mp3_44100_128)')
+@click.option('--description', help='Description for this voice')
+@click.option('--reference-id', help='FishAudio: Reference/voice model ID')
+@click.option('--reference-audio', type=click.Path(exists=True), help='FishAudio: Path to reference audio file for voice cloning')
+@click.option('--reference-text', help='FishAudio: Text corresponding to reference audio')
+@click.option('--format', help='FishAudio: Output format (mp3, wav, pcm, opus)')
+@click.option('--prosody-speed', type=float, help='FishAudio: Speech speed (e.g., 1.0)')
+@click.option('--prosody-volume', type=float, help='FishAudio: Volume (e.g., 0)')
+def voiceover_create(name: str, provider: str, voice_id: Optional[str], model_id: Optional[str],
+                     stability: Optional[float], similarity_boost: Optional[float],
+                     style: Optional[float], use_speaker_boost: bool,
+                     output_format: Optional[str], description: Optional[str],
+                     reference_id: Optional[str], reference_audio: Optional[str],
+                     reference_text: Optional[str], format: Optional[str],
+                     prosody_speed: Optional[float], prosody_volume: Optional[float]):
+    """Create a new voiceover configuration."""
+    config = Config()
+    try:
+        # Build prosody dict if speed or volume provided
+        prosody = None
+        if prosody_speed is not None or prosody_volume is not None:
+            prosody = {}
+            if prosody_speed is not None:
+                prosody['speed'] = prosody_speed
+            if prosody_volume is not None:
+                prosody['volume'] = prosody_volume
+        
+        config.create_voice(
+            name=name,
+            provider=provider,
+            voice_id=voice_id,
+            model_id=model_id,
+            stability=stability,
+            similarity_boost=similarity_boost,
+            style=style,
+            use_speaker_boost=use_speaker_boost,
+            output_format=output_format,
+            description=description,
+            reference_id=reference_id,
+            reference_audio=reference_audio,
+            reference_text=reference_text,
+            format=format,
+            prosody=prosody,
+        )
+        click.echo(f"Voice created: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@voiceover.command('list')
+def voiceover_list():
+    """List all voiceover configurations."""
+    config = Config()
+    try:
+        voices = config.list_voices()
+        if not voices:
+            click.echo("No voices configured")
+            return
+        for voice in voices:
+            provider = voice.get('provider', 'unknown')
+            voice_id = voice.get('voice_id') or voice.get('reference_id') or 'N/A'
+            desc = voice.get('description', '')
+            desc_str = f" - {desc}" if desc else ""
+            click.echo(f"{voice['name']} ({provider}:{voice_id}){desc_str}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@voiceover.command('show')
+@click.argument('name')
+def voiceover_show(name: str):
+    """Show details of a voiceover configuration."""
+    config = Config()
+    try:
+        voice = config.get_voice(name)
+        if not voice:
+            click.echo(f"Error: Unknown voice '{name}'", err=True)
+            sys.exit(1)
+        click.echo(json.dumps({"name": name, **voice}, indent=2))
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@voiceover.command('update')
+@click.argument('name')
+@click.option('--voice-id', help='Update voice ID')
+@click.option('--model-id', help='Update model ID')
+@click.option('--stability', type=float, help='Update stability')
+@click.option('--similarity-boost', type=float, help='Update similarity boost')
+@click.option('--style', type=float, help='Update style')
+@click.option('--use-speaker-boost/--no-speaker-boost', default=None, help='Update speaker boost')
+@click.option('--output-format', help='Update output format')
+@click.option('--description', help='Update description')
+@click.option('--reference-id', help='FishAudio: Update reference/voice model ID')
+@click.option('--reference-audio', type=click.Path(exists=True), help='FishAudio: Update reference audio file path')
+@click.option('--reference-text', help='FishAudio: Update reference text')
+@click.option('--format', help='FishAudio: Update output format (mp3, wav, pcm, opus)')
+@click.option('--prosody-speed', type=float, help='FishAudio: Update speech speed')
+@click.option('--prosody-volume', type=float, help='FishAudio: Update volume')
+def voiceover_update(name: str, voice_id: Optional[str], model_id: Optional[str],
+                     stability: Optional[float], similarity_boost: Optional[float],
+                     style: Optional[float], use_speaker_boost: Optional[bool],
+                     output_format: Optional[str], description: Optional[str],
+                     reference_id: Optional[str], reference_audio: Optional[str],
+                     reference_text: Optional[str], format: Optional[str],
+                     prosody_speed: Optional[float], prosody_volume: Optional[float]):
+    """Update a voiceover configuration."""
+    config = Config()
+    try:
+        updates = {}
+        if voice_id is not None:
+            updates['voice_id'] = voice_id
+        if model_id is not None:
+            updates['model_id'] = model_id
+        if stability is not None:
+            updates['stability'] = stability
+        if similarity_boost is not None:
+            updates['similarity_boost'] = similarity_boost
+        if style is not None:
+            updates['style'] = style
+        if use_speaker_boost is not None:
+            updates['use_speaker_boost'] = use_speaker_boost
+        if output_format is not None:
+            updates['output_format'] = output_format
+        if description is not None:
+            updates['description'] = description
+        
+        # FishAudio-specific updates
+        if reference_id is not None:
+            updates['reference_id'] = reference_id
+        if reference_audio is not None:
+            updates['reference_audio'] = reference_audio
+        if reference_text is not None:
+            updates['reference_text'] = reference_text
+        if format is not None:
+            updates['format'] = format
+        
+        # Handle prosody updates
+        if prosody_speed is not None or prosody_volume is not None:
+            current_voice = config.get_voice(name)
+            current_prosody = current_voice.get('prosody', {}) if current_voice else {}
+            prosody = dict(current_prosody)
+            if prosody_speed is not None:
+                prosody['speed'] = prosody_speed
+            if prosody_volume is not None:
+                prosody['volume'] = prosody_volume
+            updates['prosody'] = prosody
+        
+        if not updates:
+            click.echo("Error: No updates provided", err=True)
+            sys.exit(1)
+        
+        config.update_voice(name, updates)
+        click.echo(f"Voice updated: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@voiceover.command('delete')
+@click.argument('name')
+def voiceover_delete(name: str):
+    """Delete a voiceover configuration."""
+    config = Config()
+    try:
+        config.delete_voice(name)
+        click.echo(f"Voice deleted: {name}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@voiceover.group()
+def provider():
+    """Manage TTS provider voices."""
+    pass
+
+
+@provider.command('list')
+@click.option('--provider', '-p', required=True, help='TTS provider (elevenlabs, fishaudio)')
+def provider_list(provider: str):
+    """List available voices from a TTS provider."""
+    config = Config()
+    try:
+        tts_provider = get_tts_provider(provider, config)
+        voices = tts_provider.list_voices()
+        if not voices:
+            click.echo(f"No voices found for provider '{provider}'")
+            return
+        for voice in voices:
+            voice_id = voice.get('id', 'unknown')
+            voice_name = voice.get('name', 'unknown')
+            category = voice.get('category', '')
+            desc = voice.get('description', '')
+            cat_str = f" [{category}]" if category else ""
+            desc_str = f" - {desc}" if desc else ""
+            click.echo(f"{voice_id}: {voice_name}{cat_str}{desc_str}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@provider.command('show')
+@click.option('--provider', '-p', required=True, help='TTS provider (elevenlabs, fishaudio)')
+@click.argument('voice_id')
+def provider_show(provider: str, voice_id: str):
+    """Show details of a provider voice."""
+    config = Config()
+    try:
+        tts_provider = get_tts_provider(provider, config)
+        voice = tts_provider.get_voice(voice_id)
+        if not voice:
+            click.echo(f"Error: Voice '{voice_id}' not found", err=True)
+            sys.exit(1)
+        click.echo(json.dumps(voice, indent=2))
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
+
+
+@click.command('tts')
+@click.argument('text')
+@click.argument('output_file', type=click.Path())
+@click.option('--voice', '-v', help='Voice configuration name (from voiceover list)')
+@click.option('--provider', '-p', help='TTS provider (elevenlabs, fishaudio)')
+@click.option('--voice-id', help='Voice ID (if not using saved voice)')
+@click.option('--model-id', help='Model ID')
+@click.option('--stability', type=float, help='Stability (0.0-1.0)')
+@click.option('--similarity-boost', type=float, help='Similarity boost (0.0-1.0)')
+@click.option('--style', type=float, help='Style (0.0-1.0)')
+@click.option('--use-speaker-boost/--no-speaker-boost', default=True, help='Use speaker boost')
+@click.option('--output-format', help='Output format')
+@click.option('--reference-id', help='FishAudio: Reference/voice model ID')
+@click.option('--reference-audio', type=click.Path(exists=True), help='FishAudio: Path to reference audio file for voice cloning')
+@click.option('--reference-text', help='FishAudio: Text corresponding to reference audio')
+@click.option('--format', help='FishAudio: Output format (mp3, wav, pcm, opus)')
+@click.option('--prosody-speed', type=float, help='FishAudio: Speech speed (e.g., 1.0)')
+@click.option('--prosody-volume', type=float, help='FishAudio: Volume (e.g., 0)')
+def tts(text: str, output_file: str, voice: Optional[str], provider: Optional[str],
+        voice_id: Optional[str], model_id: Optional[str], stability: Optional[float],
+        similarity_boost: Optional[float], style: Optional[float], use_speaker_boost: bool,
+        output_format: Optional[str], reference_id: Optional[str], reference_audio: Optional[str],
+        reference_text: Optional[str], format: Optional[str], prosody_speed: Optional[float],
+        prosody_volume: Optional[float]):
+    """Convert text to speech."""
+    config = Config()
+    try:
+        # Determine provider and voice_id
+        if voice:
+            # Use saved voice configuration
+            voice_config = config.get_voice(voice)
+            if not voice_config:
+                click.echo(f"Error: Unknown voice '{voice}'", err=True)
+                sys.exit(1)
+            provider = voice_config.get('provider')
+            voice_id = voice_config.get('voice_id')
+            # Use saved settings as defaults, but allow overrides
+            if model_id is None:
+                model_id = voice_config.get('model_id')
+            if stability is None:
+                stability = voice_config.get('stability')
+            if similarity_boost is None:
+                similarity_boost = voice_config.get('similarity_boost')
+            if style is None:
+                style = voice_config.get('style')
+            if use_speaker_boost is None:
+                use_speaker_boost = voice_config.get('use_speaker_boost', True)
+            if output_format is None:
+                output_format = voice_config.get('output_format')
+            # FishAudio parameters
+            if reference_id is None:
+                reference_id = voice_config.get('reference_id')
+            if reference_audio is None:
+                reference_audio = voice_config.get('reference_audio')
+            if reference_text is None:
+                reference_text = voice_config.get('reference_text')
+            if format is None:
+                format = voice_config.get('format')
+            if prosody_speed is None and prosody_volume is None:
+                prosody_config = voice_config.get('prosody')
+                if prosody_config:
+                    prosody_speed = prosody_config.get('speed')
+                    prosody_volume = prosody_config.get('volume')
+        elif provider and (voice_id or reference_id or reference_audio):
+            # Use direct provider/voice_id or FishAudio reference
+            pass
+        else:
+            click.echo("Error: Provide --voice or --provider with --voice-id/--reference-id/--reference-audio", err=True)
+            sys.exit(1)
+        
+        if not provider:
+            click.echo("Error: Provider is required", err=True)
+            sys.exit(1)
+        
+        # Build kwargs for provider
+        kwargs = {}
+        if model_id:
+            kwargs['model_id'] = model_id
+        if stability is not None:
+            kwargs['stability'] = stability
+        if similarity_boost is not None:
+            kwargs['similarity_boost'] = similarity_boost
+        if style is not None:
+            kwargs['style'] = style
+        if use_speaker_boost is not None:
+            kwargs['use_speaker_boost'] = use_speaker_boost
+        if output_format:
+            kwargs['output_format'] = output_format
+        
+        # FishAudio-specific kwargs
+        if reference_id:
+            kwargs['reference_id'] = reference_id
+        if reference_audio:
+            kwargs['reference_audio'] = reference_audio
+        if reference_text:
+            kwargs['reference_text'] = reference_text
+        if format:
+            kwargs['format'] = format
+        if prosody_speed is not None or prosody_volume is not None:
+            prosody = {}
+            if prosody_speed is not None:
+                prosody['speed'] = prosody_speed
+            if prosody_volume is not None:
+                prosody['volume'] = prosody_volume
+            kwargs['prosody'] = prosody
+        
+        tts_provider = get_tts_provider(provider, config)
+        result = tts_provider.text_to_speech(
+            text=text,
+            output_path=output_file,
+            voice_id=voice_id,
+            **kwargs
+        )
+        click.echo(f"Audio saved to: {result}")
+    except Exception as e:
+        error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+        click.echo(f"Error: {error_msg}", err=True)
+        sys.exit(1)
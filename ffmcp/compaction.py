@@ -0,0 +1,118 @@
+"""Rolling thread summarization (compaction)
+
+Older turns of a thread are folded into a stored summary by a (cheap)
+model. The raw messages stay in the thread store as an archive, but only
+the summary and the newer turns are replayed into prompts.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from ffmcp.context import truncate_to_tokens
+
+
+DEFAULT_COMPACTION_SETTINGS: Dict[str, Any] = {
+    'provider': None,          # None: the provider of the chat/agent being compacted
+    'model': None,             # None: that provider's default model
+    'threshold_tokens': 6000,  # compact once unsummarized messages exceed this
+    'max_age_days': None,      # ...or once the oldest unsummarized message is this old
+    'keep_last': 8,            # newest messages always left verbatim
+    'auto': False,             # check thresholds after every chat/agent turn (opt-in: each compaction is a paid call)
+}
+
+# Max tokens of messages sent to the summarizer per call
+CHUNK_TOKENS = 6000
+# Chunks folded per automatic compaction, so one turn never waits on many calls
+AUTO_MAX_CHUNKS = 2
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation so it can continue without "
+    "the full history. Merge the existing summary with the new messages. Keep facts, "
+    "decisions, names, numbers, user preferences, commitments and open questions; "
+    "drop small talk. Write concise plain text of at most 400 words. Reply with the "
+    "summary only."
+)
+
+
+def needs_compaction(info: Dict[str, Any], settings: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """Whether a thread (see ThreadStore.thread_info) is over the size/age threshold."""
+    if not info:
+        return False
+    threshold = settings.get('threshold_tokens')
+    if threshold and int(info.get('unsummarized_tokens') or 0) > int(threshold):
+        return True
+    max_age = settings.get('max_age_days')
+    since = info.get('unsummarized_since')
+    if max_age and since:
+        try:
+            oldest = datetime.fromisoformat(since)
+        except ValueError:
+            return False
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        return (now or datetime.now(timezone.utc)) - oldest > timedelta(days=float(max_age))
+    return False
+
+
+def _chunks(messages: List[Dict[str, Any]], chunk_tokens: int) -> List[List[Dict[str, Any]]]:
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = 0
+    for msg in messages:
+        tokens = int(msg.get('tokens') or 0)
+        if current and used + tokens > chunk_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(msg)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def summarize(chat: Callable[[List[Dict[str, Any]]], str], summary: Optional[str], messages: List[Dict[str, Any]]) -> str:
+    """Ask the model to merge messages into the existing summary."""
+    transcript = '\n'.join(
+        f"{msg.get('role')}: {truncate_to_tokens(str(msg.get('content') or ''), CHUNK_TOKENS)}"
+        for msg in messages
+    )
+    prompt = f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+    result = chat([
+        {'role': 'system', 'content': SUMMARY_INSTRUCTIONS},
+        {'role': 'user', 'content': prompt},
+    ])
+    return (result or '').strip()
+
+
+def compact_thread(
+    store,
+    agent: str,
+    name: str,
+    chat: Callable[[List[Dict[str, Any]]], str],
+    *,
+    keep_last: int = 8,
+    max_chunks: Optional[int] = None,
+) -> int:
+    """Fold a thread's unsummarized messages (minus the newest keep_last) into its summary.
+
+    - store: ThreadStore; agent: its agent key
+    - chat(messages) -> str: calls the summarization model
+    - max_chunks: stop after this many summarizer calls (None: fold everything)
+
+    The summary is saved after every chunk, so an interrupted compaction
+    keeps its progress. Returns the number of messages folded.
+    """
+    info = store.thread_info(agent, name)
+    if not info:
+        raise ValueError(f'unknown thread: {name}')
+    summary = info.get('summary')
+    pending = store.get_unsummarized_messages(agent, name, keep_last=max(0, keep_last))
+    folded = 0
+    for i, chunk in enumerate(_chunks(pending, CHUNK_TOKENS)):
+        if max_chunks is not None and i >= max_chunks:
+            break
+        summary = summarize(chat, summary, chunk)
+        if not summary:
+            raise RuntimeError('summarization model returned an empty summary')
+        store.set_summary(agent, name, summary, chunk[-1]['seq'])
+        folded += len(chunk)
+    return folded
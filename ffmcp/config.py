@@ -1,54 +1,238 @@
 """Configuration management for ffmcp"""
 import os
-import json
+import functools
+import threading
+from collections.abc import MutableMapping
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
+from ffmcp.storage import JsonDocument
+from ffmcp.thread_store import ThreadStore, CHAT_SCOPE
+from ffmcp.usage_ledger import UsageLedger
+
+
+def _synchronized(method):
+    """Run a Config method under the instance lock (for read-modify-write)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _DomainView(MutableMapping):
+    """Dict-like view that routes each top-level key to its domain document.
+
+    Lets Config code keep using ``self._config['agents']`` etc. while the data
+    lives in separate files that are only read when a key is first touched.
+    """
+
+    def __init__(self, config: 'Config'):
+        self._owner = config
+
+    def _data(self, key: str) -> dict:
+        return self._owner._domain_data(self._owner.DOMAIN_KEYS.get(key, 'core'))
+
+    def __getitem__(self, key):
+        return self._data(key)[key]
+
+    def __setitem__(self, key, value):
+        self._data(key)[key] = value
+
+    def __delitem__(self, key):
+        del self._data(key)[key]
+
+    def __iter__(self):
+        for domain in self._owner.DOMAIN_FILES:
+            yield from list(self._owner._domain_data(domain))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
 
 class Config:
-    """Manages configuration and API keys"""
+    """Manages configuration and API keys.
+
+    Settings are split into per-domain files under ~/.ffmcp, each read only
+    the first time one of its keys is used:
+    - config.json: api keys, default models, zep/leann settings, active threads
+    - agents.json, teams.json, voices.json, brains.json
+    - threads.db: thread messages (see ThreadStore), opened on first use
+
+    A Config can be shared by worker threads, and many ffmcp processes can
+    use the same ~/.ffmcp concurrently: each file is written atomically
+    under a file lock and our changes are merged into whatever other
+    processes saved in the meantime.
+    """
+
+    # domain -> file name
+    DOMAIN_FILES = {
+        'core': 'config.json',
+        'agents': 'agents.json',
+        'teams': 'teams.json',
+        'voices': 'voices.json',
+        'brains': 'brains.json',
+    }
+    # top-level key -> domain (anything else lives in config.json)
+    DOMAIN_KEYS = {
+        'agents': 'agents',
+        'active_agent': 'agents',
+        'teams': 'teams',
+        'active_team': 'teams',
+        'voices': 'voices',
+        'brains': 'brains',
+        'active_brain': 'brains',
+    }
     
     def __init__(self):
         self.config_dir = Path.home() / '.ffmcp'
         self.config_file = self.config_dir / 'config.json'
         self.tokens_file = self.config_dir / 'tokens.json'
+        self.threads_db = self.config_dir / 'threads.db'
         self.config_dir.mkdir(exist_ok=True)
-        self._config = self._load_config()
-        self._tokens = self._load_tokens()
-    
-    def _load_config(self) -> dict:
-        """Load configuration from file"""
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
+        self._lock = threading.RLock()
+        self._docs = {
+            domain: JsonDocument(self.config_dir / filename)
+            for domain, filename in self.DOMAIN_FILES.items()
+        }
+        self._config = _DomainView(self)
+        self._usage = UsageLedger(self.config_dir)
+        self._thread_store: Optional[ThreadStore] = None
+        # Write batching state (see batch()); batches are per thread
+        self._local = threading.local()
+
+    @property
+    def _threads(self) -> ThreadStore:
+        """The thread store, opened on first use."""
+        if self._thread_store is None:
+            with self._lock:
+                if self._thread_store is None:
+                    self._thread_store = ThreadStore(self.threads_db)
+                    # Make sure threads still inline in a legacy config.json are imported
+                    self._domain_data('core')
+        return self._thread_store
+
+    def _domain_data(self, domain: str) -> dict:
+        """Return a domain's data, loading its file on first access.
+
+        The first access to any domain also loads config.json and moves
+        sections of the legacy single-file layout into their own files.
+        """
+        core = self._docs['core']
+        if not core.loaded:
+            with self._lock:
+                if not core.loaded:
+                    core.data
+                    self._migrate_legacy_layout()
+        return self._docs[domain].data
+
+    def _migrate_legacy_layout(self):
+        """Split domains stored inline in config.json into their own files (one-shot)."""
+        core = self._docs['core'].data
+        moved = [key for key in self.DOMAIN_KEYS if key in core]
+        if moved:
+            domains = []
+            for key in moved:
+                domain = self.DOMAIN_KEYS[key]
+                data = self._docs[domain].data
+                value = core[key]
+                if key not in data:
+                    data[key] = value
+                elif isinstance(value, dict) and isinstance(data[key], dict):
+                    # An interrupted migration already wrote part of it
+                    for name, entry in value.items():
+                        data[key].setdefault(name, entry)
+                if domain not in domains:
+                    domains.append(domain)
+            # Write the new files before dropping the keys from config.json
+            for domain in domains:
+                self._docs[domain].save()
+            for key in moved:
+                core.pop(key, None)
+            self._docs['core'].save()
+            logging.getLogger('ffmcp.config').info(
+                "Split %s into per-domain files: %s",
+                self.config_file, ', '.join(self.DOMAIN_FILES[d] for d in domains),
+            )
+        self._migrate_legacy_threads()
     
     def _save_config(self):
-        """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self._config, f, indent=2)
-
-    def _load_tokens(self) -> dict:
-        """Load token usage from file"""
-        if self.tokens_file.exists():
-            try:
-                with open(self.tokens_file, 'r') as f:
-                    data = json.load(f)
-                    return data if isinstance(data, dict) else {}
-            except Exception:
-                return {}
-        return {}
-
-    def _save_tokens(self):
-        """Save token usage to file"""
-        with open(self.tokens_file, 'w') as f:
-            json.dump(self._tokens, f, indent=2)
-    
+        """Save changed domain files (deferred until the outermost batch() exits)"""
+        with self._lock:
+            state = self._batch_state()
+            if state.depth > 0:
+                state.dirty = True
+                return
+            for doc in self._docs.values():
+                if doc.loaded:
+                    doc.save()
+            state.dirty = False
+
+    def _batch_state(self):
+        state = self._local
+        if not hasattr(state, 'depth'):
+            state.depth = 0
+            # Whether this thread's batch changed settings (saved when it exits)
+            state.dirty = False
+            state.pending_messages = []
+        return state
+
+    @contextmanager
+    def batch(self):
+        """Coalesce writes into one flush per logical operation.
+
+        Inside the block, each changed settings file is saved at most once
+        and thread messages are buffered and committed in a single
+        thread-store transaction when the outermost batch exits. Batches nest and are
+        tracked per thread. Writes are flushed on exit even if the block
+        raises, since the in-memory state has already changed.
+
+        Usage:
+            with config.batch():
+                config.add_thread_message(agent, thread, 'user', text)
+                config.add_thread_message(agent, thread, 'assistant', reply)
+        """
+        state = self._batch_state()
+        state.depth += 1
+        try:
+            yield self
+        finally:
+            state.depth -= 1
+            if state.depth == 0:
+                self._flush_pending_messages()
+                if state.dirty:
+                    self._save_config()
+
+    def _flush_pending_messages(self):
+        """Write buffered thread messages in one transaction, preserving order."""
+        state = self._batch_state()
+        if not state.pending_messages:
+            return
+        pending, state.pending_messages = state.pending_messages, []
+        with self._threads.transaction():
+            run_key, run = None, []
+            for agent_name, thread_name, message in pending:
+                if (agent_name, thread_name) != run_key and run:
+                    self._threads.append_messages(run_key[0], run_key[1], run)
+                    run = []
+                run_key = (agent_name, thread_name)
+                run.append(message)
+            if run:
+                self._threads.append_messages(run_key[0], run_key[1], run)
+
+    def _append_thread_messages(self, agent_name: str, thread_name: str, messages: List[Dict[str, Any]]):
+        """Append to a thread now, or buffer until the enclosing batch() exits."""
+        state = self._batch_state()
+        if state.depth > 0:
+            now = datetime.now(timezone.utc).isoformat()
+            for msg in messages:
+                state.pending_messages.append((agent_name, thread_name, {**msg, 'timestamp': msg.get('timestamp') or now}))
+            return
+        self._threads.append_messages(agent_name, thread_name, messages)
+
     def get_api_key(self, provider: str) -> Optional[str]:
         """Get API key for a provider"""
         # First check environment variable
@@ -62,6 +246,7 @@ class Config:
             return self._normalize_secret(cfg_key, source='config', provider=provider)
         return None
     
+    @_synchronized
     def set_api_key(self, provider: str, key: str):
         """Set API key for a provider"""
         if 'api_keys' not in self._config:
@@ -73,6 +258,7 @@ class Config:
         """Get default model for a provider"""
         return self._config.get('default_models', {}).get(provider)
     
+    @_synchronized
     def set_default_model(self, provider: str, model: str):
         """Set default model for a provider"""
         if 'default_models' not in self._config:
@@ -80,6 +266,32 @@ class Config:
         self._config['default_models'][provider] = model
         self._save_config()
 
+    def get_context_budget(self, provider: str, model: Optional[str] = None) -> int:
+        """Get the prompt token budget for threaded chats/agents.
+
+        Looks up 'provider:model', then 'provider', then 'default' in the
+        context_budgets setting, falling back to DEFAULT_CONTEXT_BUDGET.
+        """
+        from ffmcp.context import DEFAULT_CONTEXT_BUDGET
+        budgets = self._config.get('context_budgets', {})
+        for key in (f'{provider}:{model}' if model else None, provider, 'default'):
+            if key and budgets.get(key):
+                return int(budgets[key])
+        return DEFAULT_CONTEXT_BUDGET
+
+    @_synchronized
+    def set_context_budget(self, provider: str, tokens: Optional[int], model: Optional[str] = None):
+        """Set (or with tokens=None, remove) the prompt token budget for a provider or provider/model"""
+        key = f'{provider}:{model}' if model else provider
+        budgets = self._config.setdefault('context_budgets', {})
+        if tokens is None:
+            budgets.pop(key, None)
+        else:
+            if int(tokens) <= 0:
+                raise ValueError('context budget must be a positive number of tokens')
+            budgets[key] = int(tokens)
+        self._save_config()
+
     # ---------------- Internal helpers ----------------
     def _normalize_secret(self, value: str, *, source: str, provider: str) -> str:
         """Normalize secrets (API keys) to avoid common copy/paste issues.
@@ -119,28 +331,47 @@ class Config:
         return value
 
     # ---------------- Token usage helpers ----------------
-    def add_token_usage(self, provider: str, tokens: int, when: Optional[datetime] = None):
-        """Add token usage for a provider on a given date (UTC-based day).
-
-        Stored structure:
+    def add_token_usage(
+        self,
+        provider: str,
+        tokens: Optional[int],
+        when: Optional[datetime] = None,
+        *,
+        model: Optional[str] = None,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        **extra: Any,
+    ):
+        """Record token usage for one provider call.
+
+        Each call appends a record to the usage ledger (~/.ffmcp/usage.jsonl);
+        the ledger is periodically compacted into the daily rollups in
+        tokens.json:
         {
           "YYYY-MM-DD": { "openai": 1234, "anthropic": 567 }
         }
+        If tokens is None, the total is derived from prompt + completion tokens.
         """
+        if tokens is None and (prompt_tokens or completion_tokens):
+            tokens = int(prompt_tokens or 0) + int(completion_tokens or 0)
         if tokens is None:
             return
         try:
             tokens = int(tokens)
         except Exception:
             return
-        if tokens <= 0:
+        # Zero-token records are kept only when they carry extra fields (e.g. a hedge outcome)
+        if tokens <= 0 and not extra:
             return
-        when = when or datetime.now(timezone.utc)
-        day = when.astimezone(timezone.utc).date().isoformat()
-        day_entry = self._tokens.setdefault(day, {})
-        day_entry[provider] = int(day_entry.get(provider, 0)) + tokens
-        self._tokens[day] = day_entry
-        self._save_tokens()
+        self._usage.record(
+            provider,
+            tokens,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            when=when,
+            **extra,
+        )
 
     def get_token_usage(self, date_str: Optional[str] = None, provider: Optional[str] = None) -> int:
         """Get token usage count.
@@ -150,7 +381,7 @@ class Config:
         """
         if not date_str:
             date_str = datetime.now(timezone.utc).date().isoformat()
-        day_entry = self._tokens.get(date_str, {})
+        day_entry = self._usage.daily_totals(date_str)
         if provider:
             return int(day_entry.get(provider, 0) or 0)
         return int(sum(int(v or 0) for v in day_entry.values()))
@@ -175,19 +406,21 @@ class Config:
         env = (zep_cfg.get('env') or os.getenv('ZEP_ENV') or 'cloud')
         return {'api_key': api_key, 'base_url': base_url, 'env': env}
 
+    @_synchronized
     def set_zep_settings(self, *, api_key: str = None, base_url: str = None, env: str = None):
         """Persist Zep settings. Pass only the fields to update."""
-        if 'zep' not in self._config:
-            self._config['zep'] = {}
-        if api_key is not None:
-            # Also mirror into generic api_keys for convenience
-            self.set_api_key('zep', api_key)
-            self._config['zep']['api_key'] = self._normalize_secret(api_key, source='set', provider='zep')
-        if base_url is not None:
-            self._config['zep']['base_url'] = base_url.strip()
-        if env is not None:
-            self._config['zep']['env'] = env.strip()
-        self._save_config()
+        with self.batch():
+            if 'zep' not in self._config:
+                self._config['zep'] = {}
+            if api_key is not None:
+                # Also mirror into generic api_keys for convenience
+                self.set_api_key('zep', api_key)
+                self._config['zep']['api_key'] = self._normalize_secret(api_key, source='set', provider='zep')
+            if base_url is not None:
+                self._config['zep']['base_url'] = base_url.strip()
+            if env is not None:
+                self._config['zep']['env'] = env.strip()
+            self._save_config()
 
     # ---------------- LEANN settings ----------------
     def get_leann_settings(self) -> dict:
@@ -200,6 +433,7 @@ class Config:
         index_dir = leann_cfg.get('index_dir') or os.getenv('LEANN_INDEX_DIR')
         return {'index_dir': index_dir}
 
+    @_synchronized
     def set_leann_settings(self, *, index_dir: str = None):
         """Persist LEANN settings. Pass only the fields to update."""
         if 'leann' not in self._config:
@@ -208,7 +442,254 @@ class Config:
             self._config['leann']['index_dir'] = index_dir.strip()
         self._save_config()
 
+    # ---------------- Thread compaction settings ----------------
+    def get_compaction_settings(self) -> dict:
+        """Return thread compaction settings merged over DEFAULT_COMPACTION_SETTINGS:
+        { provider, model, threshold_tokens, max_age_days, keep_last, auto }.
+        """
+        from ffmcp.compaction import DEFAULT_COMPACTION_SETTINGS
+        settings = dict(DEFAULT_COMPACTION_SETTINGS)
+        settings.update({k: v for k, v in self._config.get('compaction', {}).items() if k in settings})
+        return settings
+
+    @_synchronized
+    def set_compaction_settings(self, **settings):
+        """Persist compaction settings. Pass only the fields to update (None resets to default)."""
+        from ffmcp.compaction import DEFAULT_COMPACTION_SETTINGS
+        unknown = set(settings) - set(DEFAULT_COMPACTION_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown compaction setting(s): {', '.join(sorted(unknown))}")
+        compaction = self._config.setdefault('compaction', {})
+        for key, value in settings.items():
+            if value is None:
+                compaction.pop(key, None)
+            else:
+                compaction[key] = value
+        self._save_config()
+
+    # ---------------- HTTP connection pool settings ----------------
+    def get_http_settings(self, provider: Optional[str] = None) -> dict:
+        """Return HTTP pool settings merged over DEFAULT_HTTP_SETTINGS:
+        { max_connections, max_keepalive_connections, keepalive_expiry, timeout, http2, prewarm }.
+        Per-provider overrides (see set_http_settings) win over global ones.
+        """
+        from ffmcp.http_pool import DEFAULT_HTTP_SETTINGS
+        http = self._config.get('http', {})
+        settings = dict(DEFAULT_HTTP_SETTINGS)
+        settings.update({k: v for k, v in http.items() if k in settings})
+        if provider:
+            overrides = http.get('providers', {}).get(provider, {})
+            settings.update({k: v for k, v in overrides.items() if k in settings})
+        return settings
+
+    @_synchronized
+    def set_http_settings(self, provider: Optional[str] = None, **settings):
+        """Persist HTTP pool settings, globally or for one provider.
+        Pass only the fields to update (None resets to default)."""
+        from ffmcp.http_pool import DEFAULT_HTTP_SETTINGS
+        unknown = set(settings) - set(DEFAULT_HTTP_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown http setting(s): {', '.join(sorted(unknown))}")
+        http = self._config.setdefault('http', {})
+        target = http.setdefault('providers', {}).setdefault(provider, {}) if provider else http
+        for key, value in settings.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+        if provider and not target:
+            http['providers'].pop(provider, None)
+        if not http.get('providers'):
+            http.pop('providers', None)
+        self._save_config()
+
+    # ---------------- Retries and rate limits ----------------
+    def get_retry_settings(self, provider: Optional[str] = None) -> dict:
+        """Return retry settings merged over DEFAULT_RETRY_SETTINGS:
+        { max_retries, base_delay, max_delay }.
+        Per-provider overrides (see set_retry_settings) win over global ones.
+        """
+        from ffmcp.ratelimit import DEFAULT_RETRY_SETTINGS
+        retry = self._config.get('retry', {})
+        settings = dict(DEFAULT_RETRY_SETTINGS)
+        settings.update({k: v for k, v in retry.items() if k in settings})
+        if provider:
+            overrides = retry.get('providers', {}).get(provider, {})
+            settings.update({k: v for k, v in overrides.items() if k in settings})
+        return settings
+
+    @_synchronized
+    def set_retry_settings(self, provider: Optional[str] = None, **settings):
+        """Persist retry settings, globally or for one provider.
+        Pass only the fields to update (None resets to default)."""
+        from ffmcp.ratelimit import DEFAULT_RETRY_SETTINGS
+        unknown = set(settings) - set(DEFAULT_RETRY_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown retry setting(s): {', '.join(sorted(unknown))}")
+        retry = self._config.setdefault('retry', {})
+        target = retry.setdefault('providers', {}).setdefault(provider, {}) if provider else retry
+        for key, value in settings.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+        if provider and not target:
+            retry['providers'].pop(provider, None)
+        if not retry.get('providers'):
+            retry.pop('providers', None)
+        self._save_config()
+
+    def get_rate_limits(self) -> dict:
+        """Return configured client-side rate limits keyed by 'provider' or
+        'provider:model': { key: { rpm, tpm } }."""
+        return {key: dict(limits) for key, limits in self._config.get('rate_limits', {}).items()}
+
+    @_synchronized
+    def set_rate_limits(self, provider: str, model: Optional[str] = None, **limits):
+        """Set requests (rpm) / tokens (tpm) per minute for a provider or provider/model.
+        Pass only the fields to update (None removes the limit)."""
+        unknown = set(limits) - {'rpm', 'tpm'}
+        if unknown:
+            raise ValueError(f"unknown rate limit(s): {', '.join(sorted(unknown))}")
+        key = f'{provider}:{model}' if model else provider
+        all_limits = self._config.setdefault('rate_limits', {})
+        target = all_limits.setdefault(key, {})
+        for name, value in limits.items():
+            if value is None:
+                target.pop(name, None)
+            else:
+                if int(value) <= 0:
+                    raise ValueError(f'{name} must be a positive number')
+                target[name] = int(value)
+        if not target:
+            all_limits.pop(key, None)
+        if not all_limits:
+            self._config.pop('rate_limits', None)
+        self._save_config()
+
+    # ---------------- Routers ----------------
+    def list_routers(self) -> list:
+        routers = self._config.get('routers', {})
+        return [{'name': n, **v} for n, v in routers.items() if isinstance(v, dict)]
+
+    def get_router(self, name: str) -> dict:
+        """Return a router definition: { targets: [{provider, model, weight}], strategy, timeout, ... }"""
+        return self._config.get('routers', {}).get(name) or {}
+
+    @_synchronized
+    def set_router(self, name: str, *, targets: Optional[List[dict]] = None, **settings) -> dict:
+        """Create or update a router. Pass only the settings to change (None resets to default)."""
+        from ffmcp.routing import DEFAULT_ROUTER_SETTINGS, STRATEGIES
+        if not name or not name.strip():
+            raise ValueError('router name is required')
+        unknown = set(settings) - set(DEFAULT_ROUTER_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown router setting(s): {', '.join(sorted(unknown))}")
+        if settings.get('strategy') is not None and settings['strategy'] not in STRATEGIES:
+            raise ValueError(f"strategy must be one of: {', '.join(STRATEGIES)}")
+        routers = self._config.setdefault('routers', {})
+        router = dict(routers.get(name) or {})
+        if targets is not None:
+            router['targets'] = [dict(t) for t in targets]
+        if not router.get('targets'):
+            raise ValueError('a router needs at least one target')
+        for key, value in settings.items():
+            if value is None:
+                router.pop(key, None)
+            else:
+                router[key] = value
+        routers[name] = router
+        self._save_config()
+        return router
+
+    @_synchronized
+    def delete_router(self, name: str):
+        routers = self._config.get('routers', {})
+        if name in routers:
+            del routers[name]
+            self._save_config()
+
+    # ---------------- Response cache settings ----------------
+    def get_cache_settings(self) -> dict:
+        """Return response cache settings merged over DEFAULT_CACHE_SETTINGS:
+        { enabled, ttl_seconds, max_bytes }.
+        """
+        from ffmcp.response_cache import DEFAULT_CACHE_SETTINGS
+        settings = dict(DEFAULT_CACHE_SETTINGS)
+        settings.update({k: v for k, v in self._config.get('cache', {}).items() if k in settings})
+        return settings
+
+    @_synchronized
+    def set_cache_settings(self, **settings):
+        """Persist response cache settings. Pass only the fields to update (None resets to default)."""
+        from ffmcp.response_cache import DEFAULT_CACHE_SETTINGS
+        unknown = set(settings) - set(DEFAULT_CACHE_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown cache setting(s): {', '.join(sorted(unknown))}")
+        cache = self._config.setdefault('cache', {})
+        for key, value in settings.items():
+            if value is None:
+                cache.pop(key, None)
+            else:
+                cache[key] = value
+        self._save_config()
+
+    def get_semantic_cache_settings(self) -> dict:
+        """Return semantic cache settings merged over DEFAULT_SEMANTIC_CACHE_SETTINGS:
+        { enabled, provider, model, threshold, max_entries, ttl_seconds }.
+        """
+        from ffmcp.semantic_cache import DEFAULT_SEMANTIC_CACHE_SETTINGS
+        settings = dict(DEFAULT_SEMANTIC_CACHE_SETTINGS)
+        settings.update({k: v for k, v in self._config.get('semantic_cache', {}).items() if k in settings})
+        return settings
+
+    @_synchronized
+    def set_semantic_cache_settings(self, **settings):
+        """Persist semantic cache settings. Pass only the fields to update (None resets to default)."""
+        from ffmcp.semantic_cache import DEFAULT_SEMANTIC_CACHE_SETTINGS
+        unknown = set(settings) - set(DEFAULT_SEMANTIC_CACHE_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown semantic cache setting(s): {', '.join(sorted(unknown))}")
+        threshold = settings.get('threshold')
+        if threshold is not None and not 0.0 < float(threshold) <= 1.0:
+            raise ValueError('threshold must be in (0, 1]')
+        cache = self._config.setdefault('semantic_cache', {})
+        for key, value in settings.items():
+            if value is None:
+                cache.pop(key, None)
+            else:
+                cache[key] = value
+        self._save_config()
+
+    def get_prompt_cache_settings(self) -> dict:
+        """Return prompt-prefix cache settings merged over DEFAULT_PROMPT_CACHE_SETTINGS:
+        { enabled, min_tokens, gemini_min_tokens, gemini_ttl }.
+        """
+        from ffmcp.prompt_cache import DEFAULT_PROMPT_CACHE_SETTINGS
+        settings = dict(DEFAULT_PROMPT_CACHE_SETTINGS)
+        settings.update({k: v for k, v in self._config.get('prompt_cache', {}).items() if k in settings})
+        return settings
+
+    @_synchronized
+    def set_prompt_cache_settings(self, **settings):
+        """Persist prompt-prefix cache settings. Pass only the fields to update (None resets to default)."""
+        from ffmcp.prompt_cache import DEFAULT_PROMPT_CACHE_SETTINGS
+        unknown = set(settings) - set(DEFAULT_PROMPT_CACHE_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown prompt cache setting(s): {', '.join(sorted(unknown))}")
+        for key in ('min_tokens', 'gemini_min_tokens', 'gemini_ttl'):
+            if settings.get(key) is not None and int(settings[key]) <= 0:
+                raise ValueError(f'{key} must be positive')
+        cache = self._config.setdefault('prompt_cache', {})
+        for key, value in settings.items():
+            if value is None:
+                cache.pop(key, None)
+            else:
+                cache[key] = value
+        self._save_config()
+
     # ---------------- Brain registry ----------------
+    @_synchronized
     def list_brains(self) -> list:
         brains = self._config.get('brains', {})
         return [{'name': n, **({} if not isinstance(v, dict) else v)} for n, v in brains.items()]
@@ -220,6 +701,7 @@ class Config:
             brain['backend'] = 'zep'
         return brain
 
+    @_synchronized
     def create_brain(self, name: str, *, default_session_id: str = None, backend: str = "zep") -> dict:
         if not name or not name.strip():
             raise ValueError('brain name is required')
@@ -233,6 +715,7 @@ class Config:
         self._save_config()
         return brains[name]
 
+    @_synchronized
     def delete_brain(self, name: str):
         brains = self._config.get('brains', {})
         if name in brains:
@@ -241,6 +724,7 @@ class Config:
                 self._config['active_brain'] = None
             self._save_config()
 
+    @_synchronized
     def set_active_brain(self, name: Optional[str]):
         if name is not None:
             brains = self._config.get('brains', {})
@@ -253,6 +737,7 @@ class Config:
         return self._config.get('active_brain')
 
     # ---------------- Agent registry ----------------
+    @_synchronized
     def list_agents(self) -> list:
         agents = self._config.get('agents', {})
         return [
@@ -266,6 +751,7 @@ class Config:
     def get_agent(self, name: str) -> dict:
         return self._config.get('agents', {}).get(name) or {}
 
+    @_synchronized
     def create_agent(
         self,
         name: str,
@@ -304,6 +790,7 @@ class Config:
         self._save_config()
         return agent_def
 
+    @_synchronized
     def delete_agent(self, name: str):
         agents = self._config.get('agents', {})
         if name in agents:
@@ -312,6 +799,7 @@ class Config:
                 self._config['active_agent'] = None
             self._save_config()
 
+    @_synchronized
     def set_active_agent(self, name: Optional[str]):
         if name is not None:
             agents = self._config.get('agents', {})
@@ -323,6 +811,7 @@ class Config:
     def get_active_agent(self) -> Optional[str]:
         return self._config.get('active_agent')
 
+    @_synchronized
     def update_agent(self, name: str, updates: dict) -> dict:
         agents = self._config.setdefault('agents', {})
         if name not in agents:
@@ -335,6 +824,7 @@ class Config:
         self._save_config()
         return current
 
+    @_synchronized
     def set_agent_property(self, name: str, key: str, value):
         agents = self._config.setdefault('agents', {})
         if name not in agents:
@@ -343,6 +833,7 @@ class Config:
         props[key] = value
         self._save_config()
     
+    @_synchronized
     def set_agent_voice(self, name: str, voice_name: Optional[str]):
         """Set or remove voice for an agent"""
         agents = self._config.setdefault('agents', {})
@@ -365,6 +856,7 @@ class Config:
             raise ValueError(f'unknown agent: {name}')
         return agents[name].get('voice')
 
+    @_synchronized
     def remove_agent_property(self, name: str, key: str):
         agents = self._config.setdefault('agents', {})
         if name not in agents:
@@ -374,6 +866,7 @@ class Config:
             del props[key]
             self._save_config()
 
+    @_synchronized
     def enable_agent_action(self, name: str, action: str, config: Optional[dict] = None):
         agents = self._config.setdefault('agents', {})
         if name not in agents:
@@ -382,6 +875,7 @@ class Config:
         actions[action] = config if config is not None else {'enabled': True}
         self._save_config()
 
+    @_synchronized
     def disable_agent_action(self, name: str, action: str):
         agents = self._config.setdefault('agents', {})
         if name not in agents:
@@ -392,27 +886,40 @@ class Config:
             self._save_config()
 
     # ---------------- Thread management ----------------
-    def list_threads(self, agent_name: str) -> List[Dict[str, Any]]:
-        """List all threads for an agent"""
-        threads = self._config.get('threads', {}).get(agent_name, {})
+    @_synchronized
+    def _migrate_legacy_threads(self):
+        """Move threads stored inline in config.json into the thread store (one-shot)."""
+        if 'threads' not in self._config and 'chat_threads' not in self._config:
+            return
+        logger = logging.getLogger('ffmcp.config')
+        with self._threads.transaction():
+            for agent_name, agent_threads in (self._config.get('threads') or {}).items():
+                if agent_name:
+                    self._threads.import_legacy(agent_name, agent_threads)
+            self._threads.import_legacy(CHAT_SCOPE, self._config.get('chat_threads') or {})
+        self._config.pop('threads', None)
+        self._config.pop('chat_threads', None)
+        self._save_config()
+        logger.info("Migrated legacy threads from %s to %s", self.config_file, self.threads_db)
+
+    def list_threads(self, agent_name: str, *, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List threads for an agent (metadata only; messages are not read)"""
+        self._flush_pending_messages()
         active_thread = self.get_active_thread(agent_name)
         return [
-            {
-                'name': name,
-                'message_count': len(thread.get('messages', [])),
-                'created_at': thread.get('created_at'),
-                'active': name == active_thread,
-            }
-            for name, thread in threads.items()
+            {**thread, 'active': thread['name'] == active_thread}
+            for thread in self._threads.list_threads(agent_name, offset=offset, limit=limit)
         ]
 
     def get_thread(self, agent_name: str, thread_name: str) -> Dict:
         """Get thread data"""
-        threads = self._config.get('threads', {}).get(agent_name, {})
-        return threads.get(thread_name) or {}
+        self._flush_pending_messages()
+        return self._threads.get_thread(agent_name, thread_name)
 
+    @_synchronized
     def create_thread(self, agent_name: str, thread_name: str) -> Dict:
         """Create a new thread for an agent"""
+        self._flush_pending_messages()
         if not agent_name or not agent_name.strip():
             raise ValueError('agent name is required')
         if not thread_name or not thread_name.strip():
@@ -423,17 +930,7 @@ class Config:
         if agent_name not in agents:
             raise ValueError(f'unknown agent: {agent_name}')
         
-        threads = self._config.setdefault('threads', {})
-        agent_threads = threads.setdefault(agent_name, {})
-        
-        if thread_name in agent_threads:
-            raise ValueError(f'thread already exists: {thread_name}')
-        
-        thread_data = {
-            'messages': [],
-            'created_at': datetime.now(timezone.utc).isoformat(),
-        }
-        agent_threads[thread_name] = thread_data
+        thread_data = self._threads.create_thread(agent_name, thread_name)
         
         # Set as active thread for this agent
         active_threads = self._config.setdefault('active_threads', {})
@@ -442,19 +939,21 @@ class Config:
         self._save_config()
         return thread_data
 
+    @_synchronized
     def delete_thread(self, agent_name: str, thread_name: str):
         """Delete a thread"""
-        threads = self._config.get('threads', {}).get(agent_name, {})
-        if thread_name in threads:
-            del threads[thread_name]
+        self._flush_pending_messages()
+        if self._threads.delete_thread(agent_name, thread_name):
             # If this was the active thread, clear it
             active_threads = self._config.get('active_threads', {})
             if active_threads.get(agent_name) == thread_name:
                 del active_threads[agent_name]
-            self._save_config()
+                self._save_config()
 
+    @_synchronized
     def set_active_thread(self, agent_name: str, thread_name: Optional[str]):
         """Set active thread for an agent"""
+        self._flush_pending_messages()
         if not agent_name or not agent_name.strip():
             raise ValueError('agent name is required')
         
@@ -465,8 +964,7 @@ class Config:
         
         if thread_name is not None:
             # Verify thread exists
-            threads = self._config.get('threads', {}).get(agent_name, {})
-            if thread_name not in threads:
+            if not self._threads.has_thread(agent_name, thread_name):
                 raise ValueError(f'unknown thread: {thread_name}')
         
         active_threads = self._config.setdefault('active_threads', {})
@@ -480,45 +978,49 @@ class Config:
 
     def clear_thread(self, agent_name: str, thread_name: str):
         """Clear all messages from a thread"""
-        threads = self._config.get('threads', {}).get(agent_name, {})
-        if thread_name not in threads:
-            raise ValueError(f'unknown thread: {thread_name}')
-        threads[thread_name]['messages'] = []
-        self._save_config()
+        self._flush_pending_messages()
+        self._threads.clear_thread(agent_name, thread_name)
 
     def add_thread_message(self, agent_name: str, thread_name: str, role: str, content: str):
-        """Add a message to a thread"""
-        threads = self._config.setdefault('threads', {})
-        agent_threads = threads.setdefault(agent_name, {})
-        
-        if thread_name not in agent_threads:
-            # Auto-create thread if it doesn't exist
-            agent_threads[thread_name] = {
-                'messages': [],
-                'created_at': datetime.now(timezone.utc).isoformat(),
-            }
-        
-        agent_threads[thread_name]['messages'].append({
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-        })
-        self._save_config()
+        """Add a message to a thread (the thread is auto-created if missing)"""
+        self._append_thread_messages(agent_name, thread_name, [{'role': role, 'content': content}])
 
-    def get_thread_messages(self, agent_name: str, thread_name: Optional[str] = None) -> List[Dict[str, str]]:
-        """Get messages from a thread. If thread_name is None, uses active thread."""
+    def get_thread_messages(
+        self,
+        agent_name: str,
+        thread_name: Optional[str] = None,
+        *,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        last: Optional[int] = None,
+        since: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """Get messages from a thread. If thread_name is None, uses active thread.
+
+        - offset/limit: page from the start of the thread
+        - last: only the newest N messages
+        - since: only messages added after this ISO timestamp
+        """
+        self._flush_pending_messages()
         if thread_name is None:
             thread_name = self.get_active_thread(agent_name)
             if not thread_name:
                 return []
         
-        thread = self.get_thread(agent_name, thread_name)
-        messages = thread.get('messages', [])
-        # Return in format expected by chat API (role, content)
-        return [
-            {'role': msg.get('role'), 'content': msg.get('content', '')}
-            for msg in messages
-        ]
+        # Returned in the format expected by chat APIs (role, content)
+        return self._threads.get_messages(
+            agent_name, thread_name, offset=offset, limit=limit, last=last, since=since, timestamps=False,
+        )
+
+    def get_recent_thread_messages(self, agent_name: str, thread_name: str, token_budget: int) -> List[Dict[str, str]]:
+        """Get the newest messages of a thread that fit in token_budget (oldest first)"""
+        self._flush_pending_messages()
+        return self._threads.get_recent_messages(agent_name, thread_name, token_budget)
+
+    def get_thread_info(self, agent_name: str, thread_name: str) -> Dict[str, Any]:
+        """Get thread metadata (created_at, updated_at, message_count) without its messages"""
+        self._flush_pending_messages()
+        return self._threads.thread_info(agent_name, thread_name)
 
     def save_thread_messages(self, agent_name: str, thread_name: Optional[str], messages: List[Dict[str, str]]):
         """Save messages to a thread. If thread_name is None, uses active thread."""
@@ -529,59 +1031,126 @@ class Config:
                 thread_name = 'default'
                 self.create_thread(agent_name, thread_name)
         
-        threads = self._config.setdefault('threads', {})
-        agent_threads = threads.setdefault(agent_name, {})
-        
-        if thread_name not in agent_threads:
-            agent_threads[thread_name] = {
-                'messages': [],
-                'created_at': datetime.now(timezone.utc).isoformat(),
-            }
-        
         # Convert messages to thread format and append
-        for msg in messages:
-            agent_threads[thread_name]['messages'].append({
-                'role': msg.get('role'),
-                'content': msg.get('content', ''),
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-            })
-        self._save_config()
+        self._append_thread_messages(
+            agent_name,
+            thread_name,
+            [{'role': msg.get('role'), 'content': msg.get('content', '')} for msg in messages],
+        )
+
+    def compact_thread(
+        self,
+        agent_name: str,
+        thread_name: Optional[str] = None,
+        *,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        keep_last: Optional[int] = None,
+        max_chunks: Optional[int] = None,
+    ) -> int:
+        """Fold older messages of an agent thread into its summary (see ffmcp.compaction).
+
+        The summarizer defaults to the compaction settings, then the agent's provider.
+        Returns the number of messages folded.
+        """
+        thread_name = thread_name or self.get_active_thread(agent_name)
+        if not thread_name:
+            raise ValueError(f"no active thread for agent '{agent_name}'")
+        agent_provider = (self.get_agent(agent_name) or {}).get('provider') or 'openai'
+        return self._compact(
+            agent_name, thread_name, provider=provider, model=model, keep_last=keep_last,
+            max_chunks=max_chunks, default_provider=agent_provider,
+        )
+
+    def maybe_compact_thread(self, agent_name: str, thread_name: str, *, default_provider: Optional[str] = None) -> int:
+        """Compact an agent thread if auto compaction is on and it is over threshold."""
+        return self._maybe_compact(agent_name, thread_name, default_provider=default_provider or 'openai')
+
+    def _compact(
+        self,
+        agent_key: str,
+        thread_name: str,
+        *,
+        provider: Optional[str],
+        model: Optional[str],
+        keep_last: Optional[int],
+        max_chunks: Optional[int],
+        default_provider: str,
+    ) -> int:
+        from ffmcp.compaction import compact_thread
+        from ffmcp.providers import get_provider
+        self._flush_pending_messages()
+        settings = self.get_compaction_settings()
+        provider_name = provider or settings['provider'] or default_provider
+        if not model and provider_name == settings['provider']:
+            model = settings['model']
+        summarizer = get_provider(provider_name, self)
+        params = {'model': model} if model else {}
+        return compact_thread(
+            self._threads,
+            agent_key,
+            thread_name,
+            lambda messages: summarizer.chat(messages, **params),
+            keep_last=settings['keep_last'] if keep_last is None else keep_last,
+            max_chunks=max_chunks,
+        )
+
+    def _maybe_compact(self, agent_key: str, thread_name: str, *, default_provider: str) -> int:
+        from ffmcp.compaction import AUTO_MAX_CHUNKS, needs_compaction
+        settings = self.get_compaction_settings()
+        if not settings['auto']:
+            return 0
+        self._flush_pending_messages()
+        if not needs_compaction(self._threads.thread_info(agent_key, thread_name), settings):
+            return 0
+        try:
+            return self._compact(
+                agent_key, thread_name, provider=None, model=None, keep_last=None,
+                max_chunks=AUTO_MAX_CHUNKS, default_provider=default_provider,
+            )
+        except Exception as e:
+            # The turn itself succeeded; the next one will retry
+            logging.getLogger('ffmcp.config').warning("Automatic compaction of thread %s failed: %s", thread_name, e)
+            return 0
+
+    def search_threads(
+        self, query: str, *, agent_name: Optional[str] = None, chat_only: bool = False, limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Full-text search over chat and agent thread messages, best matches first.
+
+        - agent_name: only that agent's threads; chat_only: only chat threads
+        Each hit: { agent (None for chat threads), thread, seq, role, timestamp, snippet, score }
+        """
+        self._flush_pending_messages()
+        scope = CHAT_SCOPE if chat_only else agent_name
+        hits = self._threads.search(query, agent=scope, limit=limit)
+        for hit in hits:
+            hit['agent'] = hit['agent'] or None
+        return hits
 
     # ---------------- Chat thread management (not tied to agents) ----------------
-    def list_chat_threads(self) -> List[Dict[str, Any]]:
-        """List all chat threads"""
-        threads = self._config.get('chat_threads', {})
+    def list_chat_threads(self, *, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List chat threads (metadata only; messages are not read)"""
+        self._flush_pending_messages()
         active_thread = self._config.get('active_chat_thread')
         return [
-            {
-                'name': name,
-                'message_count': len(thread.get('messages', [])),
-                'created_at': thread.get('created_at'),
-                'active': name == active_thread,
-            }
-            for name, thread in threads.items()
+            {**thread, 'active': thread['name'] == active_thread}
+            for thread in self._threads.list_threads(CHAT_SCOPE, offset=offset, limit=limit)
         ]
 
     def get_chat_thread(self, thread_name: str) -> Dict:
         """Get chat thread data"""
-        threads = self._config.get('chat_threads', {})
-        return threads.get(thread_name) or {}
+        self._flush_pending_messages()
+        return self._threads.get_thread(CHAT_SCOPE, thread_name)
 
+    @_synchronized
     def create_chat_thread(self, thread_name: str) -> Dict:
         """Create a new chat thread"""
+        self._flush_pending_messages()
         if not thread_name or not thread_name.strip():
             raise ValueError('thread name is required')
         
-        threads = self._config.setdefault('chat_threads', {})
-        
-        if thread_name in threads:
-            raise ValueError(f'thread already exists: {thread_name}')
-        
-        thread_data = {
-            'messages': [],
-            'created_at': datetime.now(timezone.utc).isoformat(),
-        }
-        threads[thread_name] = thread_data
+        thread_data = self._threads.create_thread(CHAT_SCOPE, thread_name)
         
         # Set as active chat thread
         self._config['active_chat_thread'] = thread_name
@@ -589,22 +1158,23 @@ class Config:
         self._save_config()
         return thread_data
 
+    @_synchronized
     def delete_chat_thread(self, thread_name: str):
         """Delete a chat thread"""
-        threads = self._config.get('chat_threads', {})
-        if thread_name in threads:
-            del threads[thread_name]
+        self._flush_pending_messages()
+        if self._threads.delete_thread(CHAT_SCOPE, thread_name):
             # If this was the active thread, clear it
             if self._config.get('active_chat_thread') == thread_name:
                 self._config['active_chat_thread'] = None
-            self._save_config()
+                self._save_config()
 
+    @_synchronized
     def set_active_chat_thread(self, thread_name: Optional[str]):
         """Set active chat thread"""
+        self._flush_pending_messages()
         if thread_name is not None:
             # Verify thread exists
-            threads = self._config.get('chat_threads', {})
-            if thread_name not in threads:
+            if not self._threads.has_thread(CHAT_SCOPE, thread_name):
                 raise ValueError(f'unknown thread: {thread_name}')
         
         self._config['active_chat_thread'] = thread_name
@@ -616,46 +1186,164 @@ class Config:
 
     def clear_chat_thread(self, thread_name: str):
         """Clear all messages from a chat thread"""
-        threads = self._config.get('chat_threads', {})
-        if thread_name not in threads:
-            raise ValueError(f'unknown thread: {thread_name}')
-        threads[thread_name]['messages'] = []
-        self._save_config()
+        self._flush_pending_messages()
+        self._threads.clear_thread(CHAT_SCOPE, thread_name)
 
     def add_chat_thread_message(self, thread_name: str, role: str, content: str):
-        """Add a message to a chat thread"""
-        threads = self._config.setdefault('chat_threads', {})
-        
-        if thread_name not in threads:
-            # Auto-create thread if it doesn't exist
-            threads[thread_name] = {
-                'messages': [],
-                'created_at': datetime.now(timezone.utc).isoformat(),
-            }
-        
-        threads[thread_name]['messages'].append({
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-        })
-        self._save_config()
+        """Add a message to a chat thread (the thread is auto-created if missing)"""
+        self._append_thread_messages(CHAT_SCOPE, thread_name, [{'role': role, 'content': content}])
 
-    def get_chat_thread_messages(self, thread_name: Optional[str] = None) -> List[Dict[str, str]]:
-        """Get messages from a chat thread. If thread_name is None, uses active thread."""
+    def get_chat_thread_messages(
+        self,
+        thread_name: Optional[str] = None,
+        *,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        last: Optional[int] = None,
+        since: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """Get messages from a chat thread. If thread_name is None, uses active thread.
+
+        Accepts the same paging options as get_thread_messages().
+        """
+        self._flush_pending_messages()
         if thread_name is None:
             thread_name = self.get_active_chat_thread()
             if not thread_name:
                 return []
         
-        thread = self.get_chat_thread(thread_name)
-        messages = thread.get('messages', [])
-        # Return in format expected by chat API (role, content)
-        return [
-            {'role': msg.get('role'), 'content': msg.get('content', '')}
-            for msg in messages
-        ]
+        # Returned in the format expected by chat APIs (role, content)
+        return self._threads.get_messages(
+            CHAT_SCOPE, thread_name, offset=offset, limit=limit, last=last, since=since, timestamps=False,
+        )
+
+    def get_recent_chat_thread_messages(self, thread_name: str, token_budget: int) -> List[Dict[str, str]]:
+        """Get the newest messages of a chat thread that fit in token_budget (oldest first)"""
+        self._flush_pending_messages()
+        return self._threads.get_recent_messages(CHAT_SCOPE, thread_name, token_budget)
+
+    def get_chat_thread_info(self, thread_name: str) -> Dict[str, Any]:
+        """Get chat thread metadata (created_at, updated_at, message_count) without its messages"""
+        self._flush_pending_messages()
+        return self._threads.thread_info(CHAT_SCOPE, thread_name)
+
+    def compact_chat_thread(
+        self,
+        thread_name: Optional[str] = None,
+        *,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        keep_last: Optional[int] = None,
+        max_chunks: Optional[int] = None,
+        default_provider: str = 'openai',
+    ) -> int:
+        """Fold older messages of a chat thread into its summary. Returns the number folded."""
+        thread_name = thread_name or self.get_active_chat_thread()
+        if not thread_name:
+            raise ValueError('no active chat thread')
+        return self._compact(
+            CHAT_SCOPE, thread_name, provider=provider, model=model, keep_last=keep_last,
+            max_chunks=max_chunks, default_provider=default_provider,
+        )
+
+    def maybe_compact_chat_thread(self, thread_name: str, *, default_provider: str = 'openai') -> int:
+        """Compact a chat thread if auto compaction is on and it is over threshold."""
+        return self._maybe_compact(CHAT_SCOPE, thread_name, default_provider=default_provider)
+
+    # ---------------- Export / import ----------------
+    # record type -> config section, for the settings exported as whole entries
+    EXPORT_SECTIONS = {'agent': 'agents', 'team': 'teams', 'voice': 'voices', 'brain': 'brains'}
+    EXPORT_KINDS = ('agents', 'teams', 'voices', 'brains', 'threads')
+
+    def iter_export_records(self, *, kinds: Optional[Iterable[str]] = None, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield export records (one dict per NDJSON line), streaming threads from the store.
+
+        - kinds: subset of EXPORT_KINDS (default: all)
+        - since: ISO timestamp; only threads updated and messages added after it
+          (agents, teams, voices and brains are always exported in full)
+
+        Record types: agent/team/voice/brain {name, data}; thread {agent,
+        name, created_at, summary, summary_seq}, followed by that thread's
+        message {agent, thread, seq, role, content, timestamp} records.
+        API keys are never exported.
+        """
+        kinds = set(kinds or self.EXPORT_KINDS)
+        unknown = kinds - set(self.EXPORT_KINDS)
+        if unknown:
+            raise ValueError(f"unknown export kind(s): {', '.join(sorted(unknown))}")
+        self._flush_pending_messages()
+        for record_type, section in self.EXPORT_SECTIONS.items():
+            if section in kinds:
+                for name, data in list(self._config.get(section, {}).items()):
+                    yield {'type': record_type, 'name': name, 'data': data}
+        if 'threads' not in kinds:
+            return
+        for thread in self._threads.iter_threads(since=since):
+            agent_name = thread['agent'] or None
+            yield {
+                'type': 'thread',
+                'agent': agent_name,
+                'name': thread['name'],
+                'created_at': thread['created_at'],
+                'summary': thread['summary'],
+                'summary_seq': thread['summary_seq'],
+            }
+            for msg in self._threads.iter_messages(thread['agent'], thread['name'], since=since):
+                yield {'type': 'message', 'agent': agent_name, 'thread': thread['name'], **msg}
+
+    def import_records(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Import records produced by iter_export_records().
+
+        Agents, teams, voices and brains are upserted and each settings file
+        is saved once; all thread data is written in one thread-store
+        transaction (rolled back if a record fails). Messages a thread
+        already has (by seq) are skipped, so re-importing is safe.
+        Returns counts per record type.
+        """
+        counts = {t: 0 for t in (*self.EXPORT_SECTIONS, 'thread', 'message')}
+        run_key, run = None, []
+
+        def flush_messages():
+            if run:
+                counts['message'] += self._threads.import_messages(run_key[0], run_key[1], run)
+                run.clear()
+
+        with self._lock, self.batch():
+            self._flush_pending_messages()
+            with self._threads.transaction():
+                for record in records:
+                    record_type = record.get('type')
+                    if record_type in self.EXPORT_SECTIONS:
+                        if not record.get('name') or not isinstance(record.get('data'), dict):
+                            raise ValueError(f'invalid {record_type} record: name and data are required')
+                        self._config.setdefault(self.EXPORT_SECTIONS[record_type], {})[record['name']] = record['data']
+                        self._save_config()
+                    elif record_type == 'thread':
+                        flush_messages()
+                        self._threads.import_thread(
+                            record.get('agent') or CHAT_SCOPE,
+                            record['name'],
+                            created_at=record.get('created_at'),
+                            summary=record.get('summary'),
+                            summary_seq=int(record.get('summary_seq') or 0),
+                        )
+                    elif record_type == 'message':
+                        key = (record.get('agent') or CHAT_SCOPE, record['thread'])
+                        if key != run_key:
+                            flush_messages()
+                            run_key = key
+                        run.append(record)
+                        if len(run) >= self._threads.PAGE_SIZE:
+                            flush_messages()
+                        continue
+                    else:
+                        raise ValueError(f'unknown record type: {record_type}')
+                    counts[record_type] += 1
+                flush_messages()
+        return counts
 
     # ---------------- Voiceover/Voice management ----------------
+    @_synchronized
     def list_voices(self) -> List[Dict[str, Any]]:
         """List all saved voice configurations"""
         voices = self._config.get('voices', {})
@@ -672,6 +1360,7 @@ class Config:
         voices = self._config.get('voices', {})
         return voices.get(name)
 
+    @_synchronized
     def create_voice(
         self,
         name: str,
@@ -749,6 +1438,7 @@ class Config:
         self._save_config()
         return voice_config
 
+    @_synchronized
     def update_voice(self, name: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Update a voice configuration"""
         voices = self._config.setdefault('voices', {})
@@ -765,6 +1455,7 @@ class Config:
         self._save_config()
         return current
 
+    @_synchronized
     def delete_voice(self, name: str):
         """Delete a voice configuration"""
         voices = self._config.get('voices', {})
@@ -780,6 +1471,7 @@ class Config:
             raise ValueError(f'unknown voice: {name}')
 
     # ---------------- Team management ----------------
+    @_synchronized
     def list_teams(self) -> List[Dict[str, Any]]:
         """List all teams"""
         teams = self._config.get('teams', {})
@@ -796,6 +1488,7 @@ class Config:
         teams = self._config.get('teams', {})
         return teams.get(name)
 
+    @_synchronized
     def create_team(
         self,
         name: str,
@@ -868,6 +1561,7 @@ class Config:
         self._save_config()
         return team_data
 
+    @_synchronized
     def delete_team(self, name: str):
         """Delete a team"""
         teams = self._config.get('teams', {})
@@ -879,6 +1573,7 @@ class Config:
         else:
             raise ValueError(f'unknown team: {name}')
 
+    @_synchronized
     def set_active_team(self, name: Optional[str]):
         """Set active team"""
         if name is not None:
@@ -892,6 +1587,7 @@ class Config:
         """Get active team name"""
         return self._config.get('active_team')
 
+    @_synchronized
     def update_team(self, name: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Update a team"""
         teams = self._config.setdefault('teams', {})
@@ -959,6 +1655,7 @@ class Config:
         self._save_config()
         return current
 
+    @_synchronized
     def add_member_to_team(self, team_name: str, agent_name: str):
         """Add an agent as a member to a team"""
         teams = self._config.setdefault('teams', {})
@@ -980,6 +1677,7 @@ class Config:
         team['members'] = members
         self._save_config()
 
+    @_synchronized
     def remove_member_from_team(self, team_name: str, agent_name: str):
         """Remove an agent member from a team"""
         teams = self._config.get('teams', {})
@@ -997,6 +1695,7 @@ class Config:
         
         self._save_config()
     
+    @_synchronized
     def add_sub_team_to_team(self, team_name: str, sub_team_name: str):
         """Add a sub-team to a team"""
         teams = self._config.setdefault('teams', {})
@@ -1021,6 +1720,7 @@ class Config:
         
         self._save_config()
     
+    @_synchronized
     def remove_sub_team_from_team(self, team_name: str, sub_team_name: str):
         """Remove a sub-team from a team"""
         teams = self._config.get('teams', {})
@@ -0,0 +1,77 @@
+"""Token-budgeted prompt assembly for threaded chats and agents"""
+from typing import Any, Callable, Dict, List, Optional
+
+from ffmcp.tokenizer import CHARS_PER_TOKEN, MESSAGE_OVERHEAD, TokenCounter, estimate_tokens
+
+
+# Prompt budget (input tokens) used when nothing is configured
+DEFAULT_CONTEXT_BUDGET = 8000
+# Largest share of the budget memory context may take
+MEMORY_SHARE = 0.25
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text so its estimated token count is at most max_tokens."""
+    if max_tokens <= 0:
+        return ''
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def build_context(
+    *,
+    budget: int,
+    system: Optional[List[str]] = None,
+    memory: Optional[str] = None,
+    summary: Optional[str] = None,
+    load_history: Optional[Callable[[int], List[Dict[str, Any]]]] = None,
+    tail: Optional[List[Dict[str, Any]]] = None,
+    counter: Optional[TokenCounter] = None,
+) -> List[Dict[str, Any]]:
+    """Pack a chat prompt into roughly ``budget`` input tokens.
+
+    Parts, in priority order:
+    - system: instruction texts, always kept in full
+    - tail: the messages for this turn (user input etc.), always kept
+    - memory: read-only memory context, truncated to MEMORY_SHARE of the budget
+    - summary: rolling summary of older turns (see thread compaction)
+    - load_history(tokens): returns the most recent turns fitting in tokens
+
+    Messages are ordered system, memory, summary, history, tail: most
+    stable first, so that consecutive prompts share the longest possible
+    prefix for provider prompt caching (see ffmcp.prompt_cache). The budget
+    can only be exceeded by the parts that are always kept. Tokens are
+    counted with `counter`, the model's TokenCounter (see
+    ffmcp.tokenizer.token_counter), or the model-agnostic estimate.
+    """
+    counter = counter or TokenCounter()
+    system_msgs = [{'role': 'system', 'content': text} for text in (system or []) if text]
+    tail = list(tail or [])
+    remaining = budget - counter.messages(system_msgs) - counter.messages(tail)
+
+    memory_msgs: List[Dict[str, Any]] = []
+    if memory and remaining > MESSAGE_OVERHEAD:
+        prefix = 'Memory context (read-only): '
+        allowed = min(int(budget * MEMORY_SHARE), remaining) - MESSAGE_OVERHEAD - counter.count(prefix)
+        memory = counter.truncate(memory, allowed)
+        if memory:
+            memory_msgs.append({'role': 'system', 'content': prefix + memory})
+            remaining -= counter.message(memory_msgs[0])
+
+    summary_msgs: List[Dict[str, Any]] = []
+    if summary and remaining > MESSAGE_OVERHEAD:
+        msg = {'role': 'system', 'content': f'Summary of the earlier conversation: {summary}'}
+        if counter.message(msg) <= remaining:
+            summary_msgs.append(msg)
+            remaining -= counter.message(msg)
+
+    history: List[Dict[str, Any]] = []
+    if load_history and remaining > 0:
+        history = load_history(remaining)
+        # Histories are loaded by their stored estimates; recount and drop the oldest turns that do not fit
+        used = counter.messages(history)
+        while history and used > remaining:
+            used -= counter.message(history.pop(0))
+
+    return system_msgs + memory_msgs + summary_msgs + history + tail
@@ -0,0 +1,343 @@
+"""Hedged requests: race a slow request against a second provider/model
+
+A hedged request goes to its primary target first. If no answer (or, for
+a stream, no first chunk) arrives within a deadline, the same request is
+also sent to a backup target; whichever answers first wins and the other
+request is cancelled. A primary that fails before the deadline is
+hedged right away.
+
+The deadline is a percentile (p95 by default) of the primary target's
+recent latencies, as tracked for routing (see ffmcp.routing), so only
+the slowest few percent of requests pay for a second call. Until a
+target has MIN_SAMPLES latencies, FALLBACK_DELAY is used.
+
+When the backup was sent, both sides are recorded in the usage ledger:
+provider usage records carry `hedge: primary|backup`, and each side gets
+an outcome record (`hedge_outcome: won|cancelled|failed|lost`). A
+cancelled request records an estimate of its prompt tokens
+(estimated_prompt_tokens, not added to the token totals), as providers
+may bill input they already processed. Providers without a native async
+client run in a worker thread, which cannot be interrupted: their
+cancelled call finishes in the background and records its own usage.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from ffmcp.routing import DEFAULT_ROUTER_SETTINGS, health_tracker, target_key
+from ffmcp.tokenizer import estimate_tokens, messages_tokens
+from ffmcp.usage_ledger import usage_tags
+
+
+DEFAULT_PERCENTILE = 0.95
+# Latencies a target needs before its percentile is trusted
+MIN_SAMPLES = 5
+# Deadline (seconds) while there are fewer samples
+FALLBACK_DELAY = 2.0
+MIN_DELAY = 0.05
+
+logger = logging.getLogger('ffmcp.hedging')
+
+_DONE = object()
+
+
+class _Failure:
+    """An error raised by a stream after its first chunk."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def parse_hedge(spec: str) -> Tuple[str, Optional[str]]:
+    """Parse 'provider[:model]' (or 'router:NAME') into (provider, model or None)."""
+    spec = (spec or '').strip()
+    if not spec:
+        raise ValueError('empty hedge target (expected provider[:model])')
+    if spec.startswith('router:'):
+        return spec, None
+    provider, _, model = spec.partition(':')
+    if not provider:
+        raise ValueError(f'invalid hedge target {spec!r} (expected provider[:model])')
+    return provider, model or None
+
+
+def hedge_delay(config, provider: str, model: Optional[str], percentile: float = DEFAULT_PERCENTILE) -> float:
+    """Seconds to wait for a target before hedging: a percentile of its recent latencies."""
+    stats = health_tracker(config).get(target_key(provider, model))
+    if len(stats.recent) < MIN_SAMPLES:
+        return FALLBACK_DELAY
+    return max(MIN_DELAY, stats.percentile(percentile))
+
+
+class _Attempt:
+    """One side of a hedged request."""
+
+    def __init__(self, role: str, provider, model: str, params: Dict[str, Any]):
+        self.role = role
+        self.provider = provider
+        self.name = provider.get_provider_name()
+        self.model = model
+        self.params = dict(params, model=model)
+        self.key = target_key(self.name, model)
+        self.started = 0.0
+        self.ready: Optional[asyncio.Future] = None
+        self.task: Optional[asyncio.Task] = None
+        self.queue: Optional[asyncio.Queue] = None
+        # Set before the task is cancelled: whatever it raises from then on is the cancellation
+        self.cancelled = False
+
+
+class Hedge:
+    """Sends a request to a primary target and, if it is slow, also to a backup.
+
+    `primary` and `backup` are provider instances; `model` and `backup_model`
+    default to the providers' default models. `delay` fixes the deadline in
+    seconds instead of deriving it from `percentile`.
+    """
+
+    def __init__(
+        self,
+        config,
+        primary,
+        backup,
+        *,
+        model: Optional[str] = None,
+        backup_model: Optional[str] = None,
+        percentile: float = DEFAULT_PERCENTILE,
+        delay: Optional[float] = None,
+    ):
+        if not 0 < percentile <= 1:
+            raise ValueError('hedge percentile must be in (0, 1]')
+        self.config = config
+        self.primary = primary
+        self.backup = backup
+        self.model = model or primary.get_default_model()
+        self.backup_model = backup_model or backup.get_default_model()
+        self.percentile = percentile
+        self.delay = delay
+        self.tracker = health_tracker(config)
+        # Set by each request: whether the backup was sent, and which side answered
+        self.hedged = False
+        self.winner: Optional[_Attempt] = None
+
+    def deadline(self) -> float:
+        if self.delay is not None:
+            return max(0.0, float(self.delay))
+        return hedge_delay(self.config, self.primary.get_provider_name(), self.model, self.percentile)
+
+    @property
+    def provider_name(self) -> str:
+        """Provider that answered the last request."""
+        return self.winner.name if self.winner else self.primary.get_provider_name()
+
+    @property
+    def model_name(self) -> str:
+        """Model that answered the last request."""
+        return self.winner.model if self.winner else self.model
+
+    # ---------------- Racing ----------------
+    def _attempts(self, params: Dict[str, Any]) -> List[_Attempt]:
+        params = {k: v for k, v in params.items() if k != 'model'}
+        return [
+            _Attempt('primary', self.primary, self.model, params),
+            _Attempt('backup', self.backup, self.backup_model, params),
+        ]
+
+    async def _run(self, attempt: _Attempt, run):
+        with usage_tags(hedge=attempt.role):
+            try:
+                await run(attempt)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt.cancelled:
+                    # E.g. a stream torn down mid-chunk: still a cancelled request
+                    return
+                if not attempt.ready.done():
+                    attempt.ready.set_exception(e)
+                else:
+                    attempt.queue.put_nowait(_Failure(e))
+
+    async def _race(self, attempts: List[_Attempt], run, cost: int) -> _Attempt:
+        """Start the primary, the backup once the deadline passes; return the first ready side.
+
+        run(attempt) does the request and resolves attempt.ready when the
+        answer (or first chunk) is there. Sides that are still running are
+        cancelled, except the winner, whose stream may still be going.
+        """
+        loop = asyncio.get_running_loop()
+        primary, backup = attempts
+        launched: List[_Attempt] = []
+
+        def launch(attempt: _Attempt):
+            attempt.ready = loop.create_future()
+            attempt.queue = asyncio.Queue()
+            attempt.started = time.monotonic()
+            attempt.task = asyncio.ensure_future(self._run(attempt, run))
+            launched.append(attempt)
+
+        self.hedged = False
+        self.winner = None
+        delay = self.deadline()
+        launch(primary)
+        waiting = {primary.ready: primary}
+        errors: List[BaseException] = []
+        winner: Optional[_Attempt] = None
+        try:
+            while waiting and winner is None:
+                done, _ = await asyncio.wait(
+                    list(waiting), timeout=None if self.hedged else delay, return_when=asyncio.FIRST_COMPLETED,
+                )
+                for future in done:
+                    attempt = waiting.pop(future)
+                    if future.exception() is not None:
+                        self._failed(attempt, future.exception())
+                        errors.append(future.exception())
+                    elif winner is None:
+                        winner = attempt
+                if winner is None and not self.hedged:
+                    if done:
+                        logger.info("hedge: %s failed, sending to %s", primary.key, backup.key)
+                    else:
+                        logger.info("hedge: no answer from %s in %.2fs, also sending to %s", primary.key, delay, backup.key)
+                    self.hedged = True
+                    launch(backup)
+                    waiting[backup.ready] = backup
+            if winner is None:
+                raise errors[0]
+            self.winner = winner
+            self.tracker.record_success(winner.key, time.monotonic() - winner.started)
+            if self.hedged:
+                self._outcome(winner, 'won', latency_ms=round((time.monotonic() - winner.started) * 1000))
+            return winner
+        finally:
+            losers = [a for a in launched if a is not winner]
+            running = [a for a in losers if not a.task.done()]
+            for attempt in running:
+                attempt.cancelled = True
+                attempt.task.cancel()
+            if running:
+                await asyncio.gather(*(a.task for a in running), return_exceptions=True)
+            for attempt in losers if self.hedged else []:
+                if attempt in running and not (attempt.ready.done() and not attempt.ready.cancelled()):
+                    # Still waiting for its answer: a lower bound of its latency, which keeps
+                    # the percentile deadline from drifting down as slow requests get cut short
+                    self.tracker.record_success(attempt.key, time.monotonic() - attempt.started)
+                    self._outcome(attempt, 'cancelled', estimated_prompt_tokens=cost)
+                elif attempt.ready.done() and not attempt.ready.cancelled() and attempt.ready.exception() is None:
+                    # Answered too, just later (its usage is recorded by the provider)
+                    self._outcome(attempt, 'lost')
+
+    def _failed(self, attempt: _Attempt, exc: BaseException):
+        from ffmcp.providers.router_provider import counts_against_target
+        if counts_against_target(exc):
+            self.tracker.record_failure(attempt.key, DEFAULT_ROUTER_SETTINGS)
+        logger.info("hedge: %s %s failed (%s: %s)", attempt.role, attempt.key, type(exc).__name__, exc)
+        self._outcome(attempt, 'failed', error=type(exc).__name__)
+
+    def _outcome(self, attempt: _Attempt, outcome: str, tokens: int = 0, **fields):
+        # Best effort, like all usage recording
+        try:
+            self.config.add_token_usage(
+                attempt.name, tokens, model=attempt.model, hedge=attempt.role, hedge_outcome=outcome, **fields,
+            )
+        except Exception as e:
+            logger.debug("could not record hedge outcome: %s", e)
+
+    # ---------------- Provider-like API ----------------
+    async def achat(self, messages: List[Dict[str, str]], **params) -> str:
+        """Chat, hedged: the first complete answer wins."""
+        async def run(attempt: _Attempt):
+            attempt.ready.set_result(await attempt.provider.achat(messages, **attempt.params))
+
+        winner = await self._race(self._attempts(params), run, messages_tokens(messages))
+        return winner.ready.result()
+
+    async def agenerate(self, prompt: str, **params) -> str:
+        """Generate text, hedged."""
+        return await self.achat([{"role": "user", "content": prompt}], **params)
+
+    async def _astream(self, method: str, request: Any, cost: int, params: Dict[str, Any]) -> AsyncIterator[str]:
+        # The first stream to produce a chunk wins
+        async def run(attempt: _Attempt):
+            chunks = getattr(attempt.provider, method)(request, **attempt.params)
+            try:
+                async for chunk in chunks:
+                    if not attempt.ready.done():
+                        attempt.ready.set_result(None)
+                    attempt.queue.put_nowait(chunk)
+            finally:
+                await chunks.aclose()
+            if not attempt.ready.done():
+                attempt.ready.set_result(None)
+            attempt.queue.put_nowait(_DONE)
+
+        winner = await self._race(self._attempts(params), run, cost)
+        try:
+            while True:
+                item = await winner.queue.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            if not winner.task.done():
+                winner.cancelled = True
+                winner.task.cancel()
+                await asyncio.gather(winner.task, return_exceptions=True)
+
+    async def astream(self, prompt: str, **params) -> AsyncIterator[str]:
+        """Stream text, hedged: the first stream to produce a chunk wins."""
+        async for chunk in self._astream('astream', prompt, estimate_tokens(prompt), params):
+            yield chunk
+
+    async def achat_stream(self, messages: List[Dict[str, str]], **params) -> AsyncIterator[str]:
+        """Stream a chat, hedged: the first stream to produce a chunk wins."""
+        async for chunk in self._astream('achat_stream', messages, messages_tokens(messages), params):
+            yield chunk
+
+    def chat(self, messages: List[Dict[str, str]], **params) -> str:
+        return _run_sync(self.achat(messages, **params))
+
+    def generate(self, prompt: str, **params) -> str:
+        return _run_sync(self.agenerate(prompt, **params))
+
+    def generate_stream(self, prompt: str, **params) -> Iterator[str]:
+        return _blocking(self.astream(prompt, **params))
+
+    def chat_stream(self, messages: List[Dict[str, str]], **params) -> Iterator[str]:
+        return _blocking(self.achat_stream(messages, **params))
+
+
+def _run_sync(coro):
+    """asyncio.run() that does not wait for the thread pool on exit.
+
+    A cancelled request running in a worker thread (a provider without an
+    async client) finishes in the background instead of delaying the answer.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            # Shuts the default executor down without waiting for its threads
+            loop.close()
+
+
+def _blocking(chunks: AsyncIterator[str]) -> Iterator[str]:
+    """Iterate an async stream from blocking code (on its own event loop)."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(chunks.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(chunks.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
@@ -0,0 +1,204 @@
+"""Process-wide pool of provider clients and their HTTP connection pools
+
+Provider instances are cheap and created often (every command, agent,
+delegation and batch item). The SDK client behind them, and the keep-alive
+connection pool it owns, is shared per (provider, base_url, api_key) so TLS
+handshakes are paid once per process instead of once per request.
+
+Async clients are shared the same way, but per event loop: their
+connections belong to the loop that opened them.
+"""
+import atexit
+import hashlib
+import logging
+import sys
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+DEFAULT_HTTP_SETTINGS: Dict[str, Any] = {
+    'max_connections': 20,            # open connections per client
+    'max_keepalive_connections': 10,  # idle connections kept for reuse
+    'keepalive_expiry': 60.0,         # seconds an idle connection is kept
+    'timeout': None,                  # request timeout in seconds (None: SDK default)
+    'http2': False,                   # needs the h2 package (pip install httpx[http2])
+    'prewarm': False,                 # open a connection in the background on client creation
+}
+
+logger = logging.getLogger('ffmcp.http')
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, Optional[str], str], Any] = {}
+_http_clients: List[Any] = []
+_async_clients: 'weakref.WeakKeyDictionary[Any, Dict[Tuple[str, Optional[str], str], Any]]' = weakref.WeakKeyDictionary()
+_warned_http2 = False
+
+
+def _fingerprint(api_key: Optional[str]) -> str:
+    # Keys are hashed so they never show up in pool keys or debug output
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+def _httpx_module(client_class):
+    """The httpx-compatible module a client class comes from (for Limits/Timeout)."""
+    for cls in client_class.__mro__:
+        module = sys.modules.get(cls.__module__.split('.')[0])
+        if module is not None and getattr(module, cls.__name__, None) is cls and hasattr(module, 'Limits'):
+            return module
+    return httpx
+
+
+def _http2_available() -> bool:
+    global _warned_http2
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        if not _warned_http2:
+            logger.warning("http2 is enabled but the h2 package is not installed; using HTTP/1.1 "
+                           "(install with: pip install 'httpx[http2]')")
+            _warned_http2 = True
+        return False
+
+
+def http_settings(config, provider: Optional[str] = None) -> Dict[str, Any]:
+    """Pool settings for a provider, falling back to DEFAULT_HTTP_SETTINGS."""
+    getter = getattr(config, 'get_http_settings', None)
+    return getter(provider) if getter else dict(DEFAULT_HTTP_SETTINGS)
+
+
+def new_http_client(settings: Dict[str, Any], client_class=None, *, is_async: bool = False):
+    """Create an HTTP client with the pool limits/timeout/http2 from settings.
+
+    client_class lets SDKs that vendor their own httpx flavor (e.g.
+    openai.DefaultHttpxClient) get a client of the type they accept.
+    Without it, an httpx.Client (or httpx.AsyncClient if is_async) is created.
+    """
+    if client_class is None:
+        if httpx is None:
+            raise ImportError("httpx package not installed. Install with: pip install httpx")
+        client_class = httpx.AsyncClient if is_async else httpx.Client
+    from ffmcp.ratelimit import aobserve_response, observe_response
+    module = _httpx_module(client_class)
+    kwargs: Dict[str, Any] = {
+        # Rate-limit headers of every response feed the limiter of the request (see ffmcp.ratelimit)
+        'event_hooks': {'response': [aobserve_response if is_async else observe_response]},
+        'limits': module.Limits(
+            max_connections=settings.get('max_connections'),
+            max_keepalive_connections=settings.get('max_keepalive_connections'),
+            keepalive_expiry=settings.get('keepalive_expiry'),
+        ),
+    }
+    if settings.get('timeout') is not None:
+        kwargs['timeout'] = module.Timeout(float(settings['timeout']))
+    if settings.get('http2') and _http2_available():
+        kwargs['http2'] = True
+    return client_class(**kwargs)
+
+
+def sdk_http_client_class(sdk_class, *, is_async: bool = False):
+    """The HTTP client class an SDK expects for http_client=, if it exports one.
+
+    Stainless-generated SDKs (openai, anthropic, groq) export
+    DefaultHttpxClient / DefaultAsyncHttpxClient, which keep their default
+    timeouts and redirects.
+    """
+    module = sys.modules.get(sdk_class.__module__.split('.')[0])
+    return getattr(module, 'DefaultAsyncHttpxClient' if is_async else 'DefaultHttpxClient', None)
+
+
+def prewarm(http_client, url) -> None:
+    """Open a pooled connection to url in a background thread (errors are ignored)."""
+    if not url:
+        return
+
+    def _warm():
+        try:
+            http_client.request('HEAD', str(url), timeout=10.0)
+        except Exception as e:
+            logger.debug("prewarm of %s failed: %s", url, e)
+
+    threading.Thread(target=_warm, name='ffmcp-prewarm', daemon=True).start()
+
+
+def shared_client(
+    config,
+    provider: str,
+    factory: Callable[[Any], Any],
+    *,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    client_class=None,
+):
+    """Return the process-wide client for (provider, base_url, api_key).
+
+    On first use, creates a pooled HTTP client (see new_http_client) and
+    calls factory(http_client) to build the SDK client around it; later
+    calls with the same key return that same client. With the `prewarm`
+    setting, a connection to the client's base URL is opened right away.
+    """
+    key = (provider, base_url, _fingerprint(api_key))
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        settings = http_settings(config, provider)
+        http_client = new_http_client(settings, client_class)
+        client = factory(http_client)
+        _clients[key] = client
+        _http_clients.append(http_client)
+    logger.debug("created pooled client provider=%s base_url=%s", provider, base_url)
+    if settings.get('prewarm'):
+        prewarm(http_client, base_url or getattr(client, 'base_url', None))
+    return client
+
+
+def shared_async_client(
+    config,
+    provider: str,
+    factory: Callable[[Any], Any],
+    *,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    client_class=None,
+    pooled_http: bool = True,
+):
+    """Async counterpart of shared_client, shared within the running event loop.
+
+    Must be called from a coroutine. factory(async_http_client) builds the
+    async SDK client; it is dropped together with its event loop. SDKs that
+    manage their own transport pass pooled_http=False and get factory(None).
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    key = (provider, base_url, _fingerprint(api_key))
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is not None:
+            return client
+        settings = http_settings(config, provider)
+        http_client = new_http_client(settings, client_class, is_async=True) if pooled_http else None
+        client = clients[key] = factory(http_client)
+    logger.debug("created pooled async client provider=%s base_url=%s", provider, base_url)
+    return client
+
+
+@atexit.register
+def close_all() -> None:
+    """Close every pooled connection (runs at interpreter exit)."""
+    with _lock:
+        clients = list(_http_clients)
+        _http_clients.clear()
+        _clients.clear()
+    for http_client in clients:
+        try:
+            http_client.close()
+        except Exception:
+            pass
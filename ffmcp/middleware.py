@@ -0,0 +1,342 @@
+"""Middleware pipeline around provider request methods
+
+Every request method a provider implements (generate, chat, chat_stream,
+create_embedding, vision, ...) is wrapped once, when the provider class
+is defined, by the layers of PIPELINE, outermost first:
+
+    request -> cache -> rate limit -> retry -> usage -> transport
+
+- cache (ffmcp.response_cache) answers repeated requests locally.
+- ratelimit (ffmcp.ratelimit) waits for the provider's token buckets,
+  then retries transient errors. Rate limit and retry are one layer, so
+  every retried attempt reserves its budget again.
+- usage (this module) meters the call. Provider methods hand the raw
+  usage object of their response to self._report_usage(); the layer
+  normalizes it with the provider family's UsageFormat and writes a
+  single ledger record per call, with its latency (and time to first
+  chunk for streams), once the call has succeeded. Prompt tokens read
+  from or written to the provider's prompt cache (ffmcp.prompt_cache)
+  are recorded as cache_read_tokens / cache_write_tokens; they are part
+  of prompt_tokens. The prompt tokens of text requests also calibrate
+  token estimates (ffmcp.tokenizer).
+
+Layers handle all four method shapes (function, coroutine, generator,
+async generator). Nested calls on the same provider (agenerate -> achat,
+generate_stream -> chat_stream) pass through the inner layers: each
+request is cached, limited and recorded once. Add a layer with register().
+"""
+import contextvars
+import functools
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ffmcp.ratelimit import API_METHODS, LIMITED_METHODS, limited
+from ffmcp.response_cache import CACHED_METHODS, cached
+from ffmcp.tokenizer import calibration, prompt_size
+
+
+logger = logging.getLogger('ffmcp.middleware')
+
+# Methods that make a provider request
+REQUEST_METHODS = LIMITED_METHODS
+# Requests whose prompt is only the text passed in (no tools or images), to calibrate token estimates from
+TEXT_METHODS = ('generate', 'agenerate', 'generate_stream', 'astream', 'chat', 'achat', 'chat_stream', 'achat_stream')
+
+
+class UsageFormat(NamedTuple):
+    """Where a provider family puts token counts in its usage object (attributes or dict keys).
+
+    Nested fields are dotted paths.
+    """
+    prompt: str
+    completion: str
+    total: Optional[str] = None
+    # Field holding the counts, when the reported object wraps them
+    within: Optional[str] = None
+    # Prompt tokens read from / written to the prompt cache
+    cache_read: Optional[str] = None
+    cache_write: Optional[str] = None
+    # Whether `prompt` leaves out the cached tokens (they are then added to it)
+    cache_separate: bool = False
+
+
+class Usage(NamedTuple):
+    """Normalized token counts of one response."""
+    prompt: int
+    completion: int
+    total: int
+    cache_read: int = 0
+    cache_write: int = 0
+
+
+USAGE_FORMATS: Dict[str, UsageFormat] = {
+    # OpenAI and the compatible APIs (deepseek, groq, together, ai33, aimlapi, mistral, perplexity)
+    'openai': UsageFormat('prompt_tokens', 'completion_tokens', 'total_tokens', cache_read='prompt_tokens_details.cached_tokens'),
+    'deepseek': UsageFormat('prompt_tokens', 'completion_tokens', 'total_tokens', cache_read='prompt_cache_hit_tokens'),
+    'anthropic': UsageFormat(
+        'input_tokens', 'output_tokens',
+        cache_read='cache_read_input_tokens', cache_write='cache_creation_input_tokens', cache_separate=True,
+    ),
+    'gemini': UsageFormat('prompt_token_count', 'candidates_token_count', 'total_token_count', cache_read='cached_content_token_count'),
+    # response.meta, whose `tokens` has the counts
+    'cohere': UsageFormat('input_tokens', 'output_tokens', 'total_tokens', within='tokens'),
+}
+
+
+def _field(obj: Any, name: str) -> Any:
+    for part in name.split('.'):
+        if obj is None:
+            return None
+        obj = obj.get(part) if isinstance(obj, dict) else getattr(obj, part, None)
+    return obj
+
+
+def _count(usage: Any, name: Optional[str]) -> int:
+    if not name:
+        return 0
+    try:
+        return int(_field(usage, name) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize_usage(usage: Any, fmt: UsageFormat) -> Optional[Usage]:
+    """Token counts of a usage object, or None if it has none."""
+    if usage and fmt.within:
+        usage = _field(usage, fmt.within)
+    if not usage:
+        return None
+    prompt = _count(usage, fmt.prompt)
+    completion = _count(usage, fmt.completion)
+    cache_read = _count(usage, fmt.cache_read)
+    cache_write = _count(usage, fmt.cache_write)
+    if fmt.cache_separate:
+        prompt += cache_read + cache_write
+    total = (_count(usage, fmt.total) if fmt.total else 0) or prompt + completion
+    return Usage(prompt, completion, total, cache_read, cache_write) if total > 0 else None
+
+
+# ---------------- Usage layer ----------------
+_meter: contextvars.ContextVar = contextvars.ContextVar('ffmcp_usage_meter', default=None)
+_END = object()
+
+
+class UsageMeter:
+    """Token counts and timing of one provider call."""
+
+    __slots__ = (
+        'provider', 'model', 'size', 'started', 'first_chunk',
+        'prompt_tokens', 'completion_tokens', 'total_tokens', 'cache_read_tokens', 'cache_write_tokens',
+    )
+
+    def __init__(self, provider, model: Optional[str] = None, size: Optional[Tuple[int, int]] = None):
+        self.provider = provider
+        self.model = model
+        # (characters, messages) of a text prompt
+        self.size = size
+        self.started = time.monotonic()
+        self.first_chunk: Optional[float] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def chunk(self):
+        if self.first_chunk is None:
+            self.first_chunk = time.monotonic()
+
+    def add(self, usage: Any):
+        counts = normalize_usage(usage, USAGE_FORMATS[self.provider.usage_format])
+        if counts:
+            self.prompt_tokens += counts.prompt
+            self.completion_tokens += counts.completion
+            self.total_tokens += counts.total
+            self.cache_read_tokens += counts.cache_read
+            self.cache_write_tokens += counts.cache_write
+
+    def record(self):
+        """Write the call's usage to the ledger (nothing if the response had none)."""
+        if not self.total_tokens:
+            return
+        provider = self.provider
+        # Usage never fails a call
+        try:
+            fields = {'latency_ms': round((time.monotonic() - self.started) * 1000)}
+            if self.first_chunk is not None:
+                fields['ttft_ms'] = round((self.first_chunk - self.started) * 1000)
+            if self.cache_read_tokens:
+                fields['cache_read_tokens'] = self.cache_read_tokens
+            if self.cache_write_tokens:
+                fields['cache_write_tokens'] = self.cache_write_tokens
+            name, model = provider.get_provider_name(), self.model or provider.get_default_model()
+            provider.config.add_token_usage(
+                name,
+                self.total_tokens,
+                model=model,
+                prompt_tokens=self.prompt_tokens,
+                completion_tokens=self.completion_tokens,
+                **fields,
+            )
+            if self.size and self.prompt_tokens:
+                calibration(provider.config).observe(name, model, self.size[0], self.size[1], self.prompt_tokens)
+        except Exception as e:
+            logger.debug("could not record usage for %s: %s", provider.__class__.__name__, e)
+
+
+def report_usage(provider, usage: Any):
+    """Add a response's usage to the current call of provider (see BaseProvider._report_usage)."""
+    try:
+        meter = _meter.get()
+        if meter is None or meter.provider is not provider:
+            # Not inside one of the provider's metered calls: record it on its own
+            meter = UsageMeter(provider)
+            meter.add(usage)
+            meter.record()
+            return
+        meter.add(usage)
+    except Exception as e:
+        logger.debug("could not read usage from %r: %s", type(usage).__name__, e)
+
+
+def _start(provider, name: str, args: Tuple, kwargs: Dict[str, Any]) -> Optional[UsageMeter]:
+    current = _meter.get()
+    if current is not None and current.provider is provider:
+        # Nested call: the outer one records
+        return None
+    size = prompt_size(args[0]) if name in TEXT_METHODS and args else None
+    return UsageMeter(provider, kwargs.get('model'), size)
+
+
+def metered(method: Callable) -> Callable:
+    """Wrap a provider request method with the usage layer."""
+    if getattr(method, '__ffmcp_metered__', False):
+        return method
+    name = method.__name__
+
+    if inspect.isasyncgenfunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            meter = _start(self, name, args, kwargs)
+            if meter is None:
+                async for chunk in method(self, *args, **kwargs):
+                    yield chunk
+                return
+            chunks = method(self, *args, **kwargs)
+            try:
+                while True:
+                    # Only set while the provider runs, not while our caller holds a chunk
+                    token = _meter.set(meter)
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        _meter.reset(token)
+                    meter.chunk()
+                    yield chunk
+            finally:
+                await chunks.aclose()
+            meter.record()
+    elif inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            meter = _start(self, name, args, kwargs)
+            if meter is None:
+                return await method(self, *args, **kwargs)
+            token = _meter.set(meter)
+            try:
+                result = await method(self, *args, **kwargs)
+            finally:
+                _meter.reset(token)
+            meter.record()
+            return result
+    elif inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            meter = _start(self, name, args, kwargs)
+            if meter is None:
+                yield from method(self, *args, **kwargs)
+                return
+            chunks = method(self, *args, **kwargs)
+            try:
+                while True:
+                    token = _meter.set(meter)
+                    try:
+                        chunk = next(chunks, _END)
+                    finally:
+                        _meter.reset(token)
+                    if chunk is _END:
+                        break
+                    meter.chunk()
+                    yield chunk
+            finally:
+                chunks.close()
+            meter.record()
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            meter = _start(self, name, args, kwargs)
+            if meter is None:
+                return method(self, *args, **kwargs)
+            token = _meter.set(meter)
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                _meter.reset(token)
+            meter.record()
+            return result
+
+    wrapper.__ffmcp_metered__ = True
+    return wrapper
+
+
+# ---------------- Pipeline ----------------
+class Layer:
+    """One pipeline stage.
+
+    wrap(method, name) returns the wrapped request method; it is applied to
+    the methods in `methods` of every provider class for which applies(cls)
+    is true.
+    """
+
+    def __init__(self, name: str, methods: Iterable[str], wrap: Callable[[Callable, str], Callable], applies: Optional[Callable[[type], bool]] = None):
+        self.name = name
+        self.methods = tuple(methods)
+        self.wrap = wrap
+        self.applies = applies or (lambda cls: True)
+
+
+# Outermost first
+PIPELINE: List[Layer] = [
+    Layer('cache', CACHED_METHODS, lambda method, name: cached(method, CACHED_METHODS[name])),
+    # Providers that delegate to other providers turn this off (BaseProvider.rate_limited)
+    Layer('ratelimit', LIMITED_METHODS + API_METHODS, lambda method, name: limited(method), lambda cls: cls.rate_limited),
+    Layer('usage', REQUEST_METHODS, lambda method, name: metered(method)),
+]
+
+
+def register(layer: Layer, *, before: Optional[str] = None, after: Optional[str] = None):
+    """Add a layer to the pipeline (innermost by default), for provider classes defined afterwards."""
+    names = [existing.name for existing in PIPELINE]
+    if layer.name in names:
+        raise ValueError(f'middleware layer already registered: {layer.name}')
+    if before is not None:
+        PIPELINE.insert(names.index(before), layer)
+    elif after is not None:
+        PIPELINE.insert(names.index(after) + 1, layer)
+    else:
+        PIPELINE.append(layer)
+
+
+def apply_pipeline(cls: type, base: type):
+    """Wrap the request methods cls implements itself (not base's defaults) in the pipeline."""
+    for layer in reversed(PIPELINE):
+        if not layer.applies(cls):
+            continue
+        for name in layer.methods:
+            method = getattr(cls, name, None)
+            if method is not None and method is not getattr(base, name, None):
+                setattr(cls, name, layer.wrap(method, name))
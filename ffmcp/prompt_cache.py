@@ -0,0 +1,217 @@
+"""Prompt-prefix caching: let providers reuse the stable start of a prompt
+
+Agent and team runs resend the same long prefix on every call: the
+agent's instructions, a team's hierarchy context, memory context. Chat
+prompts are assembled most-stable-first (see ffmcp.context.build_context)
+so that this prefix is byte-identical from call to call, and each
+provider family is asked to cache it its own way:
+
+- OpenAI caches prompt prefixes of 1024+ tokens automatically; requests
+  with a long system prefix also carry a prompt_cache_key (a hash of the
+  prefix), so they are routed to the servers that hold it.
+- Anthropic caches up to explicit cache_control breakpoints. They are put
+  after the first system block that reaches min_tokens (the instructions,
+  reused even when memory changes), after the last system block, and
+  after the conversation so far, for the next turn of a thread.
+- Gemini caches through CachedContent objects, which are billed for
+  storage while they live. The system instruction is cached the second
+  time it is seen within gemini_ttl, and the cache names are kept in
+  ~/.ffmcp/gemini_caches.json so other processes reuse them.
+
+Cache reads and writes are reported in the usage ledger as
+cache_read_tokens and cache_write_tokens (see ffmcp.middleware).
+Settings: `ffmcp cache prompt`.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ffmcp.storage import atomic_write_json, file_lock
+from ffmcp.tokenizer import TokenCounter
+
+
+DEFAULT_PROMPT_CACHE_SETTINGS: Dict[str, Any] = {
+    'enabled': True,
+    # Shortest prefix (tokens) worth caching; shorter ones are not cached by the providers anyway
+    'min_tokens': 1024,
+    # Gemini bills cached content storage per hour, so only long prefixes are worth it
+    'gemini_min_tokens': 4096,
+    'gemini_ttl': 300,
+}
+# Anthropic accepts up to 4 breakpoints per request
+MAX_BREAKPOINTS = 4
+# Gemini caches this close to expiring are not used (seconds)
+EXPIRY_MARGIN = 30.0
+
+logger = logging.getLogger('ffmcp.prompt_cache')
+
+
+def settings(config) -> Dict[str, Any]:
+    """Prompt cache settings of config, or the defaults."""
+    getter = getattr(config, 'get_prompt_cache_settings', None)
+    return getter() if getter else dict(DEFAULT_PROMPT_CACHE_SETTINGS)
+
+
+def system_prefix(messages: List[Dict[str, Any]]) -> List[str]:
+    """Texts of the system messages a prompt starts with."""
+    texts = []
+    for message in messages:
+        if message.get('role') != 'system' or not isinstance(message.get('content'), str):
+            break
+        texts.append(message['content'])
+    return texts
+
+
+def prefix_key(texts: List[str], model: Optional[str] = None) -> str:
+    """Stable key of a prompt prefix (and model)."""
+    digest = hashlib.sha256(json.dumps([model, texts], ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def openai_cache_key(messages: List[Dict[str, Any]], counter: TokenCounter, config) -> Optional[str]:
+    """prompt_cache_key for a chat whose system prefix is long enough to be cached, else None."""
+    options = settings(config)
+    if not options['enabled']:
+        return None
+    texts = system_prefix(messages)
+    if not texts or counter.messages({'content': text} for text in texts) < options['min_tokens']:
+        return None
+    return prefix_key(texts)
+
+
+# ---------------- Anthropic ----------------
+def _mark(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {**block, 'cache_control': {'type': 'ephemeral'}}
+
+
+def _mark_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    content = message.get('content')
+    if isinstance(content, str):
+        content = [{'type': 'text', 'text': content}]
+    if not content or not isinstance(content[-1], dict):
+        return message
+    return {**message, 'content': [*content[:-1], _mark(content[-1])]}
+
+
+def anthropic_breakpoints(
+    system: List[Dict[str, Any]],
+    messages: List[Dict[str, Any]],
+    counter: TokenCounter,
+    config,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Add cache_control breakpoints to Anthropic system blocks and messages.
+
+    Returns new (system, messages); the inputs are not changed. Nothing is
+    marked when caching is off or the prefix is shorter than min_tokens.
+    """
+    options = settings(config)
+    if not options['enabled']:
+        return system, messages
+    min_tokens = options['min_tokens']
+    system, messages = list(system), list(messages)
+    marks: List[int] = []
+    used = 0
+    for i, block in enumerate(system):
+        used += counter.count(block.get('text'))
+        if used >= min_tokens and not marks:
+            marks.append(i)
+    if used >= min_tokens and system and (len(system) - 1) not in marks:
+        marks.append(len(system) - 1)
+    for i in marks:
+        system[i] = _mark(system[i])
+    # The conversation before the new user turn: cached for the thread's next turn
+    if len(messages) >= 2 and len(marks) < MAX_BREAKPOINTS:
+        if used + counter.messages(messages[:-1]) >= min_tokens:
+            messages[-2] = _mark_message(messages[-2])
+    return system, messages
+
+
+# ---------------- Gemini ----------------
+class GeminiCacheRegistry:
+    """Gemini CachedContent names by prompt prefix key, persisted to a JSON file.
+
+    Entries: {key: {name, expires}} for created caches (name is None when
+    creating one failed: not retried before it expires), or {key: {seen}}
+    for prefixes seen once.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, key: str, ttl: float) -> Tuple[Optional[str], bool]:
+        """(cache name, whether to create one) for a prefix; records that it was seen.
+
+        A cache is created the second time a prefix is seen within ttl:
+        one-off prompts are never stored.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                with file_lock(self.lock_path):
+                    entries = self._read()
+                    entry = entries.get(key) or {}
+                    if 'expires' in entry and entry['expires'] - EXPIRY_MARGIN > now:
+                        return entry.get('name'), False
+                    create = now - entry.get('seen', 0) <= ttl
+                    # Drop expired entries while the file is open
+                    entries = {k: v for k, v in entries.items() if max(v.get('expires', 0), v.get('seen', 0) + ttl) > now}
+                    entries[key] = {'seen': now}
+                    atomic_write_json(self.path, entries)
+                    return None, create
+            except OSError as e:
+                logger.debug("could not read gemini cache registry: %s", e)
+                return None, False
+
+    def store(self, key: str, name: Optional[str], expires: float):
+        with self._lock:
+            try:
+                with file_lock(self.lock_path):
+                    entries = self._read()
+                    entries[key] = {'name': name, 'expires': expires}
+                    atomic_write_json(self.path, entries)
+            except OSError as e:
+                logger.debug("could not save gemini cache registry: %s", e)
+
+    def forget(self, key: Optional[str] = None) -> int:
+        """Drop one entry (or all); returns how many were dropped."""
+        with self._lock:
+            with file_lock(self.lock_path):
+                entries = self._read()
+                dropped = len(entries) if key is None else int(key in entries)
+                if key is None:
+                    entries = {}
+                else:
+                    entries.pop(key, None)
+                atomic_write_json(self.path, entries)
+        return dropped
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return self._read()
+
+
+_registries: Dict[str, GeminiCacheRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def gemini_caches(config) -> GeminiCacheRegistry:
+    """The shared GeminiCacheRegistry for a config directory."""
+    path = Path(config.config_dir) / 'gemini_caches.json'
+    with _registries_lock:
+        registry = _registries.get(str(path))
+        if registry is None:
+            registry = _registries[str(path)] = GeminiCacheRegistry(path)
+    return registry
@@ -2,38 +2,41 @@
 from typing import Dict, Type, Iterator
 import logging
 from ffmcp.providers.base import BaseProvider
-from ffmcp.providers.openai_provider import OpenAIProvider
-from ffmcp.providers.anthropic_provider import AnthropicProvider
-from ffmcp.providers.gemini_provider import GeminiProvider
-from ffmcp.providers.groq_provider import GroqProvider
-from ffmcp.providers.deepseek_provider import DeepSeekProvider
-from ffmcp.providers.mistral_provider import MistralProvider
-from ffmcp.providers.together_provider import TogetherProvider
-from ffmcp.providers.cohere_provider import CohereProvider
-from ffmcp.providers.perplexity_provider import PerplexityProvider
-from ffmcp.providers.ai33_provider import AI33Provider
-from ffmcp.providers.aimlapi_provider import AIMLAPIProvider
+from ffmcp.registry import LazyRegistry
 
 
-AVAILABLE_PROVIDERS: Dict[str, Type[BaseProvider]] = {
-    'openai': OpenAIProvider,
-    'anthropic': AnthropicProvider,
-    'gemini': GeminiProvider,
-    'groq': GroqProvider,
-    'deepseek': DeepSeekProvider,
-    'mistral': MistralProvider,
-    'together': TogetherProvider,
-    'cohere': CohereProvider,
-    'perplexity': PerplexityProvider,
-    'ai33': AI33Provider,
-    'aimlapi': AIMLAPIProvider,
-}
+# Provider modules (and the SDKs they wrap) are imported only when used
+AVAILABLE_PROVIDERS: Dict[str, Type[BaseProvider]] = LazyRegistry({
+    'openai': 'ffmcp.providers.openai_provider:OpenAIProvider',
+    'anthropic': 'ffmcp.providers.anthropic_provider:AnthropicProvider',
+    'gemini': 'ffmcp.providers.gemini_provider:GeminiProvider',
+    'groq': 'ffmcp.providers.groq_provider:GroqProvider',
+    'deepseek': 'ffmcp.providers.deepseek_provider:DeepSeekProvider',
+    'mistral': 'ffmcp.providers.mistral_provider:MistralProvider',
+    'together': 'ffmcp.providers.together_provider:TogetherProvider',
+    'cohere': 'ffmcp.providers.cohere_provider:CohereProvider',
+    'perplexity': 'ffmcp.providers.perplexity_provider:PerplexityProvider',
+    'ai33': 'ffmcp.providers.ai33_provider:AI33Provider',
+    'aimlapi': 'ffmcp.providers.aimlapi_provider:AIMLAPIProvider',
+})
+
+
+def __getattr__(name: str):
+    # Keep `from ffmcp.providers import OpenAIProvider` working without eager imports
+    for provider in AVAILABLE_PROVIDERS:
+        if AVAILABLE_PROVIDERS.path(provider).endswith(f':{name}'):
+            return AVAILABLE_PROVIDERS[provider]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_provider(name: str, config) -> BaseProvider:
     """Get a provider instance by name"""
     logger = logging.getLogger('ffmcp.providers')
     logger.debug("get_provider called name=%s", name)
+    if name.startswith('router:'):
+        # Virtual provider over several configured targets (see `ffmcp router`)
+        from ffmcp.providers.router_provider import RouterProvider
+        return RouterProvider(config, name[len('router:'):])
     if name not in AVAILABLE_PROVIDERS:
         raise ValueError(f"Unknown provider: {name}. Available: {list(AVAILABLE_PROVIDERS.keys())}")
     
@@ -42,4 +45,3 @@ def get_provider(name: str, config) -> BaseProvider:
     instance = provider_class(config)
     logger.debug("provider instantiated class=%s", instance.__class__.__name__)
     return instance
-
@@ -1,19 +1,21 @@
 """AIMLAPI provider implementation with full OpenAI-compatible feature support"""
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     import base64
     from pathlib import Path
 except ImportError:
     OpenAI = None
+    AsyncOpenAI = None
     base64 = None
     Path = None
 
 from typing import List, Dict, Iterator, Optional, Any, Union
 from ffmcp.providers.base import BaseProvider
+from ffmcp.providers.openai_compat import AsyncChatCompletionsMixin
 import json
 
 
-class AIMLAPIProvider(BaseProvider):
+class AIMLAPIProvider(AsyncChatCompletionsMixin, BaseProvider):
     """AIMLAPI provider - Unified API for 300+ AI models"""
     
     def __init__(self, config):
@@ -21,9 +23,18 @@ class AIMLAPIProvider(BaseProvider):
             raise ImportError("openai package not installed. Install with: pip install openai")
         super().__init__(config)
         # AIMLAPI uses OpenAI-compatible API with custom base URL
-        self.client = OpenAI(
-            base_url="https://api.aimlapi.com/v1",
-            api_key=self.api_key
+        self.base_url = "https://api.aimlapi.com/v1"
+        self.client = self._shared_client(
+            lambda http_client: OpenAI(base_url=self.base_url, api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=OpenAI,
+            base_url=self.base_url,
+        )
+    
+    def _async_client(self):
+        return self._shared_async_client(
+            lambda http_client: AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client, max_retries=0),
+            sdk_class=AsyncOpenAI,
+            base_url=self.base_url,
         )
     
     def get_provider_name(self) -> str:
@@ -44,52 +55,34 @@ class AIMLAPIProvider(BaseProvider):
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                # Fallback: sum prompt + completion
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using AIMLAPI (streaming)"""
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with AIMLAPI (streaming)"""
         model = kwargs.get('model', self.get_default_model())
         temperature = kwargs.get('temperature', 0.7)
         max_tokens = kwargs.get('max_tokens')
         
         stream = self.client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             stream=True,
         )
         
-        total_tokens_detected = None
+        usage = None
         for chunk in stream:
-            if chunk.choices[0].delta.content:
+            if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
-            # Best-effort: capture usage when present on a chunk (SDK-dependent)
-            try:
-                usage = getattr(chunk, 'usage', None)
-                if usage and getattr(usage, 'total_tokens', None) is not None:
-                    total_tokens_detected = int(usage.total_tokens)
-            except Exception:
-                pass
-        # After stream ends, record usage if we saw it
-        if total_tokens_detected:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens_detected)
-            except Exception:
-                pass
+            # Usage arrives on the last chunk when the API includes it
+            usage = getattr(chunk, 'usage', None) or usage
+        self._report_usage(usage)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with AIMLAPI"""
@@ -112,18 +105,7 @@ class AIMLAPIProvider(BaseProvider):
             params['tool_choice'] = tool_choice
         
         response = self.client.chat.completions.create(**params)
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
     
     # ========== Vision / Image Understanding ==========
@@ -168,18 +150,7 @@ class AIMLAPIProvider(BaseProvider):
             params['max_tokens'] = max_tokens
         
         response = self.client.chat.completions.create(**params)
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
     
     def vision_urls(self, prompt: str, image_urls: List[str], **kwargs) -> str:
@@ -208,17 +179,7 @@ class AIMLAPIProvider(BaseProvider):
         if max_tokens:
             params['max_tokens'] = max_tokens
         response = self.client.chat.completions.create(**params)
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
 
     # ========== Image Generation (DALL·E) ==========
@@ -406,12 +367,7 @@ class AIMLAPIProvider(BaseProvider):
             }
         }
         # Count embedding tokens as well
-        try:
-            total = getattr(response.usage, 'total_tokens', None)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(response.usage)
         return result
     
     # ========== Function Calling / Tools ==========
@@ -431,18 +387,7 @@ class AIMLAPIProvider(BaseProvider):
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         message = response.choices[0].message
         result = {
@@ -8,7 +8,7 @@ except ImportError:
     base64 = None
     Path = None
 
-from typing import List, Dict, Iterator, Optional, Any, Union
+from typing import List, Dict, Iterator, AsyncIterator, Optional, Any, Union
 from ffmcp.providers.base import BaseProvider
 import json
 
@@ -16,11 +16,55 @@ import json
 class AnthropicProvider(BaseProvider):
     """Anthropic Claude provider"""
     
+    usage_format = 'anthropic'
+    
     def __init__(self, config):
         if anthropic is None:
             raise ImportError("anthropic package not installed. Install with: pip install anthropic")
         super().__init__(config)
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = self._shared_client(
+            lambda http_client: anthropic.Anthropic(api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=anthropic.Anthropic,
+        )
+    
+    def _async_client(self):
+        return self._shared_async_client(
+            lambda http_client: anthropic.AsyncAnthropic(api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=anthropic.AsyncAnthropic,
+        )
+    
+    @staticmethod
+    def _split_system(messages: List[Dict[str, str]]):
+        """Anthropic takes the system prompt separately: return (system text blocks, other messages)."""
+        anthropic_messages = []
+        system_blocks = []
+        for msg in messages:
+            if msg.get('role') == 'system':
+                if msg.get('content'):
+                    system_blocks.append({"type": "text", "text": msg['content']})
+                continue
+            anthropic_messages.append({"role": msg['role'], "content": msg['content']})
+        return system_blocks, anthropic_messages
+    
+    def _cache_breakpoints(self, system_blocks: List[Dict[str, Any]], anthropic_messages: List[Dict[str, Any]], model: str):
+        """Mark the stable prompt prefix for prompt caching (see ffmcp.prompt_cache)."""
+        from ffmcp.prompt_cache import anthropic_breakpoints
+        from ffmcp.tokenizer import token_counter
+        counter = token_counter(self.get_provider_name(), model, self.config)
+        return anthropic_breakpoints(system_blocks, anthropic_messages, counter, self.config)
+    
+    def _message_params(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        model = kwargs.get('model', self.get_default_model())
+        system_blocks, anthropic_messages = self._cache_breakpoints(*self._split_system(messages), model)
+        params = {
+            'model': model,
+            'max_tokens': kwargs.get('max_tokens', 1024),
+            'temperature': kwargs.get('temperature', 0.7),
+            'messages': anthropic_messages,
+        }
+        if system_blocks:
+            params['system'] = system_blocks
+        return params
     
     def get_provider_name(self) -> str:
         return 'anthropic'
@@ -40,85 +84,60 @@ class AnthropicProvider(BaseProvider):
             temperature=temperature,
             messages=[{"role": "user", "content": prompt}],
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'output_tokens', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.content[0].text
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using Anthropic (streaming)"""
-        model = kwargs.get('model', self.get_default_model())
-        temperature = kwargs.get('temperature', 0.7)
-        max_tokens = kwargs.get('max_tokens', 1024)
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with Anthropic (streaming)"""
+        params = self._message_params(messages, kwargs)
         
-        with self.client.messages.stream(
-            model=model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=[{"role": "user", "content": prompt}],
-        ) as stream:
+        with self.client.messages.stream(**params) as stream:
             for text in stream.text_stream:
                 yield text
-            # After streaming completes, try to fetch final message to get usage
+            # The final message (assembled from the events already read) has the usage
             try:
-                final = stream.get_final_response() if hasattr(stream, 'get_final_response') else getattr(stream, 'final_message', None)
-                usage = getattr(final, 'usage', None)
-                if usage:
-                    total = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'output_tokens', 0) or 0)
-                    if total > 0:
-                        self.config.add_token_usage(self.get_provider_name(), total)
+                final = stream.get_final_message()
             except Exception:
-                pass
+                final = None
+            self._report_usage(getattr(final, 'usage', None))
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with Anthropic"""
-        model = kwargs.get('model', self.get_default_model())
-        temperature = kwargs.get('temperature', 0.7)
-        max_tokens = kwargs.get('max_tokens', 1024)
-        
-        # Convert messages format if needed
-        anthropic_messages = []
-        for msg in messages:
-            role = msg['role']
-            if role == 'system':
-                # Anthropic handles system messages differently
-                continue
-            anthropic_messages.append({
-                "role": role if role != 'assistant' else 'assistant',
-                "content": msg['content']
-            })
-        
-        # Extract system message if present
-        system_msg = None
-        for msg in messages:
-            if msg.get('role') == 'system':
-                system_msg = msg['content']
-                break
-        
-        response = self.client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=anthropic_messages,
-            system=system_msg,
-        )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'output_tokens', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        response = self.client.messages.create(**self._message_params(messages, kwargs))
+        self._report_usage(getattr(response, 'usage', None))
+        return response.content[0].text
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat with Anthropic (async)"""
+        response = await self._async_client().messages.create(**self._message_params(messages, kwargs))
+        self._report_usage(getattr(response, 'usage', None))
         return response.content[0].text
     
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text using Anthropic (async)"""
+        return await self.achat([{"role": "user", "content": prompt}], **kwargs)
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text using Anthropic (async streaming)"""
+        async for text in self.achat_stream([{"role": "user", "content": prompt}], **kwargs):
+            yield text
+    
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Chat with Anthropic (async streaming)"""
+        params = self._message_params(messages, kwargs)
+        async with self._async_client().messages.stream(**params) as stream:
+            async for text in stream.text_stream:
+                yield text
+            try:
+                final = await stream.get_final_message()
+            except Exception:
+                final = None
+            self._report_usage(getattr(final, 'usage', None))
+    
     # ========== Vision / Image Understanding ==========
     
     def vision(self, prompt: str, image_paths: List[str], **kwargs) -> str:
@@ -165,15 +184,7 @@ class AnthropicProvider(BaseProvider):
             temperature=temperature,
             messages=[{"role": "user", "content": content_blocks}],
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'output_tokens', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.content[0].text
     
     def vision_urls(self, prompt: str, image_urls: List[str], **kwargs) -> str:
@@ -200,15 +211,7 @@ class AnthropicProvider(BaseProvider):
             temperature=temperature,
             messages=[{"role": "user", "content": content_blocks}],
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'output_tokens', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.content[0].text
     
     # ========== Tools / Function Calling ==========
@@ -222,12 +225,13 @@ class AnthropicProvider(BaseProvider):
         
         # Convert messages format
         anthropic_messages = []
-        system_msg = None
+        system_blocks = []
         
         for msg in messages:
             role = msg['role']
             if role == 'system':
-                system_msg = msg['content']
+                if msg.get('content'):
+                    system_blocks.append({"type": "text", "text": msg['content']})
                 continue
             
             # Handle content - could be string or list of content blocks
@@ -262,6 +266,9 @@ class AnthropicProvider(BaseProvider):
                     # Already in Anthropic format
                     anthropic_tools.append(tool)
         
+        # Tools and system prompt form the cached prefix of every tool round
+        system_blocks, anthropic_messages = self._cache_breakpoints(system_blocks, anthropic_messages, model)
+        
         params = {
             'model': model,
             'max_tokens': max_tokens,
@@ -270,8 +277,8 @@ class AnthropicProvider(BaseProvider):
             'tools': anthropic_tools,
         }
         
-        if system_msg:
-            params['system'] = system_msg
+        if system_blocks:
+            params['system'] = system_blocks
         
         # Handle tool_choice
         if tool_choice and tool_choice != 'auto':
@@ -285,15 +292,7 @@ class AnthropicProvider(BaseProvider):
         
         response = self.client.messages.create(**params)
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'output_tokens', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         # Extract response content
         result = {
@@ -327,3 +326,61 @@ class AnthropicProvider(BaseProvider):
         
         return result
 
+    
+    # ========== Message Batches ==========
+    
+    def create_batch(self, requests: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """Submit chat requests to the Message Batches API (answered within 24h, at half the price)
+        
+        Each request: {custom_id, messages, model, params}; model and params are optional.
+        """
+        batch_requests = []
+        for request in requests:
+            model = request.get('model') or self.get_default_model()
+            # Requests sharing a prefix read it from the prompt cache too
+            system_blocks, anthropic_messages = self._cache_breakpoints(*self._split_system(request['messages']), model)
+            params = {'max_tokens': 1024}
+            params.update(request.get('params') or {})
+            params['model'] = model
+            params['messages'] = anthropic_messages
+            if system_blocks:
+                params['system'] = system_blocks
+            batch_requests.append({'custom_id': request['custom_id'], 'params': params})
+        return self._batch_info(self.client.messages.batches.create(requests=batch_requests))
+    
+    def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Status of a batch"""
+        return self._batch_info(self.client.messages.batches.retrieve(batch_id))
+    
+    def batch_results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        """Results of a finished batch: {custom_id, model, output, usage} or {custom_id, error}"""
+        for item in self.client.messages.batches.results(batch_id):
+            result = item.result
+            if result.type == 'succeeded':
+                message = result.message
+                yield {
+                    'custom_id': item.custom_id,
+                    'model': message.model,
+                    'output': ''.join(getattr(block, 'text', '') for block in message.content),
+                    'usage': message.usage,
+                }
+            elif result.type == 'errored':
+                error = getattr(result.error, 'error', None)
+                yield {'custom_id': item.custom_id, 'error': getattr(error, 'message', None) or 'errored'}
+            else:
+                # canceled or expired before it ran
+                yield {'custom_id': item.custom_id, 'error': result.type}
+    
+    @staticmethod
+    def _batch_info(batch) -> Dict[str, Any]:
+        counts = batch.request_counts
+        finished = counts.succeeded + counts.errored + counts.canceled + counts.expired
+        return {
+            'id': batch.id,
+            'status': batch.processing_status,
+            'done': batch.processing_status == 'ended',
+            'total': counts.processing + finished,
+            'completed': counts.succeeded,
+            'failed': counts.errored + counts.canceled + counts.expired,
+            'created_at': batch.created_at.timestamp() if batch.created_at else None,
+        }
@@ -1,18 +1,143 @@
 """Base provider interface"""
+import asyncio
+import contextvars
+import functools
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Iterator, Optional, Any
+from typing import List, Dict, Iterator, AsyncIterator, Optional, Any
+
+from ffmcp.middleware import apply_pipeline, report_usage
+
+
+async def _to_thread(func, *args, **kwargs):
+    # asyncio.to_thread() needs Python 3.9; like it, run in a copy of the caller's context
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
+
+
+_STREAM_DONE = object()
+
+
+class _ThreadStream:
+    """A blocking stream stepped on the thread pool.
+
+    close() may be called while a next() is still running in a worker (the
+    consumer was cancelled): the generator cannot be closed from another
+    thread then, so the worker closes it when that next() returns.
+    """
+
+    def __init__(self, chunks: Iterator[str]):
+        self.chunks = chunks
+        self._lock = threading.Lock()
+        self._busy = False
+        self._closing = False
+
+    def _next(self):
+        try:
+            return next(self.chunks, _STREAM_DONE)
+        finally:
+            with self._lock:
+                self._busy = False
+                closing = self._closing
+            if closing:
+                self._close()
+
+    async def next(self):
+        with self._lock:
+            self._busy = True
+        return await _to_thread(self._next)
+
+    def close(self):
+        with self._lock:
+            if self._busy:
+                self._closing = True
+                return
+        self._close()
+
+    def _close(self):
+        close = getattr(self.chunks, 'close', None)
+        if close:
+            close()
+
+
+async def _iterate_in_thread(chunks: Iterator[str]) -> AsyncIterator[str]:
+    # Each next() of a blocking stream runs on the thread pool
+    stream = _ThreadStream(chunks)
+    try:
+        while True:
+            chunk = await stream.next()
+            if chunk is _STREAM_DONE:
+                break
+            yield chunk
+    finally:
+        stream.close()
 
 
 class BaseProvider(ABC):
     """Base class for AI providers"""
+
+    # Wrap request methods with rate limiting and retries (see ffmcp.ratelimit);
+    # providers that delegate to other providers turn this off
+    rate_limited = True
+    # How the provider's responses report token usage (see ffmcp.middleware.USAGE_FORMATS)
+    usage_format = 'openai'
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Put the middleware pipeline (cache, rate limit/retry, usage) around the
+        # request methods a provider implements (the thread-pool defaults below
+        # go through them anyway)
+        apply_pipeline(cls, BaseProvider)
     
     def __init__(self, config):
+        from ffmcp.response_cache import cache_for
         self.config = config
         self.api_key = config.get_api_key(self.get_provider_name())
         if not self.api_key:
             raise ValueError(f"API key not configured for {self.get_provider_name()}. "
                            f"Set it with: ffmcp config -p {self.get_provider_name()} -k YOUR_KEY")
+        # ResponseCache when caching is enabled, else None
+        self.cache = cache_for(config)
     
+    def _shared_client(self, factory, *, sdk_class=None, base_url: Optional[str] = None):
+        """Build (or reuse) this provider's SDK client on a pooled HTTP client.
+
+        factory(http_client) creates the SDK client; see ffmcp.http_pool.shared_client.
+        """
+        from ffmcp.http_pool import sdk_http_client_class, shared_client
+        client_class = sdk_http_client_class(sdk_class) if sdk_class is not None else None
+        return shared_client(
+            self.config,
+            self.get_provider_name(),
+            factory,
+            base_url=base_url,
+            api_key=self.api_key,
+            client_class=client_class,
+        )
+
+    def _shared_async_client(self, factory, *, sdk_class=None, base_url: Optional[str] = None, pooled_http: bool = True):
+        """Async counterpart of _shared_client for the running event loop.
+
+        factory(async_http_client) creates the async SDK client; see
+        ffmcp.http_pool.shared_async_client.
+        """
+        from ffmcp.http_pool import sdk_http_client_class, shared_async_client
+        client_class = sdk_http_client_class(sdk_class, is_async=True) if sdk_class is not None else None
+        return shared_async_client(
+            self.config,
+            self.get_provider_name(),
+            factory,
+            base_url=base_url,
+            api_key=self.api_key,
+            client_class=client_class,
+            pooled_http=pooled_http,
+        )
+
+    def _report_usage(self, usage: Any):
+        """Hand the usage object of a response to the usage middleware, which records it once per call."""
+        report_usage(self, usage)
+
     @abstractmethod
     def get_provider_name(self) -> str:
         """Return the provider name"""
@@ -38,3 +163,32 @@ class BaseProvider(ABC):
         """Chat with AI using message history"""
         pass
 
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with AI using message history (streaming)
+
+        Providers stream natively; this fallback yields chat()'s answer as one chunk.
+        """
+        yield self.chat(messages, **kwargs)
+
+    # ---------------- Async API ----------------
+    # Providers override these with their SDK's async client. The defaults
+    # run the blocking methods on the default thread pool, so every
+    # provider can be awaited.
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text from a prompt (async)"""
+        return await _to_thread(self.generate, prompt, **kwargs)
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat with AI using message history (async)"""
+        return await _to_thread(self.chat, messages, **kwargs)
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text from a prompt (async streaming)"""
+        async for chunk in _iterate_in_thread(self.generate_stream(prompt, **kwargs)):
+            yield chunk
+
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Chat with AI using message history (async streaming)"""
+        async for chunk in _iterate_in_thread(self.chat_stream(messages, **kwargs)):
+            yield chunk
@@ -4,18 +4,69 @@ try:
 except ImportError:
     cohere = None
 
-from typing import List, Dict, Iterator, Optional, Any
+from typing import List, Dict, Iterator, AsyncIterator, Optional, Any
 from ffmcp.providers.base import BaseProvider
 
 
 class CohereProvider(BaseProvider):
     """Cohere provider"""
     
+    usage_format = 'cohere'
+    
     def __init__(self, config):
         if cohere is None:
             raise ImportError("cohere package not installed. Install with: pip install cohere")
         super().__init__(config)
-        self.client = cohere.Client(api_key=self.api_key)
+        self.client = self._shared_client(
+            lambda http_client: cohere.Client(api_key=self.api_key, httpx_client=http_client),
+        )
+    
+    @staticmethod
+    def _to_cohere_chat(messages: List[Dict[str, str]]):
+        """Split messages into Cohere's (message, chat_history)."""
+        # Cohere chat API expects chat_history and message
+        # Convert messages format
+        chat_history = []
+        user_message = None
+        
+        for msg in messages:
+            role = msg.get('role')
+            content = msg.get('content', '')
+            if role == 'user':
+                if user_message is None:
+                    user_message = content
+                else:
+                    # Add previous user message and this one to history
+                    chat_history.append({"role": "USER", "message": user_message})
+                    chat_history.append({"role": "CHATBOT", "message": content})
+                    user_message = None
+            elif role == 'assistant':
+                if user_message:
+                    chat_history.append({"role": "USER", "message": user_message})
+                    chat_history.append({"role": "CHATBOT", "message": content})
+                    user_message = None
+                else:
+                    # This shouldn't happen, but handle it
+                    if chat_history:
+                        chat_history[-1]["message"] = content
+        
+        # If we have a pending user message, use it
+        if user_message is None and messages:
+            user_message = messages[-1].get('content', '')
+        return user_message, chat_history
+    
+    @staticmethod
+    def _preamble(messages: List[Dict[str, str]]) -> Optional[str]:
+        """The system message, which Cohere takes as the preamble."""
+        for msg in messages:
+            if msg.get('role') == 'system':
+                return msg.get('content')
+        return None
+    
+    def _async_client(self):
+        return self._shared_async_client(
+            lambda http_client: cohere.AsyncClient(api_key=self.api_key, httpx_client=http_client),
+        )
     
     def get_provider_name(self) -> str:
         return 'cohere'
@@ -36,55 +87,35 @@ class CohereProvider(BaseProvider):
             max_tokens=max_tokens,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'meta', {}).get('tokens', {})
-            if usage:
-                total = int(usage.get('total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(usage.get('input_tokens', 0) or 0)
-                    ct = int(usage.get('output_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'meta', None))
         
         return response.text
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using Cohere (streaming)"""
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with Cohere (streaming)"""
         model = kwargs.get('model', self.get_default_model())
-        temperature = kwargs.get('temperature', 0.7)
-        max_tokens = kwargs.get('max_tokens')
+        user_message, chat_history = self._to_cohere_chat(messages)
         
         stream = self.client.chat_stream(
             model=model,
-            message=prompt,
-            temperature=temperature,
-            max_tokens=max_tokens,
+            message=user_message or '',
+            chat_history=chat_history if chat_history else None,
+            preamble=self._preamble(messages),
+            temperature=kwargs.get('temperature', 0.7),
+            max_tokens=kwargs.get('max_tokens'),
         )
         
-        total_tokens_detected = None
+        meta = None
         for event in stream:
-            if event.event_type == 'text-generation':
-                if hasattr(event, 'text'):
-                    yield event.text
-            # Try to capture usage from final event
-            try:
-                if hasattr(event, 'meta') and event.meta:
-                    usage = event.meta.get('tokens', {})
-                    if usage:
-                        total_tokens_detected = int(usage.get('total_tokens', 0) or 0)
-            except Exception:
-                pass
-        
-        # Record token usage after streaming completes
-        if total_tokens_detected:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens_detected)
-            except Exception:
-                pass
+            if event.event_type == 'text-generation' and getattr(event, 'text', None):
+                yield event.text
+            elif event.event_type == 'stream-end':
+                meta = getattr(getattr(event, 'response', None), 'meta', None)
+        self._report_usage(meta)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with Cohere"""
@@ -92,57 +123,60 @@ class CohereProvider(BaseProvider):
         temperature = kwargs.get('temperature', 0.7)
         max_tokens = kwargs.get('max_tokens')
         
-        # Cohere chat API expects chat_history and message
-        # Convert messages format
-        chat_history = []
-        user_message = None
-        
-        for msg in messages:
-            role = msg.get('role')
-            content = msg.get('content', '')
-            if role == 'user':
-                if user_message is None:
-                    user_message = content
-                else:
-                    # Add previous user message and this one to history
-                    chat_history.append({"role": "USER", "message": user_message})
-                    chat_history.append({"role": "CHATBOT", "message": content})
-                    user_message = None
-            elif role == 'assistant':
-                if user_message:
-                    chat_history.append({"role": "USER", "message": user_message})
-                    chat_history.append({"role": "CHATBOT", "message": content})
-                    user_message = None
-                else:
-                    # This shouldn't happen, but handle it
-                    if chat_history:
-                        chat_history[-1]["message"] = content
-        
-        # If we have a pending user message, use it
-        if user_message is None and messages:
-            user_message = messages[-1].get('content', '')
+        user_message, chat_history = self._to_cohere_chat(messages)
         
         response = self.client.chat(
             model=model,
             message=user_message or '',
             chat_history=chat_history if chat_history else None,
+            preamble=self._preamble(messages),
             temperature=temperature,
             max_tokens=max_tokens,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'meta', {}).get('tokens', {})
-            if usage:
-                total = int(usage.get('total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(usage.get('input_tokens', 0) or 0)
-                    ct = int(usage.get('output_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'meta', None))
         
         return response.text
-
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat with Cohere (async)"""
+        model = kwargs.get('model', self.get_default_model())
+        user_message, chat_history = self._to_cohere_chat(messages)
+        response = await self._async_client().chat(
+            model=model,
+            message=user_message or '',
+            chat_history=chat_history if chat_history else None,
+            preamble=self._preamble(messages),
+            temperature=kwargs.get('temperature', 0.7),
+            max_tokens=kwargs.get('max_tokens'),
+        )
+        self._report_usage(getattr(response, 'meta', None))
+        return response.text
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text using Cohere (async)"""
+        return await self.achat([{"role": "user", "content": prompt}], **kwargs)
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text using Cohere (async streaming)"""
+        async for text in self.achat_stream([{"role": "user", "content": prompt}], **kwargs):
+            yield text
+    
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Chat with Cohere (async streaming)"""
+        model = kwargs.get('model', self.get_default_model())
+        user_message, chat_history = self._to_cohere_chat(messages)
+        meta = None
+        async for event in self._async_client().chat_stream(
+            model=model,
+            message=user_message or '',
+            chat_history=chat_history if chat_history else None,
+            preamble=self._preamble(messages),
+            temperature=kwargs.get('temperature', 0.7),
+            max_tokens=kwargs.get('max_tokens'),
+        ):
+            if event.event_type == 'text-generation' and getattr(event, 'text', None):
+                yield event.text
+            elif event.event_type == 'stream-end':
+                meta = getattr(getattr(event, 'response', None), 'meta', None)
+        self._report_usage(meta)
@@ -4,13 +4,21 @@ try:
 except ImportError:
     genai = None
 
-from typing import List, Dict, Iterator, Optional, Any
-from ffmcp.providers.base import BaseProvider
+import datetime
+import logging
+import time
+from typing import List, Dict, Iterator, AsyncIterator, Optional, Any
+from ffmcp.providers.base import BaseProvider, _to_thread
+
+
+logger = logging.getLogger('ffmcp.providers.gemini')
 
 
 class GeminiProvider(BaseProvider):
     """Google Gemini provider"""
     
+    usage_format = 'gemini'
+    
     def __init__(self, config):
         if genai is None:
             raise ImportError("google-generativeai package not installed. Install with: pip install google-generativeai")
@@ -18,6 +26,91 @@ class GeminiProvider(BaseProvider):
         genai.configure(api_key=self.api_key)
         self.client = genai
     
+    @staticmethod
+    def _to_gemini_chat(messages: List[Dict[str, str]]):
+        """Split messages into Gemini's (system instruction, history, last message)."""
+        # All system messages (instructions, memory, summary) form the system instruction
+        system_parts = []
+        chat_messages = []
+        for msg in messages:
+            role = msg.get('role')
+            content = msg.get('content', '')
+            if role == 'system':
+                if content:
+                    system_parts.append(content)
+            elif role == 'user':
+                chat_messages.append({'role': 'user', 'parts': [content]})
+            elif role == 'assistant':
+                chat_messages.append({'role': 'model', 'parts': [content]})
+        system_msg = '\n\n'.join(system_parts) or None
+        
+        # Build history (all but the last message)
+        history = chat_messages[:-1] if len(chat_messages) > 1 else []
+        
+        # Send the last message
+        last_content = chat_messages[-1]['parts'][0] if chat_messages else messages[-1].get('content', '')
+        return system_msg, history, last_content
+    
+    @staticmethod
+    def _generation_config(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        generation_config = {
+            'temperature': kwargs.get('temperature', 0.7),
+        }
+        if kwargs.get('max_tokens'):
+            generation_config['max_output_tokens'] = kwargs['max_tokens']
+        return generation_config
+    
+    def _chat_model(self, model_name: str, system_msg: Optional[str] = None):
+        """GenerativeModel with a system instruction, read from cached content when it is cached."""
+        if not system_msg:
+            return self.client.GenerativeModel(model_name)
+        try:
+            cached = self._cached_content(model_name, system_msg)
+        except Exception as e:
+            # Caching never fails a request
+            logger.debug("gemini cached content unavailable: %s", e)
+            cached = None
+        if cached is not None:
+            return cached
+        return self.client.GenerativeModel(model_name, system_instruction=system_msg)
+    
+    def _cached_content(self, model_name: str, system_msg: str):
+        """Model over cached content holding system_msg, if worth caching (see ffmcp.prompt_cache)."""
+        from google.generativeai import caching
+        from ffmcp.prompt_cache import gemini_caches, prefix_key, settings
+        from ffmcp.tokenizer import token_counter
+        
+        options = settings(self.config)
+        if not options['enabled']:
+            return None
+        if token_counter(self.get_provider_name(), model_name, self.config).count(system_msg) < options['gemini_min_tokens']:
+            return None
+        registry = gemini_caches(self.config)
+        key = prefix_key([system_msg], model_name)
+        name, create = registry.lookup(key, options['gemini_ttl'])
+        if name:
+            try:
+                return self.client.GenerativeModel.from_cached_content(cached_content=name)
+            except Exception as e:
+                # Deleted or expired early: create it again
+                logger.debug("gemini cached content %s gone: %s", name, e)
+                registry.forget(key)
+                create = True
+        if not create:
+            return None
+        ttl = int(options['gemini_ttl'])
+        try:
+            content = caching.CachedContent.create(
+                model=model_name, system_instruction=system_msg, ttl=datetime.timedelta(seconds=ttl),
+            )
+        except Exception as e:
+            # E.g. a model without caching or a prefix under its minimum: do not retry until ttl passes
+            logger.debug("could not create gemini cached content for %s: %s", model_name, e)
+            registry.store(key, None, time.time() + ttl)
+            return None
+        registry.store(key, content.name, time.time() + ttl)
+        return self.client.GenerativeModel.from_cached_content(cached_content=content)
+    
     def get_provider_name(self) -> str:
         return 'gemini'
     
@@ -42,15 +135,7 @@ class GeminiProvider(BaseProvider):
             generation_config=generation_config,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage_metadata', None)
-            if usage:
-                total = int(getattr(usage, 'total_token_count', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage_metadata', None))
         
         return response.text
     
@@ -73,24 +158,12 @@ class GeminiProvider(BaseProvider):
             stream=True,
         )
         
-        total_tokens = 0
+        usage = None
         for chunk in response:
             if chunk.text:
                 yield chunk.text
-            # Try to capture usage from final chunk
-            try:
-                usage = getattr(chunk, 'usage_metadata', None)
-                if usage:
-                    total_tokens = int(getattr(usage, 'total_token_count', 0) or 0)
-            except Exception:
-                pass
-        
-        # Record token usage after streaming completes
-        if total_tokens > 0:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens)
-            except Exception:
-                pass
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+        self._report_usage(usage)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with Gemini"""
@@ -100,52 +173,99 @@ class GeminiProvider(BaseProvider):
         
         # Convert messages format for Gemini
         # Gemini uses a chat session model
-        model = self.client.GenerativeModel(model_name)
-        
-        # Extract system message if present
-        system_msg = None
-        chat_messages = []
-        for msg in messages:
-            role = msg.get('role')
-            content = msg.get('content', '')
-            if role == 'system':
-                system_msg = content
-            elif role == 'user':
-                chat_messages.append({'role': 'user', 'parts': [content]})
-            elif role == 'assistant':
-                chat_messages.append({'role': 'model', 'parts': [content]})
-        
-        # Build history (all but the last message)
-        history = chat_messages[:-1] if len(chat_messages) > 1 else []
+        system_msg, history, last_content = self._to_gemini_chat(messages)
+        model = self._chat_model(model_name, system_msg)
         
         # Start chat with history
         chat = model.start_chat(history=history)
         
-        # Send the last message
-        last_content = chat_messages[-1]['parts'][0] if chat_messages else messages[-1].get('content', '')
-        
         generation_config = {
             'temperature': temperature,
         }
         if max_tokens:
             generation_config['max_output_tokens'] = max_tokens
-        if system_msg:
-            generation_config['system_instruction'] = system_msg
         
         response = chat.send_message(
             last_content,
             generation_config=generation_config,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage_metadata', None)
-            if usage:
-                total = int(getattr(usage, 'total_token_count', 0) or 0)
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage_metadata', None))
         
         return response.text
-
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with Gemini (streaming)"""
+        model_name = kwargs.get('model', self.get_default_model())
+        system_msg, history, last_content = self._to_gemini_chat(messages)
+        chat = self._chat_model(model_name, system_msg).start_chat(history=history)
+        response = chat.send_message(
+            last_content,
+            generation_config=self._generation_config(kwargs),
+            stream=True,
+        )
+        usage = None
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+        self._report_usage(usage)
+    
+    # google-generativeai has no separate async client: the *_async methods
+    # of the module-level client are used.
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text using Gemini (async)"""
+        model_name = kwargs.get('model', self.get_default_model())
+        model = self.client.GenerativeModel(model_name)
+        response = await model.generate_content_async(prompt, generation_config=self._generation_config(kwargs))
+        self._report_usage(getattr(response, 'usage_metadata', None))
+        return response.text
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text using Gemini (async streaming)"""
+        model_name = kwargs.get('model', self.get_default_model())
+        model = self.client.GenerativeModel(model_name)
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=self._generation_config(kwargs),
+            stream=True,
+        )
+        usage = None
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+        self._report_usage(usage)
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat with Gemini (async)"""
+        model_name = kwargs.get('model', self.get_default_model())
+        system_msg, history, last_content = self._to_gemini_chat(messages)
+        # Looking up (or creating) cached content is a blocking call
+        model = await _to_thread(self._chat_model, model_name, system_msg)
+        chat = model.start_chat(history=history)
+        response = await chat.send_message_async(
+            last_content,
+            generation_config=self._generation_config(kwargs),
+        )
+        self._report_usage(getattr(response, 'usage_metadata', None))
+        return response.text
+    
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Chat with Gemini (async streaming)"""
+        model_name = kwargs.get('model', self.get_default_model())
+        system_msg, history, last_content = self._to_gemini_chat(messages)
+        model = await _to_thread(self._chat_model, model_name, system_msg)
+        chat = model.start_chat(history=history)
+        response = await chat.send_message_async(
+            last_content,
+            generation_config=self._generation_config(kwargs),
+            stream=True,
+        )
+        usage = None
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+        self._report_usage(usage)
@@ -1,21 +1,32 @@
 """Groq provider implementation"""
 try:
-    from groq import Groq
+    from groq import Groq, AsyncGroq
 except ImportError:
     Groq = None
+    AsyncGroq = None
 
 from typing import List, Dict, Iterator, Optional, Any
 from ffmcp.providers.base import BaseProvider
+from ffmcp.providers.openai_compat import AsyncChatCompletionsMixin
 
 
-class GroqProvider(BaseProvider):
+class GroqProvider(AsyncChatCompletionsMixin, BaseProvider):
     """Groq provider (OpenAI-compatible)"""
     
     def __init__(self, config):
         if Groq is None:
             raise ImportError("groq package not installed. Install with: pip install groq")
         super().__init__(config)
-        self.client = Groq(api_key=self.api_key)
+        self.client = self._shared_client(
+            lambda http_client: Groq(api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=Groq,
+        )
+    
+    def _async_client(self):
+        return self._shared_async_client(
+            lambda http_client: AsyncGroq(api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=AsyncGroq,
+        )
     
     def get_provider_name(self) -> str:
         return 'groq'
@@ -36,54 +47,35 @@ class GroqProvider(BaseProvider):
             max_tokens=max_tokens,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(getattr(usage, 'prompt_tokens', 0) or 0)
-                    ct = int(getattr(usage, 'completion_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         return response.choices[0].message.content
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using Groq (streaming)"""
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with Groq (streaming)"""
         model = kwargs.get('model', self.get_default_model())
         temperature = kwargs.get('temperature', 0.7)
         max_tokens = kwargs.get('max_tokens')
         
         stream = self.client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             stream=True,
         )
         
-        total_tokens_detected = None
+        usage = None
         for chunk in stream:
-            if chunk.choices[0].delta.content:
+            if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
-            # Try to capture usage from final chunk
-            try:
-                usage = getattr(chunk, 'usage', None)
-                if usage and getattr(usage, 'total_tokens', None) is not None:
-                    total_tokens_detected = int(usage.total_tokens)
-            except Exception:
-                pass
-        
-        # Record token usage after streaming completes
-        if total_tokens_detected:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens_detected)
-            except Exception:
-                pass
+            # Usage arrives on the last chunk when the API includes it
+            usage = getattr(chunk, 'usage', None) or usage
+        self._report_usage(usage)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with Groq"""
@@ -98,19 +90,7 @@ class GroqProvider(BaseProvider):
             max_tokens=max_tokens,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(getattr(usage, 'prompt_tokens', 0) or 0)
-                    ct = int(getattr(usage, 'completion_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         return response.choices[0].message.content
 
@@ -4,7 +4,7 @@ try:
 except ImportError:
     Mistral = None
 
-from typing import List, Dict, Iterator, Optional, Any
+from typing import List, Dict, Iterator, AsyncIterator, Optional, Any
 from ffmcp.providers.base import BaseProvider
 
 
@@ -15,7 +15,14 @@ class MistralProvider(BaseProvider):
         if Mistral is None:
             raise ImportError("mistralai package not installed. Install with: pip install mistralai")
         super().__init__(config)
-        self.client = Mistral(api_key=self.api_key)
+        self.client = self._shared_client(
+            lambda http_client: Mistral(api_key=self.api_key, client=http_client),
+        )
+    
+    def _async_client(self):
+        return self._shared_async_client(
+            lambda http_client: Mistral(api_key=self.api_key, async_client=http_client),
+        )
     
     def get_provider_name(self) -> str:
         return 'mistral'
@@ -36,53 +43,35 @@ class MistralProvider(BaseProvider):
             max_tokens=max_tokens,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(getattr(usage, 'prompt_tokens', 0) or 0)
-                    ct = int(getattr(usage, 'completion_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         return response.choices[0].message.content
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using Mistral (streaming)"""
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with Mistral (streaming)"""
         model = kwargs.get('model', self.get_default_model())
         temperature = kwargs.get('temperature', 0.7)
         max_tokens = kwargs.get('max_tokens')
         
         stream = self.client.chat.stream(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
         )
         
-        total_tokens_detected = None
-        for chunk in stream:
+        usage = None
+        for event in stream:
+            # mistralai wraps each chunk in an event with a .data payload
+            chunk = getattr(event, 'data', event)
             if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
-            # Try to capture usage from final chunk
-            try:
-                usage = getattr(chunk, 'usage', None)
-                if usage and getattr(usage, 'total_tokens', None) is not None:
-                    total_tokens_detected = int(usage.total_tokens)
-            except Exception:
-                pass
-        
-        # Record token usage after streaming completes
-        if total_tokens_detected:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens_detected)
-            except Exception:
-                pass
+            usage = getattr(chunk, 'usage', None) or usage
+        self._report_usage(usage)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with Mistral"""
@@ -97,19 +86,45 @@ class MistralProvider(BaseProvider):
             max_tokens=max_tokens,
         )
         
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            if usage:
-                total = int(getattr(usage, 'total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(getattr(usage, 'prompt_tokens', 0) or 0)
-                    ct = int(getattr(usage, 'completion_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         return response.choices[0].message.content
-
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat with Mistral (async)"""
+        model = kwargs.get('model', self.get_default_model())
+        response = await self._async_client().chat.complete_async(
+            model=model,
+            messages=messages,
+            temperature=kwargs.get('temperature', 0.7),
+            max_tokens=kwargs.get('max_tokens'),
+        )
+        self._report_usage(getattr(response, 'usage', None))
+        return response.choices[0].message.content
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text using Mistral (async)"""
+        return await self.achat([{"role": "user", "content": prompt}], **kwargs)
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text using Mistral (async streaming)"""
+        async for chunk in self.achat_stream([{"role": "user", "content": prompt}], **kwargs):
+            yield chunk
+    
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Chat with Mistral (async streaming)"""
+        model = kwargs.get('model', self.get_default_model())
+        stream = await self._async_client().chat.stream_async(
+            model=model,
+            messages=messages,
+            temperature=kwargs.get('temperature', 0.7),
+            max_tokens=kwargs.get('max_tokens'),
+        )
+        usage = None
+        async for event in stream:
+            # mistralai wraps each chunk in an event with a .data payload
+            chunk = getattr(event, 'data', event)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            usage = getattr(chunk, 'usage', None) or usage
+        self._report_usage(usage)
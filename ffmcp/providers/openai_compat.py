@@ -0,0 +1,66 @@
+"""Async chat completions shared by OpenAI-compatible providers"""
+from typing import Any, AsyncIterator, Dict, List
+
+
+class AsyncChatCompletionsMixin:
+    """Native agenerate/achat/astream/achat_stream over an OpenAI-style async client.
+
+    For providers whose SDK has an async client exposing
+    ``chat.completions.create`` (openai, deepseek, groq, together, ...).
+    The provider implements ``_async_client()``, returning its shared
+    async SDK client (see BaseProvider._shared_async_client).
+    """
+
+    # Ask for usage on the last chunk of a stream (stream_options; not every compatible API accepts it)
+    stream_usage = False
+    # Send a prompt_cache_key with long system prefixes (see ffmcp.prompt_cache; not every compatible API accepts it)
+    prompt_cache_routing = False
+
+    def _async_client(self):
+        raise NotImplementedError
+
+    def _prompt_cache_params(self, messages: List[Dict[str, Any]], model: str) -> Dict[str, Any]:
+        if not self.prompt_cache_routing:
+            return {}
+        from ffmcp.prompt_cache import openai_cache_key
+        from ffmcp.tokenizer import token_counter
+        key = openai_cache_key(messages, token_counter(self.get_provider_name(), model, self.config), self.config)
+        return {'extra_body': {'prompt_cache_key': key}} if key else {}
+
+    def _completion_params(self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        params = {
+            'model': kwargs.get('model') or self.get_default_model(),
+            'messages': messages,
+            'temperature': kwargs.get('temperature', 0.7),
+        }
+        for key in ('max_tokens', 'tools', 'tool_choice'):
+            if kwargs.get(key):
+                params[key] = kwargs[key]
+        params.update(self._prompt_cache_params(messages, params['model']))
+        return params
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        params = self._completion_params(messages, kwargs)
+        response = await self._async_client().chat.completions.create(**params)
+        self._report_usage(getattr(response, 'usage', None))
+        return response.choices[0].message.content
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        return await self.achat([{"role": "user", "content": prompt}], **kwargs)
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        async for chunk in self.achat_stream([{"role": "user", "content": prompt}], **kwargs):
+            yield chunk
+
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        params = self._completion_params(messages, kwargs)
+        if self.stream_usage:
+            params['stream_options'] = {'include_usage': True}
+        stream = await self._async_client().chat.completions.create(stream=True, **params)
+        usage = None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # Usage arrives on the last chunk when the API includes it
+            usage = getattr(chunk, 'usage', None) or usage
+        self._report_usage(usage)
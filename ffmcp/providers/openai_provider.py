@@ -1,26 +1,40 @@
 """OpenAI provider implementation with full feature support"""
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     import base64
     from pathlib import Path
 except ImportError:
     OpenAI = None
+    AsyncOpenAI = None
     base64 = None
     Path = None
 
 from typing import List, Dict, Iterator, Optional, Any, Union
 from ffmcp.providers.base import BaseProvider
+from ffmcp.providers.openai_compat import AsyncChatCompletionsMixin
 import json
 
 
-class OpenAIProvider(BaseProvider):
+class OpenAIProvider(AsyncChatCompletionsMixin, BaseProvider):
     """OpenAI GPT provider"""
     
+    stream_usage = True
+    prompt_cache_routing = True
+    
     def __init__(self, config):
         if OpenAI is None:
             raise ImportError("openai package not installed. Install with: pip install openai")
         super().__init__(config)
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = self._shared_client(
+            lambda http_client: OpenAI(api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=OpenAI,
+        )
+    
+    def _async_client(self):
+        return self._shared_async_client(
+            lambda http_client: AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0),
+            sdk_class=AsyncOpenAI,
+        )
     
     def get_provider_name(self) -> str:
         return 'openai'
@@ -40,52 +54,37 @@ class OpenAIProvider(BaseProvider):
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                # Fallback: sum prompt + completion
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using OpenAI (streaming)"""
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with OpenAI (streaming)"""
         model = kwargs.get('model', self.get_default_model())
         temperature = kwargs.get('temperature', 0.7)
         max_tokens = kwargs.get('max_tokens')
         
         stream = self.client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             stream=True,
+            # The last chunk then carries the usage (and no choices)
+            stream_options={"include_usage": self.stream_usage},
+            **self._prompt_cache_params(messages, model),
         )
         
-        total_tokens_detected = None
+        usage = None
         for chunk in stream:
-            if chunk.choices[0].delta.content:
+            if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
-            # Best-effort: capture usage when present on a chunk (SDK-dependent)
-            try:
-                usage = getattr(chunk, 'usage', None)
-                if usage and getattr(usage, 'total_tokens', None) is not None:
-                    total_tokens_detected = int(usage.total_tokens)
-            except Exception:
-                pass
-        # After stream ends, record usage if we saw it
-        if total_tokens_detected:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens_detected)
-            except Exception:
-                pass
+            # Usage arrives on the last chunk when the API includes it
+            usage = getattr(chunk, 'usage', None) or usage
+        self._report_usage(usage)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with OpenAI"""
@@ -106,20 +105,10 @@ class OpenAIProvider(BaseProvider):
             params['tools'] = tools
         if tool_choice:
             params['tool_choice'] = tool_choice
+        params.update(self._prompt_cache_params(messages, model))
         
         response = self.client.chat.completions.create(**params)
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
     
     # ========== Vision / Image Understanding ==========
@@ -164,18 +153,7 @@ class OpenAIProvider(BaseProvider):
             params['max_tokens'] = max_tokens
         
         response = self.client.chat.completions.create(**params)
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
     
     def vision_urls(self, prompt: str, image_urls: List[str], **kwargs) -> str:
@@ -204,17 +182,7 @@ class OpenAIProvider(BaseProvider):
         if max_tokens:
             params['max_tokens'] = max_tokens
         response = self.client.chat.completions.create(**params)
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content
 
     # ========== Image Generation (DALL·E) ==========
@@ -402,12 +370,7 @@ class OpenAIProvider(BaseProvider):
             }
         }
         # Count embedding tokens as well
-        try:
-            total = getattr(response.usage, 'total_tokens', None)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(response.usage)
         return result
     
     # ========== Function Calling / Tools ==========
@@ -426,19 +389,9 @@ class OpenAIProvider(BaseProvider):
             tool_choice=tool_choice,
             temperature=temperature,
             max_tokens=max_tokens,
+            **self._prompt_cache_params(messages, model),
         )
-        # Record token usage if available
-        try:
-            usage = getattr(response, 'usage', None)
-            total = getattr(usage, 'total_tokens', None) if usage else None
-            if total is None and usage:
-                pt = getattr(usage, 'prompt_tokens', 0)
-                ct = getattr(usage, 'completion_tokens', 0)
-                total = (pt or 0) + (ct or 0)
-            if total:
-                self.config.add_token_usage(self.get_provider_name(), int(total))
-        except Exception:
-            pass
+        self._report_usage(getattr(response, 'usage', None))
         
         message = response.choices[0].message
         result = {
@@ -589,3 +542,78 @@ class OpenAIProvider(BaseProvider):
             'purpose': file.purpose,
         }
 
+    
+    # ========== Batch API ==========
+    
+    BATCH_ENDPOINT = '/v1/chat/completions'
+    BATCH_DONE = ('completed', 'failed', 'expired', 'cancelled')
+    
+    def create_batch(self, requests: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """Submit chat requests to the Batch API (answered within 24h, at half the price)
+        
+        Each request: {custom_id, messages, model, params}; model and params are optional.
+        The requests are packed into a JSONL file uploaded with upload_file().
+        """
+        import os
+        import tempfile
+        
+        fd, path = tempfile.mkstemp(prefix='ffmcp-batch-', suffix='.jsonl')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for request in requests:
+                    body = dict(request.get('params') or {})
+                    body['model'] = request.get('model') or self.get_default_model()
+                    body['messages'] = request['messages']
+                    line = {'custom_id': request['custom_id'], 'method': 'POST', 'url': self.BATCH_ENDPOINT, 'body': body}
+                    f.write(json.dumps(line, ensure_ascii=False) + '\n')
+            file = self.upload_file(path, purpose='batch')
+        finally:
+            os.unlink(path)
+        batch = self.client.batches.create(
+            input_file_id=file['id'],
+            endpoint=self.BATCH_ENDPOINT,
+            completion_window='24h',
+            metadata=kwargs.get('metadata'),
+        )
+        return self._batch_info(batch)
+    
+    def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Status of a batch"""
+        return self._batch_info(self.client.batches.retrieve(batch_id))
+    
+    def batch_results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        """Results of a finished batch: {custom_id, model, output, usage} or {custom_id, error}"""
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                body = response.get('body') or {}
+                error = record.get('error') or body.get('error')
+                if error or int(response.get('status_code') or 0) >= 400:
+                    message = error.get('message') if isinstance(error, dict) else error
+                    yield {'custom_id': record.get('custom_id'), 'error': message or f"HTTP {response.get('status_code')}"}
+                    continue
+                yield {
+                    'custom_id': record.get('custom_id'),
+                    'model': body.get('model'),
+                    'output': body['choices'][0]['message']['content'],
+                    'usage': body.get('usage'),
+                }
+    
+    def _batch_info(self, batch) -> Dict[str, Any]:
+        counts = batch.request_counts
+        return {
+            'id': batch.id,
+            'status': batch.status,
+            'done': batch.status in self.BATCH_DONE,
+            'total': counts.total if counts else None,
+            'completed': counts.completed if counts else None,
+            'failed': counts.failed if counts else None,
+            'created_at': batch.created_at,
+        }
@@ -4,7 +4,7 @@ try:
 except ImportError:
     httpx = None
 
-from typing import List, Dict, Iterator, Optional, Any
+from typing import List, Dict, Iterator, AsyncIterator, Optional, Any
 from ffmcp.providers.base import BaseProvider
 import json
 
@@ -17,6 +17,8 @@ class PerplexityProvider(BaseProvider):
             raise ImportError("httpx package not installed. Install with: pip install httpx")
         super().__init__(config)
         self.base_url = "https://api.perplexity.ai"
+        # Shared keep-alive client: connections are reused across requests and instances
+        self.client = self._shared_client(lambda http_client: http_client, base_url=self.base_url)
     
     def get_provider_name(self) -> str:
         return 'perplexity'
@@ -24,8 +26,7 @@ class PerplexityProvider(BaseProvider):
     def get_default_model(self) -> str:
         return self.config.get_default_model('perplexity') or 'llama-3.1-sonar-large-128k-online'
     
-    def _make_request(self, messages: List[Dict[str, str]], stream: bool = False, **kwargs) -> Any:
-        """Make API request to Perplexity"""
+    def _build_request(self, client, messages: List[Dict[str, str]], stream: bool, kwargs: Dict[str, Any]):
         model = kwargs.get('model', self.get_default_model())
         temperature = kwargs.get('temperature', 0.7)
         max_tokens = kwargs.get('max_tokens')
@@ -46,55 +47,49 @@ class PerplexityProvider(BaseProvider):
         if stream:
             payload["stream"] = True
         
-        # For streaming, we need to return the client and response
-        # For non-streaming, we can use context manager
-        if stream:
-            client = httpx.Client(timeout=60.0)
-            response = client.post(url, headers=headers, json=payload, stream=True)
-            response.raise_for_status()
-            # Store client on response for cleanup
-            response._client = client
-            return response
-        else:
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                return response
+        timeout = self.config.get_http_settings(self.get_provider_name()).get('timeout') or 60.0
+        return client.build_request("POST", url, headers=headers, json=payload, timeout=timeout)
+    
+    def _make_request(self, messages: List[Dict[str, str]], stream: bool = False, **kwargs) -> Any:
+        """Make API request to Perplexity"""
+        request = self._build_request(self.client, messages, stream, kwargs)
+        # Streaming responses must be closed by the caller to return the connection to the pool
+        response = self.client.send(request, stream=stream)
+        if response.is_error:
+            response.read()
+            response.close()
+        response.raise_for_status()
+        return response
+    
+    def _async_client(self):
+        return self._shared_async_client(lambda http_client: http_client, base_url=self.base_url)
+    
+    def _parse_completion(self, data: Dict[str, Any]) -> str:
+        self._report_usage(data.get('usage', {}))
+        return data['choices'][0]['message']['content']
     
     def generate(self, prompt: str, **kwargs) -> str:
         """Generate text using Perplexity"""
         messages = [{"role": "user", "content": prompt}]
         response = self._make_request(messages, stream=False, **kwargs)
-        data = response.json()
-        
-        # Record token usage if available
-        try:
-            usage = data.get('usage', {})
-            if usage:
-                total = int(usage.get('total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(usage.get('prompt_tokens', 0) or 0)
-                    ct = int(usage.get('completion_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
-        
-        return data['choices'][0]['message']['content']
+        return self._parse_completion(response.json())
     
     def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
         """Generate text using Perplexity (streaming)"""
-        messages = [{"role": "user", "content": prompt}]
+        yield from self.chat_stream([{"role": "user", "content": prompt}], **kwargs)
+    
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Chat with Perplexity (streaming)"""
         response = self._make_request(messages, stream=True, **kwargs)
         
-        total_tokens_detected = None
+        usage = None
         try:
             for line in response.iter_lines():
                 if not line or not line.startswith('data: '):
                     continue
                 if line == 'data: [DONE]':
-                    break
+                    # Read to the end of the body so the connection can be reused
+                    continue
                 
                 try:
                     data = json.loads(line[6:])  # Remove 'data: ' prefix
@@ -103,44 +98,58 @@ class PerplexityProvider(BaseProvider):
                         if 'content' in delta:
                             yield delta['content']
                     
-                    # Try to capture usage
-                    if 'usage' in data:
-                        usage = data['usage']
-                        total = int(usage.get('total_tokens', 0) or 0)
-                        if total > 0:
-                            total_tokens_detected = total
+                    usage = data.get('usage') or usage
                 except json.JSONDecodeError:
                     continue
         finally:
-            # Clean up the client
-            if hasattr(response, '_client'):
-                response._client.close()
+            # Release the connection back to the pool
+            response.close()
         
-        # Record token usage after streaming completes
-        if total_tokens_detected:
-            try:
-                self.config.add_token_usage(self.get_provider_name(), total_tokens_detected)
-            except Exception:
-                pass
+        self._report_usage(usage)
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Chat with Perplexity"""
         response = self._make_request(messages, stream=False, **kwargs)
-        data = response.json()
-        
-        # Record token usage if available
+        return self._parse_completion(response.json())
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat with Perplexity (async)"""
+        client = self._async_client()
+        response = await client.send(self._build_request(client, messages, False, kwargs))
+        response.raise_for_status()
+        return self._parse_completion(response.json())
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text using Perplexity (async)"""
+        return await self.achat([{"role": "user", "content": prompt}], **kwargs)
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text using Perplexity (async streaming)"""
+        async for chunk in self.achat_stream([{"role": "user", "content": prompt}], **kwargs):
+            yield chunk
+    
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Chat with Perplexity (async streaming)"""
+        client = self._async_client()
+        request = self._build_request(client, messages, True, kwargs)
+        response = await client.send(request, stream=True)
+        usage = None
         try:
-            usage = data.get('usage', {})
-            if usage:
-                total = int(usage.get('total_tokens', 0) or 0)
-                if total == 0:
-                    pt = int(usage.get('prompt_tokens', 0) or 0)
-                    ct = int(usage.get('completion_tokens', 0) or 0)
-                    total = pt + ct
-                if total > 0:
-                    self.config.add_token_usage(self.get_provider_name(), total)
-        except Exception:
-            pass
-        
-        return data['choices'][0]['message']['content']
-
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith('data: ') or line == 'data: [DONE]':
+                    continue
+                try:
+                    data = json.loads(line[6:])
+                except json.JSONDecodeError:
+                    continue
+                if data.get('choices'):
+                    delta = data['choices'][0].get('delta', {})
+                    if delta.get('content'):
+                        yield delta['content']
+                usage = data.get('usage') or usage
+        finally:
+            await response.aclose()
+        self._report_usage(usage)
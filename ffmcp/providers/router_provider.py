@@ -0,0 +1,284 @@
+"""Router: a virtual provider that spreads requests over several provider/model targets
+
+Use it as provider `router:<name>` anywhere a provider name is accepted
+(`ffmcp generate -p router:fast`, agents, batch). Each request goes to the
+best available target for the router's strategy (see ffmcp.routing) and
+fails over to the next one when a target errors or exceeds the timeout.
+Targets are called without their own retries, except the last candidate,
+so failing over is fast.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from ffmcp.providers.base import BaseProvider
+from ffmcp.ratelimit import is_transient
+from ffmcp.routing import DEFAULT_ROUTER_SETTINGS, health_tracker, target_key
+
+
+logger = logging.getLogger('ffmcp.router')
+
+# Client errors that mean the target itself is unusable (bad key, unknown model), not the request
+_TARGET_STATUS = {401, 403, 404}
+_DONE = object()
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def _submit(func, *args, **kwargs) -> concurrent.futures.Future:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='ffmcp-router')
+    return _executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def _run_with_timeout(func, timeout: float, *args, **kwargs):
+    """Call func, raising TimeoutError after timeout seconds (the call itself is left to finish)."""
+    if not timeout:
+        return func(*args, **kwargs)
+    future = _submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        raise TimeoutError(f'no response within {timeout:g}s')
+
+
+def _first_chunk(chunks: Iterator, timeout: float):
+    """First item of a stream (or _DONE), raising TimeoutError after timeout seconds.
+
+    A stream that times out is closed once its pending next() returns.
+    """
+    if not timeout:
+        return next(chunks, _DONE)
+    future = _submit(next, chunks, _DONE)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.add_done_callback(lambda _: chunks.close())
+        raise TimeoutError(f'no response within {timeout:g}s')
+
+
+def counts_against_target(exc: BaseException) -> bool:
+    """Whether a failed request says something about the target's health (vs. the request)."""
+    if is_transient(exc) or isinstance(exc, (ImportError, ValueError)):
+        return True
+    for attr in ('status_code', 'status'):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int):
+            return status in _TARGET_STATUS
+    # No HTTP status: a client/transport problem of the target
+    return getattr(getattr(exc, 'response', None), 'status_code', None) is None
+
+
+class RouterProvider(BaseProvider):
+    """Routes each request to the fastest healthy of several provider/model targets"""
+
+    # Targets apply their own rate limits; waiting or retrying here would hold up failover
+    rate_limited = False
+
+    def __init__(self, config, name: str):
+        definition = config.get_router(name)
+        if not definition:
+            raise ValueError(f"Unknown router: {name}. Create it with: ffmcp router create {name} -t provider:model")
+        from ffmcp.response_cache import cache_for
+        self.config = config
+        self.name = name
+        self.api_key = None
+        self.targets: List[Dict[str, Any]] = [dict(t) for t in definition.get('targets') or []]
+        if not self.targets:
+            raise ValueError(f"Router {name} has no targets")
+        self.settings = dict(DEFAULT_ROUTER_SETTINGS)
+        self.settings.update({k: v for k, v in definition.items() if k in self.settings})
+        self.tracker = health_tracker(config)
+        self.cache = cache_for(config)
+        # Target that answered the most recent request
+        self.last_target: Optional[Dict[str, Any]] = None
+        self._providers: Dict[str, BaseProvider] = {}
+
+    def get_provider_name(self) -> str:
+        return f'router:{self.name}'
+
+    def get_default_model(self) -> str:
+        return (self.last_target or self.targets[0])['model']
+
+    # ---------------- Target selection ----------------
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Targets in the order they will be tried for the next request."""
+        now = time.time()
+        stats = {id(t): self.tracker.get(target_key(t['provider'], t['model'])) for t in self.targets}
+        available = [t for t in self.targets if stats[id(t)].available(now)]
+        # Open circuits come last, soonest to close first: better a long shot than no answer
+        tripped = sorted((t for t in self.targets if not stats[id(t)].available(now)), key=lambda t: stats[id(t)].open_until)
+        strategy = self.settings['strategy']
+        if strategy == 'ordered':
+            return available + tripped
+        by_speed = sorted(available, key=lambda t: stats[id(t)].score())
+        if available and strategy == 'weighted':
+            first = random.choices(available, weights=[float(t.get('weight') or 1.0) for t in available])[0]
+            by_speed.remove(first)
+            by_speed.insert(0, first)
+        elif len(by_speed) > 1 and random.random() < float(self.settings['explore']):
+            by_speed.insert(0, by_speed.pop(random.randrange(1, len(by_speed))))
+        return by_speed + tripped
+
+    def _provider(self, target: Dict[str, Any]) -> BaseProvider:
+        from ffmcp.providers import get_provider
+        instance = self._providers.get(target['provider'])
+        if instance is None:
+            instance = self._providers[target['provider']] = get_provider(target['provider'], self.config)
+        return instance
+
+    def _params(self, target: Dict[str, Any], kwargs: Dict[str, Any], last: bool) -> Dict[str, Any]:
+        # The target decides the model; only the last candidate retries (and it has no timeout:
+        # there is nothing left to fail over to)
+        params = {k: v for k, v in kwargs.items() if k != 'model'}
+        params['model'] = target['model']
+        if not last:
+            params['retries'] = 0
+        return params
+
+    def _succeeded(self, target: Dict[str, Any], started: float):
+        self.tracker.record_success(target_key(target['provider'], target['model']), time.monotonic() - started)
+        self.last_target = target
+
+    def _failed(self, target: Dict[str, Any], exc: BaseException):
+        key = target_key(target['provider'], target['model'])
+        if counts_against_target(exc):
+            self.tracker.record_failure(key, self.settings)
+        logger.info("router %s: target %s failed (%s: %s)", self.name, key, type(exc).__name__, exc)
+
+    def _route(self, method: str, args, kwargs: Dict[str, Any]):
+        candidates = self.candidates()
+        error: Optional[BaseException] = None
+        for index, target in enumerate(candidates):
+            try:
+                provider = self._provider(target)
+                func = getattr(provider, method, None)
+                if func is None:
+                    continue
+                # Timed from the request: SDK import and client setup are not the target's latency
+                started = time.monotonic()
+                last = index == len(candidates) - 1
+                params = self._params(target, kwargs, last)
+                result = _run_with_timeout(func, 0 if last else float(self.settings['timeout'] or 0), *args, **params)
+            except Exception as e:
+                self._failed(target, e)
+                error = e
+                continue
+            self._succeeded(target, started)
+            return result
+        if error is None:
+            raise NotImplementedError(f"no target of router {self.name} supports {method}")
+        raise error
+
+    async def _aroute(self, method: str, args, kwargs: Dict[str, Any]):
+        candidates = self.candidates()
+        timeout = float(self.settings['timeout'] or 0) or None
+        error: Optional[BaseException] = None
+        for index, target in enumerate(candidates):
+            try:
+                provider = self._provider(target)
+                started = time.monotonic()
+                last = index == len(candidates) - 1
+                params = self._params(target, kwargs, last)
+                result = await asyncio.wait_for(getattr(provider, method)(*args, **params), None if last else timeout)
+            except Exception as e:
+                self._failed(target, e)
+                error = e
+                continue
+            self._succeeded(target, started)
+            return result
+        raise error
+
+    # ---------------- Provider API ----------------
+    def generate(self, prompt: str, **kwargs) -> str:
+        """Generate text on the best available target"""
+        return self._route('generate', (prompt,), kwargs)
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat on the best available target"""
+        return self._route('chat', (messages,), kwargs)
+
+    def chat_with_tools(self, messages: List[Dict[str, str]], tools: List[Dict], **kwargs) -> Dict[str, Any]:
+        """Chat with function calling on the best available target that supports it"""
+        return self._route('chat_with_tools', (messages, tools), kwargs)
+
+    def _route_stream(self, method: str, args, kwargs: Dict[str, Any]) -> Iterator[str]:
+        # Failover only before the first chunk: after that the answer is committed to a target
+        candidates = self.candidates()
+        timeout = float(self.settings['timeout'] or 0)
+        error: Optional[BaseException] = None
+        for index, target in enumerate(candidates):
+            try:
+                provider = self._provider(target)
+                started = time.monotonic()
+                last = index == len(candidates) - 1
+                chunks = getattr(provider, method)(*args, **self._params(target, kwargs, last))
+                first = _first_chunk(chunks, 0 if last else timeout)
+            except Exception as e:
+                self._failed(target, e)
+                error = e
+                continue
+            self._succeeded(target, started)
+            if first is not _DONE:
+                yield first
+                yield from chunks
+            return
+        raise error
+
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Stream from the best available target (failover only before the first chunk)"""
+        yield from self._route_stream('generate_stream', (prompt,), kwargs)
+
+    def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Stream a chat from the best available target (failover only before the first chunk)"""
+        yield from self._route_stream('chat_stream', (messages,), kwargs)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Generate text on the best available target (async)"""
+        return await self._aroute('agenerate', (prompt,), kwargs)
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Chat on the best available target (async)"""
+        return await self._aroute('achat', (messages,), kwargs)
+
+    async def _aroute_stream(self, method: str, args, kwargs: Dict[str, Any]) -> AsyncIterator[str]:
+        candidates = self.candidates()
+        timeout = float(self.settings['timeout'] or 0) or None
+        error: Optional[BaseException] = None
+        for index, target in enumerate(candidates):
+            chunks = None
+            try:
+                provider = self._provider(target)
+                started = time.monotonic()
+                last = index == len(candidates) - 1
+                chunks = getattr(provider, method)(*args, **self._params(target, kwargs, last))
+                first = await asyncio.wait_for(chunks.__anext__(), None if last else timeout)
+            except StopAsyncIteration:
+                first = _DONE
+            except Exception as e:
+                if chunks is not None:
+                    await chunks.aclose()
+                self._failed(target, e)
+                error = e
+                continue
+            self._succeeded(target, started)
+            if first is not _DONE:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+            return
+        raise error
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Stream from the best available target (async; failover only before the first chunk)"""
+        async for chunk in self._aroute_stream('astream', (prompt,), kwargs):
+            yield chunk
+
+    async def achat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Stream a chat from the best available target (async; failover only before the first chunk)"""
+        async for chunk in self._aroute_stream('achat_stream', (messages,), kwargs):
+            yield chunk
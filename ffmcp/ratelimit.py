@@ -0,0 +1,469 @@
+"""Retries and client-side rate limiting for provider requests
+
+Every provider request method (see BaseProvider.__init_subclass__) runs
+through `limited`, which:
+
+- waits for the (provider, model) token buckets before sending, so
+  configured requests-per-minute and tokens-per-minute limits are spread
+  out instead of tripped (`ffmcp limits -p openai --rpm 500 --tpm 200000`);
+- retries rate limits (429), overloads and 5xx errors, timeouts and
+  dropped connections with exponential backoff and full jitter, waiting
+  at least as long as the server asks via Retry-After / retry-after-ms;
+- reads x-ratelimit-* (OpenAI-compatible) and anthropic-ratelimit-*
+  headers off every pooled HTTP response, and holds back further requests
+  to that provider/model until the reported reset when a quota is used up.
+
+Token costs are counted before the call from the prompt, with the
+model's tokenizer where available (see ffmcp.tokenizer), plus
+max_tokens, which is what providers count against TPM quotas as well.
+API calls that are not model requests (files, assistants, batches) count
+against RPM but cost no tokens. Calls that create something are only
+retried when the request never reached the server (429, refused
+connections): a timeout or 5xx may have created it already. The SDKs' own
+retries are turned off for pooled clients so attempts are not multiplied.
+"""
+import asyncio
+import contextvars
+import email.utils
+import functools
+import inspect
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from ffmcp.tokenizer import TokenCounter, estimate_tokens, messages_tokens, token_counter
+
+
+DEFAULT_RETRY_SETTINGS: Dict[str, Any] = {
+    'max_retries': 4,       # retries after the first attempt (0: fail on the first error)
+    'base_delay': 1.0,      # backoff before retry n is up to base_delay * 2**(n-1) seconds...
+    'max_delay': 60.0,      # ...capped here; Retry-After waits may be longer
+}
+
+# Provider methods that send a request (BaseProvider wraps them with `limited`)
+LIMITED_METHODS = (
+    'generate', 'agenerate', 'generate_stream', 'astream', 'chat', 'achat', 'chat_stream', 'achat_stream',
+    'chat_with_tools', 'create_embedding',
+    'vision', 'vision_urls', 'generate_image', 'generate_image_variation', 'edit_image',
+    'transcribe', 'translate', 'text_to_speech',
+)
+# Other provider methods that call the API: rate limited like requests, without a token cost
+API_METHODS = (
+    'upload_file', 'create_assistant', 'create_thread', 'add_message_to_thread', 'get_thread_messages', 'run_assistant',
+    'create_batch', 'get_batch', 'batch_results',
+)
+# API methods that create something: retried only if the request was never received (see was_not_sent)
+CREATE_METHODS = (
+    'upload_file', 'create_assistant', 'create_thread', 'add_message_to_thread', 'run_assistant', 'create_batch',
+)
+
+TRANSIENT_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+_TRANSIENT_NAMES = ('Timeout', 'Connection', 'RateLimit', 'InternalServer', 'ServiceUnavailable', 'Overloaded')
+# Failures to connect at all (httpx, or the OS under it): nothing was sent
+_UNSENT_NAMES = ('ConnectError', 'ConnectTimeout', 'ConnectionRefusedError')
+
+logger = logging.getLogger('ffmcp.ratelimit')
+
+# The limiter of the request running in this context: response hooks report headers to it,
+# and nested request methods (e.g. agenerate -> achat) do not wait or retry a second time
+_active: contextvars.ContextVar = contextvars.ContextVar('ffmcp_rate_limiter', default=None)
+_limiters: Dict[str, 'RateLimiter'] = {}
+_limiters_lock = threading.Lock()
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failed request is worth retrying (rate limits, 5xx, timeouts, dropped connections)."""
+    for attr in ('status_code', 'status', 'http_status', 'code'):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status in TRANSIENT_STATUS
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return True
+    return any(name in cls.__name__ for cls in type(exc).__mro__ for name in _TRANSIENT_NAMES)
+
+
+def was_not_sent(exc: BaseException) -> bool:
+    """Whether a failed request provably did not reach the server: rejected with 429, or never connected."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if getattr(exc, 'status_code', None) == 429 or getattr(getattr(exc, 'response', None), 'status_code', None) == 429:
+            return True
+        if type(exc).__name__ in _UNSENT_NAMES:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+# ---------------- Header parsing ----------------
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def parse_reset(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds until a reset given as seconds ("20"), a duration ("1m30s", "250ms")
+    or a date (RFC 3339 or HTTP date)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if parts and ''.join(n + u for n, u in parts) == value:
+        return sum(float(n) * _UNITS[u] for n, u in parts)
+    now = time.time() if now is None else now
+    try:
+        from datetime import datetime
+        return max(0.0, datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() - now)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _int_header(headers: Mapping[str, str], *names: str) -> Optional[int]:
+    value = _header(headers, *names)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After, retry-after-ms), if any."""
+    if not headers:
+        return None
+    ms = _header(headers, 'retry-after-ms')
+    if ms is not None:
+        try:
+            return max(0.0, float(ms) / 1000.0)
+        except ValueError:
+            pass
+    return parse_reset(_header(headers, 'retry-after'))
+
+
+def _exception_headers(exc: BaseException) -> Optional[Mapping[str, str]]:
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(exc, 'headers', None)
+    return headers if hasattr(headers, 'get') else None
+
+
+def retry_delay(exc: BaseException, attempt: int, settings: Mapping[str, Any]) -> float:
+    """Seconds to wait before retry number `attempt` (1-based) after exc."""
+    backoff = min(float(settings['max_delay']), float(settings['base_delay']) * 2 ** (attempt - 1))
+    delay = random.uniform(0, backoff)  # full jitter spreads out clients that failed together
+    requested = retry_after(_exception_headers(exc))
+    return max(delay, requested) if requested is not None else delay
+
+
+# ---------------- Token buckets ----------------
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most one minute's worth.
+
+    reserve() takes units right away, letting the level go negative; the
+    returned wait is how long until the level is back at zero. Callers
+    therefore queue in the order they reserved.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than the bucket waits for a full one instead of forever
+        self.level -= min(float(amount), self.capacity)
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def cap(self, remaining: float, now: float):
+        """Lower the level to what the server reports as remaining."""
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """Requests/tokens per minute buckets plus server-reported quota pauses for one provider/model."""
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.name = name
+        self.limits = (rpm, tpm)
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens; returns seconds to wait before sending."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(0.0, self.blocked_until - now)
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+        if wait:
+            logger.info("rate limit %s: waiting %.2fs", self.name, wait)
+        return wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def observe(self, headers: Mapping[str, str]):
+        """Update from x-ratelimit-* / anthropic-ratelimit-* response headers."""
+        now = time.monotonic()
+        for kind, bucket in (('requests', self.requests), ('tokens', self.tokens)):
+            remaining = _int_header(headers, f'x-ratelimit-remaining-{kind}', f'anthropic-ratelimit-{kind}-remaining')
+            if remaining is None:
+                continue
+            if bucket is not None:
+                with self._lock:
+                    bucket.cap(remaining, now)
+            if remaining <= 0:
+                reset = parse_reset(_header(headers, f'x-ratelimit-reset-{kind}', f'anthropic-ratelimit-{kind}-reset'))
+                if reset:
+                    logger.info("rate limit %s: %s quota used up, pausing %.2fs", self.name, kind, reset)
+                    self.pause(reset)
+
+
+def limiter_for(config, provider: str, model: Optional[str]) -> RateLimiter:
+    """The process-wide limiter for a provider/model.
+
+    Limits configured for 'provider:model' apply to that model alone;
+    limits configured for 'provider' are shared by all its other models.
+    """
+    getter = getattr(config, 'get_rate_limits', None)
+    configured = getter() if getter else {}
+    name = f'{provider}:{model}'
+    if name not in configured and provider in configured:
+        name = provider
+    limits = configured.get(name, {})
+    rpm, tpm = limits.get('rpm'), limits.get('tpm')
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None or limiter.limits != (rpm, tpm):
+            limiter = _limiters[name] = RateLimiter(name, rpm, tpm)
+    return limiter
+
+
+def observe_response(response) -> None:
+    """HTTP response hook: report rate-limit headers to the limiter of the running request."""
+    limiter = _active.get()
+    if limiter is not None:
+        limiter.observe(response.headers)
+
+
+async def aobserve_response(response) -> None:
+    observe_response(response)
+
+
+# ---------------- Request wrapper ----------------
+def estimate_cost(args: Tuple, kwargs: Dict[str, Any], counter: Optional[TokenCounter] = None) -> int:
+    """Tokens a request counts against a TPM quota: its prompt plus max_tokens."""
+    prompt = args[0] if args else None
+    if isinstance(prompt, list) and prompt and isinstance(prompt[0], dict):
+        tokens = counter.messages(prompt) if counter else messages_tokens(prompt)
+    elif isinstance(prompt, list):
+        tokens = sum(counter.count(item) if counter else estimate_tokens(item) for item in prompt)
+    else:
+        tokens = counter.count(prompt) if counter else estimate_tokens(prompt)
+    return tokens + int(kwargs.get('max_tokens') or 0)
+
+
+def _cost(provider, limiter: 'RateLimiter', args: Tuple, kwargs: Dict[str, Any]) -> int:
+    if limiter.tokens is None:
+        # No TPM limit: nothing to count
+        return 0
+    name = provider.get_provider_name()
+    try:
+        model = kwargs.get('model') or provider.get_default_model()
+    except Exception:
+        model = kwargs.get('model')
+    return estimate_cost(args, kwargs, token_counter(name, model, provider.config))
+
+
+def _prepare(provider, args: Tuple, kwargs: Dict[str, Any]):
+    """(limiter, retry settings, kwargs without `retries`), or limiter None when nested."""
+    retries = kwargs.pop('retries', None)
+    if _active.get() is not None:
+        return None, None, kwargs
+    config = provider.config
+    name = provider.get_provider_name()
+    try:
+        model = kwargs.get('model') or provider.get_default_model()
+    except Exception:
+        model = kwargs.get('model')
+    getter = getattr(config, 'get_retry_settings', None)
+    settings = getter(name) if getter else dict(DEFAULT_RETRY_SETTINGS)
+    if retries is not None:
+        settings['max_retries'] = int(retries)
+    return limiter_for(config, name, model), settings, kwargs
+
+
+def _next_delay(limiter: RateLimiter, settings: Mapping[str, Any], exc: Exception, attempt: int, replayable: bool = True) -> Optional[float]:
+    """Delay before the next attempt, or None if exc should propagate.
+
+    Requests that are not replayable are only retried if they were not sent.
+    """
+    headers = _exception_headers(exc)
+    if headers:
+        limiter.observe(headers)
+        requested = retry_after(headers)
+        if requested:
+            # The server's wait applies to every request to this provider/model, not just ours
+            limiter.pause(requested)
+    if attempt > int(settings['max_retries']) or not is_transient(exc):
+        return None
+    if not replayable and not was_not_sent(exc):
+        return None
+    delay = retry_delay(exc, attempt, settings)
+    logger.info("%s request failed (%s); retry %d/%d in %.1fs", limiter.name, exc, attempt, settings['max_retries'], delay)
+    return delay
+
+
+def limited(method: Callable) -> Callable:
+    """Wrap a provider request method with rate limiting and retries.
+
+    Pass retries=N to a call to override the configured max_retries for it.
+    Streaming calls are only retried until their first chunk arrives.
+    """
+    if getattr(method, '__ffmcp_limited__', False):
+        return method
+    counted = method.__name__ not in API_METHODS
+    replayable = method.__name__ not in CREATE_METHODS
+
+    if inspect.isasyncgenfunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            limiter, settings, kwargs = _prepare(self, args, kwargs)
+            if limiter is None:
+                async for chunk in method(self, *args, **kwargs):
+                    yield chunk
+                return
+            cost = _cost(self, limiter, args, kwargs) if counted else 0
+            attempt = 0
+            while True:
+                await asyncio.sleep(limiter.reserve(cost))
+                chunks = method(self, *args, **kwargs)
+                started = False
+                try:
+                    while True:
+                        # Only set while the provider runs, not while our caller holds a chunk
+                        token = _active.set(limiter)
+                        try:
+                            chunk = await chunks.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            _active.reset(token)
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    attempt += 1
+                    delay = None if started else _next_delay(limiter, settings, e, attempt, replayable)
+                    if delay is None:
+                        raise
+                finally:
+                    await chunks.aclose()
+                await asyncio.sleep(delay)
+    elif inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            limiter, settings, kwargs = _prepare(self, args, kwargs)
+            if limiter is None:
+                return await method(self, *args, **kwargs)
+            cost = _cost(self, limiter, args, kwargs) if counted else 0
+            attempt = 0
+            while True:
+                await asyncio.sleep(limiter.reserve(cost))
+                token = _active.set(limiter)
+                try:
+                    return await method(self, *args, **kwargs)
+                except Exception as e:
+                    attempt += 1
+                    delay = _next_delay(limiter, settings, e, attempt, replayable)
+                    if delay is None:
+                        raise
+                finally:
+                    _active.reset(token)
+                await asyncio.sleep(delay)
+    elif inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            limiter, settings, kwargs = _prepare(self, args, kwargs)
+            if limiter is None:
+                yield from method(self, *args, **kwargs)
+                return
+            cost = _cost(self, limiter, args, kwargs) if counted else 0
+            attempt = 0
+            while True:
+                time.sleep(limiter.reserve(cost))
+                chunks = method(self, *args, **kwargs)
+                started = False
+                try:
+                    while True:
+                        token = _active.set(limiter)
+                        try:
+                            chunk = next(chunks)
+                        except StopIteration:
+                            return
+                        finally:
+                            _active.reset(token)
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    attempt += 1
+                    delay = None if started else _next_delay(limiter, settings, e, attempt, replayable)
+                    if delay is None:
+                        raise
+                finally:
+                    chunks.close()
+                time.sleep(delay)
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            limiter, settings, kwargs = _prepare(self, args, kwargs)
+            if limiter is None:
+                return method(self, *args, **kwargs)
+            cost = _cost(self, limiter, args, kwargs) if counted else 0
+            attempt = 0
+            while True:
+                time.sleep(limiter.reserve(cost))
+                token = _active.set(limiter)
+                try:
+                    return method(self, *args, **kwargs)
+                except Exception as e:
+                    attempt += 1
+                    delay = _next_delay(limiter, settings, e, attempt, replayable)
+                    if delay is None:
+                        raise
+                finally:
+                    _active.reset(token)
+                time.sleep(delay)
+
+    wrapper.__ffmcp_limited__ = True
+    return wrapper
@@ -0,0 +1,54 @@
+"""Name -> class registries that import implementation modules on first use"""
+import importlib
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+
+class LazyRegistry(MutableMapping):
+    """Maps names to classes given as 'package.module:ClassName' import paths.
+
+    Listing names or checking membership imports nothing; a module (and the
+    SDK it wraps) is imported the first time its class is looked up.
+    Classes can also be registered directly: ``registry['name'] = SomeClass``.
+    """
+
+    def __init__(self, paths: Dict[str, str]):
+        self._paths: Dict[str, Any] = dict(paths)
+        self._loaded: Dict[str, type] = {}
+
+    def path(self, name: str) -> str:
+        """Import path of a registered entry (without importing it)."""
+        target = self._paths[name]
+        if isinstance(target, str):
+            return target
+        return f'{target.__module__}:{target.__qualname__}'
+
+    def __getitem__(self, name: str) -> type:
+        cls = self._loaded.get(name)
+        if cls is None:
+            target = self._paths[name]
+            if isinstance(target, str):
+                module_name, _, attr = target.partition(':')
+                target = getattr(importlib.import_module(module_name), attr)
+            cls = self._loaded[name] = target
+        return cls
+
+    def __setitem__(self, name: str, value):
+        self._paths[name] = value
+        self._loaded.pop(name, None)
+
+    def __delitem__(self, name: str):
+        del self._paths[name]
+        self._loaded.pop(name, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, name) -> bool:
+        return name in self._paths
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(self._paths)})'
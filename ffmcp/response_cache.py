@@ -0,0 +1,336 @@
+"""Opt-in on-disk cache of provider responses
+
+Sits in front of the BaseProvider request methods (see
+BaseProvider.__init_subclass__). A request is keyed by a SHA-256 of its
+canonical JSON form: kind, provider, model, prompt/messages/input and the
+remaining parameters. Entries expire after a TTL and the least recently
+used ones are evicted once the cache grows past its size limit.
+
+Streaming calls share the key of the matching non-streaming call: a cached
+completion is replayed as a one-chunk stream, and a fully consumed stream
+is stored as a completion.
+"""
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+DEFAULT_CACHE_SETTINGS: Dict[str, Any] = {
+    'enabled': False,                 # opt-in; `ffmcp --cache` enables it for one invocation
+    'ttl_seconds': 7 * 24 * 3600,     # entries older than this are misses (0: never expire)
+    'max_bytes': 256 * 1024 * 1024,   # evict least recently used entries beyond this
+}
+
+# Provider method -> request kind. Methods of one kind share cache entries.
+CACHED_METHODS: Dict[str, str] = {
+    'generate': 'generate',
+    'agenerate': 'generate',
+    'generate_stream': 'generate',
+    'astream': 'generate',
+    'chat': 'chat',
+    'achat': 'chat',
+    'chat_stream': 'chat',
+    'achat_stream': 'chat',
+    'chat_with_tools': 'chat_with_tools',
+    'create_embedding': 'embedding',
+}
+
+# Eviction trims the cache to this share of max_bytes, so it does not run on every write
+EVICT_TO = 0.9
+
+logger = logging.getLogger('ffmcp.cache')
+
+_override: Optional[bool] = None
+# Set while a cached call runs, so e.g. agenerate -> achat is cached once, not twice
+_in_cached_call: contextvars.ContextVar = contextvars.ContextVar('ffmcp_in_cached_call', default=False)
+_caches: Dict[str, 'ResponseCache'] = {}
+_END = object()
+_caches_lock = threading.Lock()
+
+
+def set_enabled_override(enabled: Optional[bool]):
+    """Force the cache on/off for this process (None: use the config setting)."""
+    global _override
+    _override = enabled
+
+
+def cache_for(config) -> Optional['ResponseCache']:
+    """The shared ResponseCache for a config, or None when caching is off."""
+    getter = getattr(config, 'get_cache_settings', None)
+    settings = getter() if getter else dict(DEFAULT_CACHE_SETTINGS)
+    enabled = settings['enabled'] if _override is None else _override
+    if not enabled:
+        return None
+    path = Path(config.config_dir) / 'cache.db'
+    with _caches_lock:
+        cache = _caches.get(str(path))
+        if cache is None:
+            cache = _caches[str(path)] = ResponseCache(path)
+        cache.ttl_seconds = settings.get('ttl_seconds') or 0
+        cache.max_bytes = settings.get('max_bytes') or 0
+    return cache
+
+
+def request_key(kind: str, provider: str, model: Optional[str], args: Tuple, params: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form of a request."""
+    payload = {
+        'kind': kind,
+        'provider': provider,
+        'model': model,
+        'args': list(args),
+        'params': {k: v for k, v in params.items() if v is not None},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key/value store with TTL, LRU eviction and hit/miss counters."""
+
+    def __init__(self, path: Path, *, ttl_seconds: int = DEFAULT_CACHE_SETTINGS['ttl_seconds'],
+                 max_bytes: int = DEFAULT_CACHE_SETTINGS['max_bytes']):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Upper-bound estimate of the stored bytes; the exact sum is only taken when it crosses max_bytes
+        self._approx_bytes: Optional[int] = None
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                provider TEXT,
+                model TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS stats (kind TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)'
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _count(self, kind: str, column: str):
+        self._conn.execute(
+            f'INSERT INTO stats (kind, {column}) VALUES (?, 1) ON CONFLICT(kind) DO UPDATE SET {column} = {column} + 1',
+            (kind,),
+        )
+
+    def get(self, key: str, kind: str) -> Tuple[bool, Any]:
+        """Return (hit, value); expired entries count as misses."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self._count(kind, 'misses')
+                return False, None
+            self._conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+            self._count(kind, 'hits')
+        return True, json.loads(row[0])
+
+    def put(self, key: str, kind: str, value: Any, *, provider: Optional[str] = None, model: Optional[str] = None):
+        try:
+            data = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return  # not JSON-serializable: leave uncached
+        size = len(data.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, kind, provider, model, value, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, kind, provider, model, data, size, now, now),
+            )
+            if self._approx_bytes is None:
+                self._approx_bytes = self._total_bytes()
+            else:
+                self._approx_bytes += size
+            if self.max_bytes and self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones down to EVICT_TO of max_bytes."""
+        if self.ttl_seconds:
+            self._conn.execute('DELETE FROM entries WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+        total = self._approx_bytes = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO)
+        # Delete least recently used entries until `excess` bytes are freed
+        self._conn.execute(
+            """
+            DELETE FROM entries WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY accessed_at, key) - size AS freed_before FROM entries
+                ) WHERE freed_before < ?
+            )
+            """,
+            (excess,),
+        )
+        self._approx_bytes = self._total_bytes()
+
+    def stats(self) -> Dict[str, Any]:
+        """{ entries, bytes, kinds: { kind: { hits, misses } } }"""
+        with self._lock:
+            entries, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            kinds = {
+                kind: {'hits': hits, 'misses': misses}
+                for kind, hits, misses in self._conn.execute('SELECT kind, hits, misses FROM stats ORDER BY kind')
+            }
+        return {'entries': entries, 'bytes': size, 'kinds': kinds}
+
+    def clear(self, *, stats: bool = False) -> int:
+        """Delete all entries (and the counters if stats); returns entries removed."""
+        with self._lock:
+            removed = self._conn.execute('DELETE FROM entries').rowcount
+            self._approx_bytes = 0
+            if stats:
+                self._conn.execute('DELETE FROM stats')
+            self._conn.execute('VACUUM')
+        return removed
+
+
+def _lookup(provider, kind: str, args: Tuple, kwargs: Dict[str, Any]):
+    cache = getattr(provider, 'cache', None)
+    if cache is None or kwargs.get('cache') is False or _in_cached_call.get():
+        return None, None, None
+    try:
+        model = kwargs.get('model') or provider.get_default_model()
+    except Exception:
+        model = kwargs.get('model')
+    # `retries` (see ffmcp.ratelimit) does not change the response
+    params = {k: v for k, v in kwargs.items() if k not in ('model', 'cache', 'retries')}
+    key = request_key(kind, provider.get_provider_name(), model, args, params)
+    return cache, key, model
+
+
+def _without_cache_flag(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in kwargs.items() if k != 'cache'}
+
+
+def cached(method: Callable, kind: str) -> Callable:
+    """Wrap a provider request method with the response cache.
+
+    Pass cache=False to a call to bypass the cache for it.
+    """
+    if getattr(method, '__ffmcp_cached__', False):
+        return method
+
+    if inspect.isasyncgenfunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache, key, model = _lookup(self, kind, args, kwargs)
+            kwargs = _without_cache_flag(kwargs)
+            if cache is not None:
+                hit, value = cache.get(key, kind)
+                if hit:
+                    yield value
+                    return
+            chunks = []
+            stream = method(self, *args, **kwargs)
+            try:
+                while True:
+                    # Flag only the step into the stream: the consumer runs between chunks
+                    token = _in_cached_call.set(cache is not None)
+                    try:
+                        chunk = await stream.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        _in_cached_call.reset(token)
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                # Close the provider's stream now when the consumer stops early, not at GC
+                await stream.aclose()
+            if cache is not None:
+                cache.put(key, kind, ''.join(chunks), provider=self.get_provider_name(), model=model)
+    elif inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache, key, model = _lookup(self, kind, args, kwargs)
+            kwargs = _without_cache_flag(kwargs)
+            if cache is not None:
+                hit, value = cache.get(key, kind)
+                if hit:
+                    return value
+            token = _in_cached_call.set(cache is not None)
+            try:
+                value = await method(self, *args, **kwargs)
+            finally:
+                _in_cached_call.reset(token)
+            if cache is not None and value is not None:
+                cache.put(key, kind, value, provider=self.get_provider_name(), model=model)
+            return value
+    elif inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache, key, model = _lookup(self, kind, args, kwargs)
+            kwargs = _without_cache_flag(kwargs)
+            if cache is not None:
+                hit, value = cache.get(key, kind)
+                if hit:
+                    yield value
+                    return
+            chunks = []
+            stream = method(self, *args, **kwargs)
+            try:
+                while True:
+                    token = _in_cached_call.set(cache is not None)
+                    try:
+                        chunk = next(stream, _END)
+                    finally:
+                        _in_cached_call.reset(token)
+                    if chunk is _END:
+                        break
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                stream.close()
+            if cache is not None:
+                cache.put(key, kind, ''.join(chunks), provider=self.get_provider_name(), model=model)
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache, key, model = _lookup(self, kind, args, kwargs)
+            kwargs = _without_cache_flag(kwargs)
+            if cache is not None:
+                hit, value = cache.get(key, kind)
+                if hit:
+                    return value
+            token = _in_cached_call.set(cache is not None)
+            try:
+                value = method(self, *args, **kwargs)
+            finally:
+                _in_cached_call.reset(token)
+            if cache is not None and value is not None:
+                cache.put(key, kind, value, provider=self.get_provider_name(), model=model)
+            return value
+
+    wrapper.__ffmcp_cached__ = True
+    return wrapper
@@ -0,0 +1,226 @@
+"""Per-target health for routing requests across providers
+
+A target is one provider/model pair. For each target we keep an EWMA of
+request latency (seconds until the answer, or the first chunk of a
+stream), an EWMA of the error rate, a window of recent latencies and a
+circuit breaker: after `failure_threshold` consecutive failures the target
+is skipped for a cooldown that doubles each time it trips again.
+
+The stats are shared by every router using a target and persisted to
+~/.ffmcp/routing_state.json (at most once per SAVE_INTERVAL and at exit),
+so a fresh CLI process starts out with what earlier runs learned.
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ffmcp.storage import atomic_write_json, file_lock
+
+
+DEFAULT_ROUTER_SETTINGS: Dict[str, Any] = {
+    'strategy': 'latency',      # latency: fastest healthy target; ordered: first healthy; weighted: random by weight
+    'timeout': 60.0,            # seconds before a target counts as failed and the next one is tried (0: none)
+    'failure_threshold': 3,     # consecutive failures that open a target's circuit
+    'cooldown': 30.0,           # seconds a tripped target is skipped (doubles per repeat trip)
+    'max_cooldown': 600.0,
+    'explore': 0.05,            # share of requests sent to a random healthy target to refresh its stats
+}
+
+STRATEGIES = ('latency', 'ordered', 'weighted')
+
+# EWMA weight of the newest sample
+ALPHA = 0.3
+# Latencies kept per target for percentiles
+RECENT_SAMPLES = 50
+SAVE_INTERVAL = 2.0
+
+logger = logging.getLogger('ffmcp.routing')
+
+_trackers: Dict[str, 'HealthTracker'] = {}
+_trackers_lock = threading.Lock()
+
+
+def target_key(provider: str, model: Optional[str]) -> str:
+    return f'{provider}:{model}' if model else provider
+
+
+def parse_target(spec: str) -> Dict[str, Any]:
+    """Parse 'provider:model[@weight]' into {provider, model, weight}."""
+    spec = spec.strip()
+    weight = 1.0
+    if '@' in spec:
+        spec, _, raw = spec.rpartition('@')
+        try:
+            weight = float(raw)
+        except ValueError:
+            raise ValueError(f'invalid weight in target {spec}@{raw!r}')
+        if weight <= 0:
+            raise ValueError(f'weight must be positive: {spec}@{raw}')
+    provider, _, model = spec.partition(':')
+    if not provider or not model:
+        raise ValueError(f'invalid target {spec!r} (expected provider:model[@weight])')
+    return {'provider': provider, 'model': model, 'weight': weight}
+
+
+class TargetStats:
+    """Latency/error statistics and circuit state of one target."""
+
+    __slots__ = ('latency', 'error_rate', 'samples', 'failures', 'open_until', 'cooldown', 'recent', 'updated')
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data or {}
+        self.latency: Optional[float] = data.get('latency')
+        self.error_rate: float = float(data.get('error_rate') or 0.0)
+        self.samples: int = int(data.get('samples') or 0)
+        self.failures: int = int(data.get('failures') or 0)
+        self.open_until: float = float(data.get('open_until') or 0.0)
+        self.cooldown: float = float(data.get('cooldown') or 0.0)
+        self.recent: List[float] = list(data.get('recent') or [])[-RECENT_SAMPLES:]
+        self.updated: float = float(data.get('updated') or 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def available(self, now: float) -> bool:
+        """Circuit closed (or its cooldown is over and the target may be tried again)."""
+        return self.open_until <= now
+
+    def score(self) -> float:
+        """Expected seconds per successful request (lower is better).
+
+        Untried targets score 0 so they get sampled; targets that only ever failed go last.
+        """
+        if self.latency is None:
+            return float('inf') if self.samples else 0.0
+        return self.latency / max(0.05, 1.0 - self.error_rate)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record_success(self, latency: float):
+        self.latency = latency if self.latency is None else ALPHA * latency + (1 - ALPHA) * self.latency
+        self.error_rate = (1 - ALPHA) * self.error_rate
+        self.samples += 1
+        self.failures = 0
+        self.cooldown = 0.0
+        self.open_until = 0.0
+        self.recent = (self.recent + [round(latency, 4)])[-RECENT_SAMPLES:]
+        self.updated = time.time()
+
+    def record_failure(self, settings: Dict[str, Any]) -> bool:
+        """Count a failure; returns True if it opened the circuit."""
+        now = time.time()
+        self.error_rate = ALPHA + (1 - ALPHA) * self.error_rate
+        self.samples += 1
+        self.failures += 1
+        self.updated = now
+        if self.failures < int(settings['failure_threshold']):
+            return False
+        base = float(settings['cooldown'])
+        self.cooldown = min(float(settings['max_cooldown']), self.cooldown * 2 if self.cooldown else base)
+        self.open_until = now + self.cooldown
+        return True
+
+
+class HealthTracker:
+    """Process-wide TargetStats for all targets, persisted to a JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.Lock()
+        self._stats: Dict[str, TargetStats] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        for key, data in self._read().items():
+            self._stats[key] = TargetStats(data)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> TargetStats:
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = TargetStats()
+            return stats
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in self._stats.items()}
+
+    def record_success(self, key: str, latency: float):
+        stats = self.get(key)
+        with self._lock:
+            stats.record_success(latency)
+            self._dirty = True
+        self._maybe_save()
+
+    def record_failure(self, key: str, settings: Dict[str, Any]):
+        stats = self.get(key)
+        with self._lock:
+            opened = stats.record_failure(settings)
+            self._dirty = True
+        if opened:
+            logger.warning("target %s failed %d times in a row; skipping it for %.0fs", key, stats.failures, stats.cooldown)
+        self._maybe_save()
+
+    def reset(self, keys: Optional[List[str]] = None):
+        """Forget the stats of some (or all) targets."""
+        with self._lock:
+            for key in list(self._stats) if keys is None else keys:
+                self._stats[key] = TargetStats({'updated': time.time()})
+            self._dirty = True
+        self.save()
+
+    def _maybe_save(self):
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Merge our stats into the file; per target, the most recently updated entry wins."""
+        with self._lock:
+            if not self._dirty:
+                return
+            ours = {key: stats.to_dict() for key, stats in self._stats.items()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            with file_lock(self.lock_path):
+                merged = self._read()
+                for key, data in ours.items():
+                    if data['updated'] >= float((merged.get(key) or {}).get('updated') or 0.0):
+                        merged[key] = data
+                atomic_write_json(self.path, merged)
+        except OSError as e:
+            logger.debug("could not save routing state: %s", e)
+
+
+def health_tracker(config) -> HealthTracker:
+    """The shared HealthTracker for a config directory."""
+    path = Path(config.config_dir) / 'routing_state.json'
+    with _trackers_lock:
+        tracker = _trackers.get(str(path))
+        if tracker is None:
+            tracker = _trackers[str(path)] = HealthTracker(path)
+    return tracker
+
+
+@atexit.register
+def _save_all():
+    with _trackers_lock:
+        trackers = list(_trackers.values())
+    for tracker in trackers:
+        tracker.save()
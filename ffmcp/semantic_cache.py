@@ -0,0 +1,270 @@
+"""Opt-in semantic cache: answer near-duplicate prompts from earlier responses
+
+The exact-match response cache (see ffmcp.response_cache) misses prompts
+that differ only in wording ("what's the refund policy" / "refund policy?").
+This cache embeds each prompt with the configured embedding provider and
+compares it against the prompts answered before in the same namespace
+(one per agent, plus `generate` and `chat`). The stored answer is reused
+when the cosine similarity reaches the threshold.
+
+Only prompts asked in the same context can match: provider, model, system
+prompt, parameters and any earlier turns form a scope hash that must be
+equal, so a follow-up in one thread is never answered from another.
+Entries expire after a TTL and each namespace keeps at most `max_entries`,
+dropping the least recently used ones.
+"""
+import array
+import hashlib
+import json
+import logging
+import math
+import operator
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+DEFAULT_SEMANTIC_CACHE_SETTINGS: Dict[str, Any] = {
+    'enabled': False,                        # opt-in; `ffmcp --semantic-cache` enables it for one invocation
+    'provider': 'openai',                    # embedding provider (must implement create_embedding)
+    'model': 'text-embedding-3-small',       # embedding model
+    'threshold': 0.92,                       # minimum cosine similarity for a hit
+    'max_entries': 2000,                     # per namespace; least recently used entries go first
+    'ttl_seconds': 7 * 24 * 3600,            # entries older than this never match (0: never expire)
+}
+
+logger = logging.getLogger('ffmcp.semantic_cache')
+
+_override: Optional[bool] = None
+_caches: Dict[str, 'SemanticCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def set_enabled_override(enabled: Optional[bool]):
+    """Force the semantic cache on/off for this process (None: use the config setting)."""
+    global _override
+    _override = enabled
+
+
+def semantic_cache_for(config) -> Optional['SemanticCache']:
+    """The shared SemanticCache for a config, or None when it is off."""
+    getter = getattr(config, 'get_semantic_cache_settings', None)
+    settings = getter() if getter else dict(DEFAULT_SEMANTIC_CACHE_SETTINGS)
+    enabled = settings['enabled'] if _override is None else _override
+    if not enabled:
+        return None
+    path = Path(config.config_dir) / 'semantic_cache.db'
+    with _caches_lock:
+        cache = _caches.get(str(path))
+        if cache is None:
+            cache = _caches[str(path)] = SemanticCache(path, config)
+        cache.settings = settings
+    return cache
+
+
+def scope_key(**parts: Any) -> str:
+    """SHA-256 of everything besides the prompt that shapes the answer."""
+    canonical = json.dumps(
+        {k: v for k, v in parts.items() if v is not None},
+        sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _normalize(vector: Sequence[float]) -> array.array:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return array.array('f', (x / norm for x in vector))
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+class SemanticMatch:
+    """Result of a lookup: the cached answer (None on a miss) and the prompt's embedding."""
+
+    __slots__ = ('answer', 'similarity', 'prompt', 'embedding')
+
+    def __init__(self, answer: Optional[str], similarity: float, prompt: Optional[str], embedding: Optional[array.array]):
+        self.answer = answer
+        self.similarity = similarity
+        self.prompt = prompt
+        self.embedding = embedding
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+
+class SemanticCache:
+    """SQLite store of (namespace, scope, prompt embedding, answer) with a linear cosine search.
+
+    Embeddings are unit-normalized float32 blobs, so similarity is a dot
+    product. A namespace holds at most `max_entries` rows, which keeps the
+    scan cheap without an ANN index.
+    """
+
+    def __init__(self, path: Path, config, settings: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.config = config
+        self.settings = dict(settings or DEFAULT_SEMANTIC_CACHE_SETTINGS)
+        self._embedder = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                embed_model TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_scope ON entries (namespace, scope, embed_model)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS stats (namespace TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)'
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- Embedding ----------------
+    def _embed_model(self) -> str:
+        return f"{self.settings['provider']}:{self.settings['model']}"
+
+    def embed(self, text: str) -> array.array:
+        if self._embedder is None:
+            from ffmcp.providers import get_provider
+            self._embedder = get_provider(self.settings['provider'], self.config)
+        result = self._embedder.create_embedding(text, model=self.settings['model'])
+        return _normalize(result.get('embedding') or result['embeddings'][0])
+
+    # ---------------- Lookup / store ----------------
+    def _count(self, namespace: str, column: str):
+        self._conn.execute(
+            f'INSERT INTO stats (namespace, {column}) VALUES (?, 1) ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1',
+            (namespace,),
+        )
+
+    def lookup(self, namespace: str, prompt: str, *, scope: str) -> SemanticMatch:
+        """Best cached answer for a prompt in (namespace, scope), if it clears the threshold."""
+        embedding = self.embed(prompt)
+        now = time.time()
+        ttl = self.settings.get('ttl_seconds') or 0
+        best: Tuple[float, Optional[int], Optional[str], Optional[str]] = (-1.0, None, None, None)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, prompt, embedding, answer FROM entries '
+                'WHERE namespace = ? AND scope = ? AND embed_model = ? AND created_at >= ?',
+                (namespace, scope, self._embed_model(), now - ttl if ttl else 0),
+            )
+            for row_id, cached_prompt, blob, answer in rows:
+                vector = array.array('f')
+                vector.frombytes(blob)
+                if len(vector) != len(embedding):
+                    continue
+                similarity = _dot(embedding, vector)
+                if similarity > best[0]:
+                    best = (similarity, row_id, cached_prompt, answer)
+            similarity, row_id, cached_prompt, answer = best
+            if row_id is not None and similarity >= float(self.settings['threshold']):
+                self._conn.execute('UPDATE entries SET accessed_at = ?, hits = hits + 1 WHERE id = ?', (now, row_id))
+                self._count(namespace, 'hits')
+                logger.info("semantic cache hit namespace=%s similarity=%.3f", namespace, similarity)
+                return SemanticMatch(answer, similarity, cached_prompt, embedding)
+            self._count(namespace, 'misses')
+        return SemanticMatch(None, max(similarity, 0.0), None, embedding)
+
+    def store(self, namespace: str, prompt: str, answer: str, *, scope: str, embedding: Optional[array.array] = None):
+        """Remember an answer; evicts expired and least recently used entries of the namespace."""
+        if not isinstance(answer, str) or not answer:
+            return
+        if embedding is None:
+            embedding = self.embed(prompt)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO entries (namespace, scope, embed_model, prompt, embedding, answer, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (namespace, scope, self._embed_model(), prompt, embedding.tobytes(), answer, now, now),
+            )
+            self._evict(namespace)
+
+    def _evict(self, namespace: str):
+        ttl = self.settings.get('ttl_seconds') or 0
+        if ttl:
+            self._conn.execute('DELETE FROM entries WHERE namespace = ? AND created_at < ?', (namespace, time.time() - ttl))
+        max_entries = int(self.settings.get('max_entries') or 0)
+        if max_entries:
+            self._conn.execute(
+                'DELETE FROM entries WHERE namespace = ? AND id NOT IN ('
+                'SELECT id FROM entries WHERE namespace = ? ORDER BY accessed_at DESC, id DESC LIMIT ?)',
+                (namespace, namespace, max_entries),
+            )
+
+    # ---------------- Maintenance ----------------
+    def stats(self) -> Dict[str, Any]:
+        """{ namespace: { entries, hits, misses } }"""
+        with self._lock:
+            result: Dict[str, Dict[str, int]] = {}
+            for namespace, entries in self._conn.execute('SELECT namespace, COUNT(*) FROM entries GROUP BY namespace'):
+                result[namespace] = {'entries': entries, 'hits': 0, 'misses': 0}
+            for namespace, hits, misses in self._conn.execute('SELECT namespace, hits, misses FROM stats'):
+                result.setdefault(namespace, {'entries': 0})
+                result[namespace].update(hits=hits, misses=misses)
+        return dict(sorted(result.items()))
+
+    def clear(self, namespace: Optional[str] = None, *, stats: bool = False) -> int:
+        """Delete entries (of one namespace, or all) and optionally their counters; returns entries removed."""
+        where, args = ('WHERE namespace = ?', (namespace,)) if namespace else ('', ())
+        with self._lock:
+            removed = self._conn.execute(f'DELETE FROM entries {where}', args).rowcount
+            if stats:
+                self._conn.execute(f'DELETE FROM stats {where}', args)
+            if not namespace:
+                self._conn.execute('VACUUM')
+        return removed
+
+
+def lookup(config, namespace: str, prompt: str, *, scope: str) -> Tuple[Optional['SemanticCache'], Optional[SemanticMatch]]:
+    """(cache, match) for a prompt, or (None, None) when the cache is off or unusable.
+
+    Embedding failures (missing key, provider without embeddings) are
+    logged and treated as "no cache" so they never fail the request.
+    """
+    cache = semantic_cache_for(config)
+    if cache is None or not (prompt or '').strip():
+        return None, None
+    try:
+        return cache, cache.lookup(namespace, prompt, scope=scope)
+    except Exception as e:
+        logger.warning("semantic cache unavailable: %s", e)
+        return None, None
+
+
+def remember(cache: Optional['SemanticCache'], match: Optional[SemanticMatch], namespace: str, prompt: str, answer: Any, *, scope: str):
+    """Store an answer after a miss returned by lookup(); no-op when the cache is off."""
+    if cache is None or match is None or match.hit:
+        return
+    try:
+        cache.store(namespace, prompt, answer, scope=scope, embedding=match.embedding)
+    except Exception as e:
+        logger.warning("semantic cache store failed: %s", e)
+
+
+def context_scope(provider: str, model: Optional[str], messages: List[Dict[str, Any]], **params: Any) -> str:
+    """Scope for a chat request: provider, model, params and every message but the final prompt."""
+    return scope_key(provider=provider, model=model, context=messages[:-1], params=params or None)
@@ -0,0 +1,207 @@
+"""Low-level file helpers shared by ffmcp's on-disk stores"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+else:
+    msvcrt = None
+
+
+@contextmanager
+def file_lock(path: Path, *, shared: bool = False):
+    """Hold an advisory cross-process lock on ``path`` (created if missing).
+
+    Shared locks may be held by many processes at once; an exclusive lock
+    waits for all of them. On Windows every lock is exclusive.
+    """
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            # Blocks (retrying for ~10s per attempt) until the first byte is ours
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path: Path, data: Any, *, indent: int = 2):
+    """Write JSON to ``path`` via a temp file + rename so readers never see a partial file."""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, str(path))
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def append_line(path: Path, line: str):
+    """Append a single line with one O_APPEND write (atomic for small records)."""
+    data = (line.rstrip('\n') + '\n').encode('utf-8')
+    fd = os.open(str(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+_MISSING = object()
+
+
+def merge_changes(base: dict, ours: dict, theirs: dict) -> dict:
+    """Three-way merge of two-level JSON dicts.
+
+    Applies the changes between ``base`` (what we loaded) and ``ours`` (what
+    we have now) on top of ``theirs`` (what is on disk now). Changes are
+    tracked per top-level key and, for dict values, per second-level key, so
+    two processes editing different agents/threads/keys do not clobber each
+    other. If both sides changed the same entry, ours wins.
+    """
+    result = dict(theirs)
+    for key in set(base) | set(ours):
+        b = base.get(key, _MISSING)
+        o = ours.get(key, _MISSING)
+        if b == o:
+            continue
+        t = result.get(key, _MISSING)
+        if (b is _MISSING or isinstance(b, dict)) and isinstance(o, dict) and isinstance(t, dict):
+            b = {} if b is _MISSING else b
+            merged = dict(t)
+            for sub in set(b) | set(o):
+                bv = b.get(sub, _MISSING)
+                ov = o.get(sub, _MISSING)
+                if bv == ov:
+                    continue
+                if ov is _MISSING:
+                    merged.pop(sub, None)
+                else:
+                    merged[sub] = ov
+            result[key] = merged
+        elif o is _MISSING:
+            result.pop(key, None)
+        else:
+            result[key] = o
+    return result
+
+
+def read_json_object(path: Path) -> dict:
+    """Read a JSON object file ({} if missing).
+
+    A file that fails to parse is moved aside to ``<file>.corrupt-<ts>``, so
+    the caller's next write cannot silently replace what it held.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return data
+        raise ValueError('top-level JSON value is not an object')
+    except (ValueError, OSError) as e:
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        backup = path.with_name(f'{path.name}.corrupt-{stamp}')
+        try:
+            os.replace(str(path), str(backup))
+        except OSError:
+            backup = None
+        logging.getLogger('ffmcp.storage').warning(
+            "Could not parse %s (%s); moved it to %s and starting empty",
+            path, e, backup or '(move failed)',
+        )
+        return {}
+
+
+class JsonDocument:
+    """A JSON object file that can be shared by threads and processes.
+
+    - Loads lazily on first access to ``data``.
+    - ``save()`` takes an advisory lock on ``<file>.lock``, re-reads the file,
+      merges our changes since the last load/save into it (merge_changes) and
+      replaces the file atomically, so concurrent writers don't lose updates
+      and a crash never leaves a half-written file.
+    - A file that fails to parse is moved aside to ``<file>.corrupt-<ts>``
+      instead of being silently overwritten.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.RLock()
+        self._data: Optional[dict] = None
+        self._base: dict = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    with file_lock(self.lock_path, shared=True):
+                        disk = self._read()
+                    self._base = _copy(disk)
+                    self._data = disk
+        return self._data
+
+    def _read(self) -> dict:
+        return read_json_object(self.path)
+
+    def save(self):
+        """Merge our changes into the file on disk and write it atomically.
+
+        Does nothing if the data has not changed since it was loaded/saved.
+        """
+        with self._lock:
+            ours = self.data
+            if ours == self._base:
+                return
+            with file_lock(self.lock_path):
+                merged = merge_changes(self._base, ours, self._read())
+                atomic_write_json(self.path, merged)
+            # Update in place so callers holding references keep a live dict
+            ours.clear()
+            ours.update(merged)
+            self._base = _copy(merged)
+
+
+def _copy(data: dict) -> dict:
+    return json.loads(json.dumps(data))
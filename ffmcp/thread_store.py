@@ -0,0 +1,671 @@
+"""SQLite-backed storage for agent and chat thread messages"""
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ffmcp.tokenizer import CHARS_PER_TOKEN, MESSAGE_OVERHEAD, message_tokens
+
+
+# Chat threads (not tied to an agent) are stored under this agent key.
+# Agent names can never be empty, so it cannot collide with a real agent.
+CHAT_SCOPE = ''
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ThreadStore:
+    """Stores threads in SQLite (WAL mode) with one row per message.
+
+    Messages are keyed by (agent, thread, seq) so appending a message or
+    reading a single thread never touches the rest of the history. Each
+    thread row also keeps its message count, last seq and last-updated time,
+    so listing threads never scans messages, and each message caches its
+    estimated token count for prompt budgeting.
+
+    Compaction folds older messages into a per-thread summary: messages up
+    to summary_seq stay in the table (archived) but are skipped by
+    get_recent_messages(), which builds prompts.
+
+    Message text is indexed with SQLite FTS5 (kept in sync by triggers) for
+    search(); without FTS5 support, search() falls back to a LIKE scan.
+    """
+
+    SCHEMA_VERSION = 5
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._tx_depth = 0
+        self._fts: Optional[bool] = None
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=30.0,
+            isolation_level=None,  # explicit BEGIN/COMMIT below
+            check_same_thread=False,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._migrate_schema()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- Schema ----------------
+    def _migrate_schema(self):
+        if self._schema_version() >= self.SCHEMA_VERSION:
+            return
+        with self.transaction():
+            # Read again under the write lock: another process opening the same
+            # database may have migrated it since (the ALTERs cannot run twice)
+            version = self._schema_version()
+            if version >= self.SCHEMA_VERSION:
+                return
+            if version < 1:
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS threads (
+                        id INTEGER PRIMARY KEY,
+                        agent TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        UNIQUE (agent, name)
+                    )
+                    """
+                )
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS messages (
+                        id INTEGER PRIMARY KEY,
+                        thread_id INTEGER NOT NULL REFERENCES threads(id) ON DELETE CASCADE,
+                        seq INTEGER NOT NULL,
+                        role TEXT,
+                        content TEXT,
+                        timestamp TEXT NOT NULL,
+                        UNIQUE (thread_id, seq)
+                    )
+                    """
+                )
+            if version < 2:
+                self._conn.execute('ALTER TABLE threads ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute('ALTER TABLE threads ADD COLUMN last_seq INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute('ALTER TABLE threads ADD COLUMN updated_at TEXT')
+                self._conn.execute(
+                    """
+                    UPDATE threads SET
+                        message_count = (SELECT COUNT(*) FROM messages m WHERE m.thread_id = threads.id),
+                        last_seq = (SELECT COALESCE(MAX(seq), 0) FROM messages m WHERE m.thread_id = threads.id),
+                        updated_at = COALESCE(
+                            (SELECT MAX(timestamp) FROM messages m WHERE m.thread_id = threads.id),
+                            created_at
+                        )
+                    """
+                )
+                self._conn.execute(
+                    'CREATE INDEX IF NOT EXISTS messages_thread_timestamp ON messages (thread_id, timestamp)'
+                )
+            if version < 3:
+                self._conn.execute('ALTER TABLE messages ADD COLUMN tokens INTEGER')
+                # Same estimate as ffmcp.tokenizer.message_tokens, done in SQL
+                self._conn.execute(
+                    f"""
+                    UPDATE messages SET tokens =
+                        {MESSAGE_OVERHEAD} + (COALESCE(length(content), 0) + {CHARS_PER_TOKEN - 1}) / {CHARS_PER_TOKEN}
+                    """
+                )
+            if version < 4:
+                self._conn.execute('ALTER TABLE threads ADD COLUMN summary TEXT')
+                self._conn.execute('ALTER TABLE threads ADD COLUMN summary_seq INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute('ALTER TABLE threads ADD COLUMN summary_updated_at TEXT')
+                self._conn.execute('ALTER TABLE threads ADD COLUMN unsummarized_tokens INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute(
+                    """
+                    UPDATE threads SET unsummarized_tokens =
+                        (SELECT COALESCE(SUM(tokens), 0) FROM messages m WHERE m.thread_id = threads.id)
+                    """
+                )
+            if version < 5:
+                self._create_fts_index()
+            self._conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+
+    def _schema_version(self) -> int:
+        return self._conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def _create_fts_index(self):
+        try:
+            self._conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                    content, content='messages', content_rowid='id', tokenize='porter unicode61'
+                )
+                """
+            )
+        except sqlite3.OperationalError as e:
+            logging.getLogger('ffmcp.threads').warning(
+                "SQLite FTS5 is unavailable (%s); thread search will scan messages", e
+            )
+            return
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+            END
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+            END
+            """
+        )
+        self._conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+    def _has_fts(self) -> bool:
+        if self._fts is None:
+            self._fts = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+            ).fetchone() is not None
+        return self._fts
+
+    # ---------------- Transactions ----------------
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one SQLite transaction (re-entrant)."""
+        with self._lock:
+            outermost = self._tx_depth == 0
+            if outermost:
+                self._conn.execute('BEGIN IMMEDIATE')
+            self._tx_depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._tx_depth -= 1
+                if outermost:
+                    self._conn.execute('ROLLBACK')
+                raise
+            else:
+                self._tx_depth -= 1
+                if outermost:
+                    self._conn.execute('COMMIT')
+
+    # ---------------- Threads ----------------
+    def _thread_id(self, agent: str, name: str) -> Optional[int]:
+        row = self._conn.execute(
+            'SELECT id FROM threads WHERE agent = ? AND name = ?', (agent, name)
+        ).fetchone()
+        return row['id'] if row else None
+
+    def _ensure_thread(self, agent: str, name: str, created_at: Optional[str] = None) -> int:
+        thread_id = self._thread_id(agent, name)
+        if thread_id is None:
+            created_at = created_at or _now()
+            cur = self._conn.execute(
+                'INSERT INTO threads (agent, name, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                (agent, name, created_at, created_at),
+            )
+            thread_id = cur.lastrowid
+        return thread_id
+
+    def has_thread(self, agent: str, name: str) -> bool:
+        with self._lock:
+            return self._thread_id(agent, name) is not None
+
+    def list_threads(self, agent: str, *, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List threads for an agent key (name, created_at, updated_at, message_count).
+
+        Reads only thread rows, oldest thread first; offset/limit page through them.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT name, created_at, updated_at, message_count
+                FROM threads
+                WHERE agent = ?
+                ORDER BY id
+                LIMIT ? OFFSET ?
+                """,
+                (agent, -1 if limit is None else max(0, limit), max(0, offset)),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def thread_info(self, agent: str, name: str) -> Dict[str, Any]:
+        """Return a thread's metadata and summary without its messages, or {} if missing."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT name, created_at, updated_at, message_count,
+                       summary, summary_seq, summary_updated_at, unsummarized_tokens,
+                       (SELECT m.timestamp FROM messages m
+                        WHERE m.thread_id = threads.id AND m.seq > threads.summary_seq
+                        ORDER BY m.seq LIMIT 1) AS unsummarized_since
+                FROM threads
+                WHERE agent = ? AND name = ?
+                """,
+                (agent, name),
+            ).fetchone()
+        return dict(row) if row else {}
+
+    def create_thread(self, agent: str, name: str, created_at: Optional[str] = None) -> Dict[str, Any]:
+        with self.transaction():
+            if self._thread_id(agent, name) is not None:
+                raise ValueError(f'thread already exists: {name}')
+            created_at = created_at or _now()
+            self._ensure_thread(agent, name, created_at)
+        return {'messages': [], 'created_at': created_at}
+
+    def delete_thread(self, agent: str, name: str) -> bool:
+        with self.transaction():
+            cur = self._conn.execute(
+                'DELETE FROM threads WHERE agent = ? AND name = ?', (agent, name)
+            )
+            return cur.rowcount > 0
+
+    def clear_thread(self, agent: str, name: str):
+        with self.transaction():
+            thread_id = self._thread_id(agent, name)
+            if thread_id is None:
+                raise ValueError(f'unknown thread: {name}')
+            self._conn.execute('DELETE FROM messages WHERE thread_id = ?', (thread_id,))
+            # last_seq is kept so seq stays monotonic for the thread
+            self._conn.execute(
+                """
+                UPDATE threads
+                SET message_count = 0, updated_at = ?, summary = NULL, summary_seq = 0,
+                    summary_updated_at = NULL, unsummarized_tokens = 0
+                WHERE id = ?
+                """,
+                (_now(), thread_id),
+            )
+
+    def get_thread(self, agent: str, name: str) -> Dict[str, Any]:
+        """Return thread data in the legacy dict shape, or {} if missing."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, created_at FROM threads WHERE agent = ? AND name = ?', (agent, name)
+            ).fetchone()
+            if row is None:
+                return {}
+            return {'messages': self._messages(row['id']), 'created_at': row['created_at']}
+
+    # ---------------- Messages ----------------
+    def _messages(
+        self,
+        thread_id: int,
+        *,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        last: Optional[int] = None,
+        since: Optional[str] = None,
+        timestamps: bool = True,
+    ) -> List[Dict[str, Any]]:
+        columns = 'role, content, timestamp' if timestamps else 'role, content'
+        where, params = 'thread_id = ?', [thread_id]
+        if since:
+            where += ' AND timestamp > ?'
+            params.append(since)
+        if last is not None:
+            # Tail: newest N (after offset from the end), returned oldest first
+            rows = self._conn.execute(
+                f'SELECT {columns} FROM messages WHERE {where} ORDER BY seq DESC LIMIT ? OFFSET ?',
+                (*params, max(0, last), max(0, offset)),
+            ).fetchall()
+            rows.reverse()
+        else:
+            rows = self._conn.execute(
+                f'SELECT {columns} FROM messages WHERE {where} ORDER BY seq LIMIT ? OFFSET ?',
+                (*params, -1 if limit is None else max(0, limit), max(0, offset)),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_messages(
+        self,
+        agent: str,
+        name: str,
+        *,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        last: Optional[int] = None,
+        since: Optional[str] = None,
+        timestamps: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Read a page of a thread's messages, oldest first.
+
+        - offset/limit: page from the start of the thread
+        - last: only the newest N messages (offset then counts from the end)
+        - since: only messages with a timestamp after this ISO timestamp
+        - timestamps: include each message's 'timestamp'
+        """
+        with self._lock:
+            thread_id = self._thread_id(agent, name)
+            if thread_id is None:
+                return []
+            return self._messages(
+                thread_id, offset=offset, limit=limit, last=last, since=since, timestamps=timestamps,
+            )
+
+    def get_recent_messages(
+        self, agent: str, name: str, token_budget: int, *, timestamps: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Return the newest messages whose cached token counts fit in token_budget.
+
+        Walks token counts newest-first and stops at the budget, so the cost
+        depends on what fits, not on the length of the thread. Messages
+        already folded into the thread summary are skipped. Oldest first.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, summary_seq FROM threads WHERE agent = ? AND name = ?', (agent, name)
+            ).fetchone()
+            if row is None:
+                return []
+            thread_id = row['id']
+            used, first_seq = 0, None
+            cur = self._conn.execute(
+                'SELECT seq, tokens FROM messages WHERE thread_id = ? AND seq > ? ORDER BY seq DESC',
+                (thread_id, row['summary_seq']),
+            )
+            for row in cur:
+                used += row['tokens'] or 0
+                if used > token_budget:
+                    break
+                first_seq = row['seq']
+            cur.close()
+            if first_seq is None:
+                return []
+            columns = 'role, content, timestamp' if timestamps else 'role, content'
+            rows = self._conn.execute(
+                f'SELECT {columns} FROM messages WHERE thread_id = ? AND seq >= ? ORDER BY seq',
+                (thread_id, first_seq),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def append_messages(self, agent: str, name: str, messages: Iterable[Dict[str, Any]]):
+        """Append messages to a thread, creating the thread if needed.
+
+        Each message is a dict with 'role', 'content' and optional 'timestamp'.
+        """
+        with self.transaction():
+            thread_id = self._ensure_thread(agent, name)
+            seq = self._conn.execute(
+                'SELECT last_seq FROM threads WHERE id = ?', (thread_id,)
+            ).fetchone()[0]
+            rows = []
+            for msg in messages:
+                seq += 1
+                rows.append((
+                    thread_id, seq, msg.get('role'), msg.get('content'),
+                    msg.get('timestamp') or _now(), message_tokens(msg),
+                ))
+            if not rows:
+                return
+            self._conn.executemany(
+                'INSERT INTO messages (thread_id, seq, role, content, timestamp, tokens) VALUES (?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+            self._conn.execute(
+                """
+                UPDATE threads
+                SET message_count = message_count + ?, last_seq = ?, updated_at = ?,
+                    unsummarized_tokens = unsummarized_tokens + ?
+                WHERE id = ?
+                """,
+                (len(rows), seq, max(row[4] for row in rows), sum(row[5] for row in rows), thread_id),
+            )
+
+    def append_message(self, agent: str, name: str, role: str, content: str):
+        self.append_messages(agent, name, [{'role': role, 'content': content}])
+
+    # ---------------- Search ----------------
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        # Match every word literally (AND); a trailing * keeps prefix matching
+        terms = []
+        for word in query.split():
+            prefix = word.endswith('*') and len(word) > 1
+            word = word.rstrip('*') if prefix else word
+            terms.append('"%s"%s' % (word.replace('"', '""'), '*' if prefix else ''))
+        return ' '.join(terms)
+
+    def search(
+        self, query: str, *, agent: Optional[str] = None, limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Full-text search over message content, best matches first.
+
+        - agent: restrict to one agent key (CHAT_SCOPE for chat threads)
+        Each hit has agent, thread, seq, role, timestamp, snippet and score.
+        """
+        if not query or not query.strip():
+            return []
+        where, params = '', []
+        if agent is not None:
+            where = ' AND t.agent = ?'
+            params.append(agent)
+        with self._lock:
+            if self._has_fts():
+                rows = self._conn.execute(
+                    f"""
+                    SELECT t.agent, t.name AS thread, m.seq, m.role, m.timestamp,
+                           snippet(messages_fts, 0, '[', ']', '...', 16) AS snippet,
+                           bm25(messages_fts) AS score
+                    FROM messages_fts
+                    JOIN messages m ON m.id = messages_fts.rowid
+                    JOIN threads t ON t.id = m.thread_id
+                    WHERE messages_fts MATCH ?{where}
+                    ORDER BY score
+                    LIMIT ?
+                    """,
+                    (self._fts_query(query), *params, max(0, limit)),
+                ).fetchall()
+            else:
+                like = '%' + query.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                rows = self._conn.execute(
+                    f"""
+                    SELECT t.agent, t.name AS thread, m.seq, m.role, m.timestamp,
+                           substr(m.content, 1, 200) AS snippet, 0.0 AS score
+                    FROM messages m
+                    JOIN threads t ON t.id = m.thread_id
+                    WHERE m.content LIKE ? ESCAPE '\\'{where}
+                    ORDER BY m.id DESC
+                    LIMIT ?
+                    """,
+                    (like, *params, max(0, limit)),
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ---------------- Compaction ----------------
+    def get_unsummarized_messages(self, agent: str, name: str, *, keep_last: int = 0) -> List[Dict[str, Any]]:
+        """Messages not yet folded into the summary, minus the newest keep_last.
+
+        Each dict has seq, role, content, timestamp and tokens, oldest first.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, summary_seq FROM threads WHERE agent = ? AND name = ?', (agent, name)
+            ).fetchone()
+            if row is None:
+                return []
+            rows = self._conn.execute(
+                """
+                SELECT seq, role, content, timestamp, tokens FROM messages
+                WHERE thread_id = ? AND seq > ?
+                ORDER BY seq
+                """,
+                (row['id'], row['summary_seq']),
+            ).fetchall()
+        if keep_last > 0:
+            rows = rows[:-keep_last]
+        return [dict(r) for r in rows]
+
+    def set_summary(self, agent: str, name: str, summary: str, upto_seq: int):
+        """Store a thread summary covering all messages up to upto_seq."""
+        with self.transaction():
+            thread_id = self._thread_id(agent, name)
+            if thread_id is None:
+                raise ValueError(f'unknown thread: {name}')
+            self._conn.execute(
+                """
+                UPDATE threads SET
+                    summary = ?, summary_seq = ?, summary_updated_at = ?,
+                    unsummarized_tokens = (
+                        SELECT COALESCE(SUM(tokens), 0) FROM messages WHERE thread_id = ? AND seq > ?
+                    )
+                WHERE id = ?
+                """,
+                (summary, upto_seq, _now(), thread_id, upto_seq, thread_id),
+            )
+
+    # ---------------- Export / import ----------------
+    PAGE_SIZE = 500
+
+    def iter_threads(self, *, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield every thread's metadata (all agent keys), optionally only those updated after since.
+
+        Reads one page at a time, so memory use does not depend on the number of threads.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    """
+                    SELECT id, agent, name, created_at, updated_at, summary, summary_seq
+                    FROM threads
+                    WHERE id > ? AND (? IS NULL OR updated_at > ?)
+                    ORDER BY id
+                    LIMIT ?
+                    """,
+                    (last_id, since, since, self.PAGE_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_id = rows[-1]['id']
+
+    def iter_messages(self, agent: str, name: str, *, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield a thread's messages (seq, role, content, timestamp) one page at a time."""
+        with self._lock:
+            thread_id = self._thread_id(agent, name)
+        if thread_id is None:
+            return
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    """
+                    SELECT seq, role, content, timestamp FROM messages
+                    WHERE thread_id = ? AND seq > ? AND (? IS NULL OR timestamp > ?)
+                    ORDER BY seq
+                    LIMIT ?
+                    """,
+                    (thread_id, last_seq, since, since, self.PAGE_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_seq = rows[-1]['seq']
+
+    def import_thread(
+        self,
+        agent: str,
+        name: str,
+        *,
+        created_at: Optional[str] = None,
+        summary: Optional[str] = None,
+        summary_seq: int = 0,
+    ):
+        """Create a thread if missing and adopt an exported summary if it is newer."""
+        with self.transaction():
+            thread_id = self._ensure_thread(agent, name, created_at)
+            if summary and summary_seq:
+                self._conn.execute(
+                    """
+                    UPDATE threads SET summary = ?, summary_seq = ?, summary_updated_at = ?
+                    WHERE id = ? AND summary_seq < ?
+                    """,
+                    (summary, summary_seq, _now(), thread_id, summary_seq),
+                )
+
+    def import_messages(self, agent: str, name: str, messages: Iterable[Dict[str, Any]]) -> int:
+        """Insert exported messages keeping their seq; ones at or below the thread's last seq are skipped.
+
+        This makes re-importing an (incremental) export idempotent. Messages
+        without a seq are appended. Returns the number inserted.
+        """
+        with self.transaction():
+            thread_id = self._ensure_thread(agent, name)
+            row = self._conn.execute(
+                'SELECT last_seq, summary_seq FROM threads WHERE id = ?', (thread_id,)
+            ).fetchone()
+            last_seq, summary_seq = row['last_seq'], row['summary_seq']
+            top = last_seq
+            rows = []
+            for msg in messages:
+                seq = msg.get('seq')
+                if seq is None:
+                    seq = top + 1
+                elif int(seq) <= last_seq:
+                    continue
+                top = max(top, int(seq))
+                rows.append((
+                    thread_id, int(seq), msg.get('role'), msg.get('content'),
+                    msg.get('timestamp') or _now(), message_tokens(msg),
+                ))
+            if not rows:
+                return 0
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO messages (thread_id, seq, role, content, timestamp, tokens) VALUES (?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+            self._conn.execute(
+                """
+                UPDATE threads SET
+                    message_count = message_count + ?,
+                    last_seq = MAX(last_seq, ?),
+                    updated_at = MAX(COALESCE(updated_at, ''), ?),
+                    unsummarized_tokens = unsummarized_tokens + ?
+                WHERE id = ?
+                """,
+                (
+                    len(rows),
+                    max(r[1] for r in rows),
+                    max(r[4] for r in rows),
+                    sum(r[5] for r in rows if r[1] > summary_seq),
+                    thread_id,
+                ),
+            )
+        return len(rows)
+
+    # ---------------- Legacy import ----------------
+    def import_legacy(self, agent: str, threads: Dict[str, Any]) -> int:
+        """Import threads from the legacy config.json layout.
+
+        Threads that already exist in the store are skipped, so an interrupted
+        migration can safely be re-run. Returns the number of threads imported.
+        """
+        imported = 0
+        with self.transaction():
+            for name, data in (threads or {}).items():
+                if not isinstance(data, dict) or self._thread_id(agent, name) is not None:
+                    continue
+                self._ensure_thread(agent, name, data.get('created_at'))
+                self.append_messages(agent, name, data.get('messages') or [])
+                imported += 1
+        return imported
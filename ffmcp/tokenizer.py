@@ -0,0 +1,279 @@
+"""Token counting used to budget prompts, before a request is sent
+
+estimate_tokens/message_tokens/messages_tokens are the model-agnostic
+estimate (CHARS_PER_TOKEN), used where no model is known, e.g. for the
+token counts stored with thread messages.
+
+token_counter(provider, model) returns a TokenCounter for one model:
+
+- models tiktoken knows (OpenAI's, whichever provider serves them) are
+  counted exactly when tiktoken is installed (`pip install tiktoken`);
+- other models get an estimate from a chars-per-token ratio. It starts
+  at a per-family default and is calibrated from the prompt token counts
+  providers report: the usage middleware calls observe() after each
+  text request, and the ratios are kept per provider/model in
+  ~/.ffmcp/token_calibration.json (saved at most once per SAVE_INTERVAL
+  and at exit).
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ffmcp.storage import atomic_write_json, file_lock
+
+
+# Rough average for English text across BPE tokenizers
+CHARS_PER_TOKEN = 4
+# Role/separator tokens most chat formats add around each message
+MESSAGE_OVERHEAD = 4
+
+# Starting chars-per-token ratio of provider families with denser tokenizers
+FAMILY_CHARS_PER_TOKEN: Dict[str, float] = {
+    'anthropic': 3.5,
+    'mistral': 3.5,
+}
+# Calibration: EWMA weight of the newest ratio, smallest prompt worth learning from, sane bounds
+CALIBRATION_ALPHA = 0.2
+MIN_CALIBRATION_CHARS = 200
+RATIO_BOUNDS = (1.0, 8.0)
+SAVE_INTERVAL = 5.0
+
+# OpenAI chat format: tokens per message, plus the tokens priming the reply
+_TIKTOKEN_MESSAGE_OVERHEAD = 3
+_TIKTOKEN_REPLY_OVERHEAD = 3
+
+logger = logging.getLogger('ffmcp.tokenizer')
+
+
+def estimate_tokens(text: Any) -> int:
+    """Estimate the token count of a string (or multimodal content list)."""
+    if not text:
+        return 0
+    if isinstance(text, list):
+        # Multimodal content parts: count text parts, ignore binary payloads
+        return sum(estimate_tokens(part.get('text')) for part in text if isinstance(part, dict))
+    if not isinstance(text, str):
+        text = str(text)
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Estimate the tokens one chat message adds to a prompt."""
+    return MESSAGE_OVERHEAD + estimate_tokens(message.get('content'))
+
+
+def messages_tokens(messages: Iterable[Dict[str, Any]]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return ' '.join(part.get('text') or '' for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else ('' if content is None else str(content))
+
+
+# ---------------- Per-model counters ----------------
+class TokenCounter:
+    """Counts tokens for one model by estimate (chars_per_token)."""
+
+    exact = False
+
+    def __init__(self, chars_per_token: float = CHARS_PER_TOKEN, samples: int = 0):
+        self.chars_per_token = chars_per_token
+        self.samples = samples
+
+    @property
+    def method(self) -> str:
+        calibrated = f', calibrated on {self.samples} requests' if self.samples else ''
+        return f'estimate ({self.chars_per_token:.2f} chars/token{calibrated})'
+
+    def count(self, text: Any) -> int:
+        text = _text(text)
+        return int(-(-len(text) // self.chars_per_token)) if text else 0
+
+    def message(self, message: Dict[str, Any]) -> int:
+        return MESSAGE_OVERHEAD + self.count(message.get('content'))
+
+    def messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        return sum(self.message(m) for m in messages)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens."""
+        if max_tokens <= 0:
+            return ''
+        if self.count(text) <= max_tokens:
+            return text
+        return text[:int(max_tokens * self.chars_per_token)]
+
+
+class TiktokenCounter(TokenCounter):
+    """Exact counts with a tiktoken encoding."""
+
+    exact = True
+
+    def __init__(self, encoding):
+        super().__init__()
+        self.encoding = encoding
+
+    @property
+    def method(self) -> str:
+        return f'tiktoken ({self.encoding.name})'
+
+    def count(self, text: Any) -> int:
+        text = _text(text)
+        return len(self.encoding.encode(text, disallowed_special=())) if text else 0
+
+    def message(self, message: Dict[str, Any]) -> int:
+        return _TIKTOKEN_MESSAGE_OVERHEAD + self.count(message.get('content')) + (1 if message.get('name') else 0)
+
+    def messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        return super().messages(messages) + _TIKTOKEN_REPLY_OVERHEAD
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ''
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+
+_encodings: Dict[str, Any] = {}
+
+
+def _encoding(model: Optional[str]):
+    """tiktoken's encoding for model, or None (not installed, unknown model, or not downloadable offline)."""
+    if not model:
+        return None
+    # Served models are often namespaced (openai/gpt-4o)
+    name = model.rsplit('/', 1)[-1]
+    if name not in _encodings:
+        try:
+            # Imported on first use, not at startup: every command building a Config imports this module
+            import tiktoken
+            _encodings[name] = tiktoken.encoding_for_model(name)
+        except (ImportError, KeyError):
+            _encodings[name] = None
+        except Exception as e:
+            # tiktoken fetches encodings on first use; offline we estimate instead
+            logger.debug("tiktoken encoding for %s unavailable: %s", name, e)
+            _encodings[name] = None
+    return _encodings[name]
+
+
+def token_counter(provider: str, model: Optional[str] = None, config=None) -> TokenCounter:
+    """The most accurate counter available for a provider/model.
+
+    Pass config to use the chars-per-token ratio calibrated for it.
+    """
+    encoding = _encoding(model)
+    if encoding is not None:
+        return TiktokenCounter(encoding)
+    if config is not None:
+        ratio, samples = calibration(config).ratio(provider, model)
+        if samples:
+            return TokenCounter(ratio, samples)
+    family = (provider or '').split(':', 1)[0]
+    return TokenCounter(FAMILY_CHARS_PER_TOKEN.get(family, CHARS_PER_TOKEN))
+
+
+# ---------------- Calibration ----------------
+class Calibration:
+    """Observed chars-per-token ratios per provider/model, persisted to a JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.Lock()
+        self._ratios: Dict[str, Dict[str, Any]] = self._read()
+        self._dirty = False
+        self._saved_at = 0.0
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def key(provider: str, model: Optional[str]) -> str:
+        return f'{provider}:{model}' if model else provider
+
+    def ratio(self, provider: str, model: Optional[str]):
+        """(chars per token, samples) for a provider/model; samples is 0 if never observed."""
+        with self._lock:
+            entry = self._ratios.get(self.key(provider, model))
+        if not entry:
+            return CHARS_PER_TOKEN, 0
+        return float(entry['chars_per_token']), int(entry.get('samples') or 0)
+
+    def observe(self, provider: str, model: Optional[str], chars: int, messages: int, prompt_tokens: int):
+        """Learn from a request of `chars` characters in `messages` messages that used prompt_tokens."""
+        content_tokens = prompt_tokens - messages * MESSAGE_OVERHEAD
+        if chars < MIN_CALIBRATION_CHARS or content_tokens <= 0:
+            return
+        observed = min(max(chars / content_tokens, RATIO_BOUNDS[0]), RATIO_BOUNDS[1])
+        key = self.key(provider, model)
+        with self._lock:
+            entry = self._ratios.get(key)
+            if entry:
+                observed = CALIBRATION_ALPHA * observed + (1 - CALIBRATION_ALPHA) * float(entry['chars_per_token'])
+            samples = int((entry or {}).get('samples') or 0) + 1
+            self._ratios[key] = {'chars_per_token': round(observed, 4), 'samples': samples, 'updated': time.time()}
+            self._dirty = True
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Merge our ratios into the file; per model, the most recently updated entry wins."""
+        with self._lock:
+            if not self._dirty:
+                return
+            ours = dict(self._ratios)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            with file_lock(self.lock_path):
+                merged = self._read()
+                for key, entry in ours.items():
+                    if entry.get('updated', 0) >= (merged.get(key) or {}).get('updated', 0):
+                        merged[key] = entry
+                atomic_write_json(self.path, merged)
+        except OSError as e:
+            logger.debug("could not save token calibration: %s", e)
+
+
+_calibrations: Dict[str, Calibration] = {}
+_calibrations_lock = threading.Lock()
+
+
+def calibration(config) -> Calibration:
+    """The shared Calibration for a config directory."""
+    path = Path(config.config_dir) / 'token_calibration.json'
+    with _calibrations_lock:
+        store = _calibrations.get(str(path))
+        if store is None:
+            store = _calibrations[str(path)] = Calibration(path)
+    return store
+
+
+def prompt_size(prompt: Any):
+    """(characters, messages) of a text prompt or chat message list, or None for other inputs."""
+    if isinstance(prompt, str):
+        # Sent as one user message
+        return len(prompt), 1
+    if isinstance(prompt, list) and prompt and all(isinstance(m, dict) and isinstance(m.get('content'), str) for m in prompt):
+        return sum(len(m['content']) for m in prompt), len(prompt)
+    return None
+
+
+@atexit.register
+def _save_all():
+    with _calibrations_lock:
+        stores: List[Calibration] = list(_calibrations.values())
+    for store in stores:
+        store.save()
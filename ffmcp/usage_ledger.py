@@ -0,0 +1,211 @@
+"""Append-only token usage ledger with compaction into daily rollups"""
+import contextvars
+import hashlib
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from ffmcp.storage import append_line, atomic_write_json, file_lock, read_json_object
+
+
+# Extra fields added to every record written in the current context (see usage_tags)
+_tags: contextvars.ContextVar = contextvars.ContextVar('ffmcp_usage_tags', default={})
+
+
+@contextmanager
+def usage_tags(**tags: Any):
+    """Add fields to the usage records of all provider calls made inside the block.
+
+    Lets a caller label calls whose usage the providers record themselves,
+    e.g. which side of a hedged request (see ffmcp.hedging) a call was.
+    """
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+class UsageLedger:
+    """Records one JSON line per provider call and folds them into daily totals.
+
+    Files (all under the ffmcp config dir):
+    - usage.jsonl: live ledger, appended to on every call (O(1), no rewrite)
+    - tokens.json: daily rollups { "YYYY-MM-DD": { "openai": 1234 } }
+    - usage-archive/YYYY-MM.jsonl: ledger records that were already rolled up
+    - usage.jsonl.pending: the ledger being compacted (only left by a crash)
+
+    Writers hold a shared lock while appending; compaction takes the lock
+    exclusively, so concurrent ffmcp processes never lose increments.
+    """
+
+    # Compact once the live ledger grows past this many bytes (~1-2k calls)
+    COMPACT_BYTES = 256 * 1024
+    # tokens.json key holding the digest of the last ledger folded into it
+    FOLDED_KEY = '_folded'
+
+    def __init__(self, config_dir: Path):
+        self.config_dir = Path(config_dir)
+        self.ledger_file = self.config_dir / 'usage.jsonl'
+        self.pending_file = self.config_dir / 'usage.jsonl.pending'
+        self.rollup_file = self.config_dir / 'tokens.json'
+        self.archive_dir = self.config_dir / 'usage-archive'
+        self.lock_file = self.config_dir / 'usage.lock'
+
+    # ---------------- Writing ----------------
+    def record(
+        self,
+        provider: str,
+        total_tokens: int,
+        *,
+        model: Optional[str] = None,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        when: Optional[datetime] = None,
+        **extra: Any,
+    ):
+        """Append one usage record to the ledger."""
+        when = (when or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        record = {
+            'ts': when.isoformat(),
+            'provider': provider,
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': int(total_tokens),
+        }
+        record.update(_tags.get())
+        record.update({k: v for k, v in extra.items() if v is not None})
+        with file_lock(self.lock_file, shared=True):
+            append_line(self.ledger_file, json.dumps(record, separators=(',', ':')))
+        try:
+            needs_compaction = self.ledger_file.stat().st_size > self.COMPACT_BYTES
+        except OSError:
+            needs_compaction = False
+        if needs_compaction:
+            self.compact()
+
+    # ---------------- Compaction ----------------
+    def _load_rollups(self) -> Dict[str, Any]:
+        # An unreadable file is moved aside, never overwritten with partial totals
+        return read_json_object(self.rollup_file)
+
+    @staticmethod
+    def _parse_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn line can only come from a crash mid-append; skip it
+                continue
+            if isinstance(rec, dict):
+                yield rec
+
+    def compact(self):
+        """Fold the live ledger into tokens.json and move it to the archive.
+
+        The ledger is first renamed to usage.jsonl.pending, and tokens.json
+        records the digest of the pending file it has folded (FOLDED_KEY). A
+        compaction interrupted at any point is finished by the next one,
+        without counting its records twice.
+        """
+        with file_lock(self.lock_file):
+            if self.pending_file.exists():
+                self._fold_pending()
+            try:
+                if self.ledger_file.stat().st_size == 0:
+                    return
+            except FileNotFoundError:
+                return
+            # New records go to a fresh ledger from here on
+            os.replace(str(self.ledger_file), str(self.pending_file))
+            self._fold_pending()
+
+    def _fold_pending(self):
+        logger = logging.getLogger('ffmcp.usage')
+        with open(self.pending_file, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        rollups = self._load_rollups()
+        archive: Dict[str, list] = {}
+        count = 0
+        folded = rollups.get(self.FOLDED_KEY) == digest
+        for rec in self._parse_lines(raw.decode('utf-8', errors='replace').splitlines()):
+            day = str(rec.get('ts') or '')[:10]
+            if not day:
+                continue
+            archive.setdefault(day[:7], []).append(json.dumps(rec, separators=(',', ':')))
+            count += 1
+            provider = rec.get('provider')
+            try:
+                tokens = int(rec.get('total_tokens') or 0)
+            except (TypeError, ValueError):
+                continue
+            if provider and tokens > 0 and not folded:
+                day_entry = rollups.setdefault(day, {})
+                day_entry[provider] = int(day_entry.get(provider, 0)) + tokens
+        if not folded:
+            rollups[self.FOLDED_KEY] = digest
+            atomic_write_json(self.rollup_file, rollups)
+        self.archive_dir.mkdir(exist_ok=True)
+        for month, lines in archive.items():
+            _append_once(self.archive_dir / f'{month}.jsonl', ('\n'.join(lines) + '\n').encode('utf-8'))
+        # Rollups and archive are durable; now drop the folded records
+        os.unlink(str(self.pending_file))
+        logger.debug("compacted %d usage records into %s", count, self.rollup_file)
+
+    # ---------------- Reading ----------------
+    def daily_totals(self, day: str) -> Dict[str, int]:
+        """Return { provider: tokens } for a UTC day ('YYYY-MM-DD')."""
+        self.compact()
+        day_entry = self._load_rollups().get(day) or {}
+        return {k: int(v or 0) for k, v in day_entry.items()}
+
+    def iter_records(self, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield archived and live ledger records, oldest month first.
+
+        - since: optional ISO timestamp; earlier records are skipped.
+        """
+        if self.pending_file.exists():
+            # Finish an interrupted compaction first, so its records are read exactly once
+            self.compact()
+        paths = sorted(self.archive_dir.glob('*.jsonl')) if self.archive_dir.exists() else []
+        if since:
+            paths = [p for p in paths if p.stem >= since[:7]]
+        paths.append(self.ledger_file)
+        for path in paths:
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for rec in self._parse_lines(f):
+                    if since and str(rec.get('ts') or '') < since:
+                        continue
+                    yield rec
+
+
+def _append_once(path: Path, block: bytes):
+    """Append block to path unless the file already ends with it (a retried compaction)."""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        size = 0
+    with open(path, 'ab+') as f:
+        if size >= len(block):
+            f.seek(size - len(block))
+            if f.read() == block:
+                return
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b'\n':
+                # A torn write: keep it on its own (skipped) line
+                block = b'\n' + block
+        f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
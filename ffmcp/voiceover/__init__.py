@@ -2,14 +2,22 @@
 from typing import Dict, Type
 import logging
 from ffmcp.voiceover.base import BaseTTSProvider
-from ffmcp.voiceover.elevenlabs_provider import ElevenLabsProvider
-from ffmcp.voiceover.fishaudio_provider import FishAudioProvider
+from ffmcp.registry import LazyRegistry
 
 
-AVAILABLE_TTS_PROVIDERS: Dict[str, Type[BaseTTSProvider]] = {
-    'elevenlabs': ElevenLabsProvider,
-    'fishaudio': FishAudioProvider,
-}
+# TTS provider modules (and their SDKs) are imported only when used
+AVAILABLE_TTS_PROVIDERS: Dict[str, Type[BaseTTSProvider]] = LazyRegistry({
+    'elevenlabs': 'ffmcp.voiceover.elevenlabs_provider:ElevenLabsProvider',
+    'fishaudio': 'ffmcp.voiceover.fishaudio_provider:FishAudioProvider',
+})
+
+
+def __getattr__(name: str):
+    # Keep `from ffmcp.voiceover import ElevenLabsProvider` working without eager imports
+    for provider in AVAILABLE_TTS_PROVIDERS:
+        if AVAILABLE_TTS_PROVIDERS.path(provider).endswith(f':{name}'):
+            return AVAILABLE_TTS_PROVIDERS[provider]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_tts_provider(name: str, config) -> BaseTTSProvider:
@@ -24,4 +32,3 @@ def get_tts_provider(name: str, config) -> BaseTTSProvider:
     instance = provider_class(config)
     logger.debug("TTS provider instantiated class=%s", instance.__class__.__name__)
     return instance
-
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Measure ffmcp CLI cold-start time against targets.
+
+Runs each command several times in a fresh interpreter and reports the
+median wall time. `generate` is measured up to the point where it would
+call the provider: it runs with an empty HOME and no API key, so it
+imports everything a real call needs and then exits with a key error.
+Its target is on ffmcp's own overhead, i.e. the time beyond importing
+the provider SDK (`import openai`), which no CLI layout can avoid.
+
+Usage:
+    python scripts/bench_startup.py            # report, exit 1 if a target is missed
+    python scripts/bench_startup.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Median wall time targets in milliseconds
+TARGETS_MS = {
+    'ffmcp --help': 250,             # including interpreter startup
+    'generate overhead': 200,        # ffmcp generate minus `import openai`
+}
+
+
+def _time_command(args, env, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='runs per command (default: 10)')
+    args = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ffmcp = [sys.executable, '-m', 'ffmcp.cli']
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=repo_root)
+        env.pop('OPENAI_API_KEY', None)
+        env.pop('openai_API_KEY', None)
+        commands = {
+            'python -c pass': [sys.executable, '-c', 'pass'],
+            'import openai': [sys.executable, '-c', 'import openai'],
+            'ffmcp --help': ffmcp + ['--help'],
+            'ffmcp generate': ffmcp + ['generate', 'hello', '-p', 'openai'],
+        }
+        results = {name: _time_command(command, env, args.runs) for name, command in commands.items()}
+    results['generate overhead'] = results['ffmcp generate'] - results['import openai']
+
+    failed = False
+    for name, median in results.items():
+        target = TARGETS_MS.get(name)
+        status = ''
+        if target is not None:
+            ok = median <= target
+            failed = failed or not ok
+            status = f"  (target {target} ms: {'ok' if ok else 'MISSED'})"
+        print(f"{name:<18} {median:7.1f} ms{status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
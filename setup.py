@@ -38,6 +38,7 @@ setup(
         "anthropic": ["anthropic>=0.18.0"],
         "zep": ["zep-cloud>=0.3.0", "zep-python>=0.40.0"],
         "leann": ["leann>=0.3.0"],
+        "tokenizer": ["tiktoken>=0.5.0"],
         "all": [
             "openai>=1.0.0",
             "anthropic>=0.18.0",
@@ -47,9 +48,10 @@ setup(
             "groq>=0.4.0",
             "mistralai>=1.0.0",
             "together>=1.0.0",
-            "cohere>=4.0.0",
+            "cohere>=5.0.0",
             "elevenlabs>=1.0.0",
             "fish-audio-sdk>=1.0.0",
+            "tiktoken>=0.5.0",
         ],
     },
     entry_points={